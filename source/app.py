@@ -1,16 +1,16 @@
 import json
 import sys
-from io import StringIO, TextIOWrapper
+from io import TextIOWrapper
 
 from threading import ThreadError
 from typing import Union
 
-import cv2
-import numpy as np
 from PyQt6.QtCore import pyqtSignal, QThread, Qt
 
 from copilot.copilot import Copilot
 from datainterface.data_interface import DataInterface
+from datainterface.frame_processing import load_fisheye_calibration
+from datainterface.line_queue import LineQueueStream
 from dock import Dock
 from grapher.grapher import Grapher
 from pilot.pilot import Pilot
@@ -28,16 +28,24 @@ class App(QApplication):
     task_checked = pyqtSignal(QWidget)
 
     def __init__(self,
-                 redirect_stdout: Union[StringIO, TextIOWrapper],
-                 redirect_stderr: Union[StringIO, TextIOWrapper],
+                 redirect_stdout: Union[LineQueueStream, TextIOWrapper],
+                 redirect_stderr: Union[LineQueueStream, TextIOWrapper],
                  argv,
                  local_test=True,
                  rov_ip="localhost",
                  float_ip="localhost",
-                 video_feed_count=2):
+                 video_feed_count=2,
+                 video_render_fps=0,
+                 video_decode_in_process=False,
+                 show_video_latency=False,
+                 telemetry_display_fps=30):
         self.setStyle("Fusion")
 
         self.video_feed_count = video_feed_count
+        self.video_render_fps = video_render_fps  # 0 caps video rendering at the monitor's refresh rate
+        self.video_decode_in_process = video_decode_in_process
+        self.show_video_latency = show_video_latency
+        self.telemetry_display_fps = telemetry_display_fps
 
         self.redirect_stdout = redirect_stdout
         self.redirect_stderr = redirect_stderr
@@ -62,27 +70,7 @@ class App(QApplication):
                 conf = self.feed_config[str(i)]
                 if conf["type"] == "fisheye":
                     try:
-                        conf["calibration_data"] = np.load(conf["undistort_file"])
-
-                        for key in ["camera_matrix", "dist_coeffs", "new_camera_matrix", "roi"]:
-                            if key not in conf["calibration_data"]:
-                                raise KeyError()
-
-                        new_camera_matrix, _ = cv2.getOptimalNewCameraMatrix(
-                            conf["calibration_data"]["camera_matrix"],
-                            conf["calibration_data"]["dist_coeffs"],
-                            (conf["width"], conf["height"]), alpha=0
-                        )
-
-                        conf["map1"], conf["map2"] = cv2.initUndistortRectifyMap(
-                            conf["calibration_data"]["camera_matrix"],
-                            conf["calibration_data"]["dist_coeffs"],
-                            None,
-                            new_camera_matrix,
-                            (conf["width"], conf["height"]),
-                            cv2.CV_16SC2
-                        )
-
+                        load_fisheye_calibration(conf)
                     except FileNotFoundError:
                         print(f"Path to Feed {i} Undistort File is Invalid: `{conf['undistort_file']}`", file=sys.__stderr__)
                         exit(1)
@@ -105,6 +93,7 @@ class App(QApplication):
             with open("port_bindings.json", "r") as f:
                 self.port_bindings = json.load(f)
             ports = []
+            # "black_box" is optional, without it telemetry missed while disconnected isn't fetched
             for binding in ["data", "float_data", "stdout", "control", "power", "action"]:
                 if binding not in self.port_bindings:
                     raise json.decoder.JSONDecodeError(f"File is missing port for {self.port_bindings}",
@@ -199,7 +188,7 @@ class App(QApplication):
         # Local redirected stdout/stderr should be passed so that it can be processed in this thread.
         self.data_interface_thread = QThread()
         self.data_interface: DataInterface = DataInterface(self, windows, redirect_stdout, redirect_stderr,
-                                                           self.video_feed_count)
+                                                           self.video_feed_count, self.video_decode_in_process)
         self.data_interface.moveToThread(self.data_interface_thread)
         self.data_interface_thread.start()
 
@@ -264,6 +253,11 @@ class App(QApplication):
                 print("Killed float data source", file=sys.__stdout__, flush=True)
             except Exception as e:
                 print("Couldn't kill float data source - ", e, file=sys.__stdout__, flush=True)
+        # Let pictures still being taken or saved finish, so they and their telemetry aren't lost
+        grapher = getattr(self, "grapher_window", None)
+        if grapher is not None and grapher.snapshots is not None:
+            print("Waiting for pictures to be saved", file=sys.__stdout__, flush=True)
+            grapher.snapshots.wait()
         # Rejoin threads before closing
         try:
             self.data_interface.close()
@@ -0,0 +1,236 @@
+import json
+import mmap
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Iterator
+
+import numpy as np
+
+from data_classes import black_box_format as fmt
+from data_classes.controller_frame import ControllerFrame
+from datainterface.telemetry_history import telemetry_fields
+
+# SEGMENT HEADER = (Magic, Version, Payload Size, Record Count, First Time, Last Time, First Monotonic Time,
+# Last Monotonic Time, Fields JSON Length, Fields JSON) padded to SEGMENT_HEADER_SIZE, followed by the segment's records
+SEGMENT_MAGIC = b"ROVB"
+SEGMENT_VERSION = 2
+SEGMENT_HEADER_FORMAT = "<4sHHIddddH"
+SEGMENT_HEADER_SIZE = 4096
+SEGMENT_COUNTS_FORMAT = "<Idddd"  # Record Count and the time ranges, rewritten with every record
+SEGMENT_COUNTS_OFFSET = 8
+
+
+@dataclass
+class Segment:
+    number: int
+    path: Path
+    payload_size: int
+    fields: list[str]
+    count: int = 0
+    first_time: float = float("inf")
+    last_time: float = -float("inf")
+    first_monotonic: float = float("inf")
+    last_monotonic: float = -float("inf")
+    # Written by this run of the ROV with its own clocks, so its monotonic times compare with time.monotonic's
+    this_run: bool = False
+
+
+class BlackBox:
+    """
+        Records every telemetry sample, controller command and event on the ROV, so that what the UI missed while
+        the tether was down can be fetched once it's back.
+        Records are a fixed size and written into memory mapped segment files of segment_records records, so
+        recording is a copy into memory and never waits for the disk. Each segment's header holds its record count
+        and time ranges, updated with every record, and is the index: fetching only reads the segments overlapping
+        the requested range, and finds records within them by binary search on time.
+        Records hold both the wall clock, which the UI asks for ranges in, and the monotonic clock, which they are
+        ordered and searched by, as the wall clock can step while recording.
+        When the segments exceed max_bytes the oldest is deleted, so disk use is bounded.
+    """
+
+    def __init__(self, directory: str, data: object, max_bytes: int = 256 * 2 ** 20, segment_records: int = 16384,
+                 flush_interval: float = 5):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fields = telemetry_fields(data)
+        self.getters = [tuple(field.split(".")) if "." in field else (field, None) for field in self.fields]
+        self.payload_size = fmt.payload_size(len(self.fields))
+        self.record_size = fmt.RECORD_HEADER_SIZE + self.payload_size
+        self.segment_records = segment_records
+        self.segment_size = SEGMENT_HEADER_SIZE + segment_records * self.record_size
+        self.max_segments = max(2, max_bytes // self.segment_size)
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self.lock = Lock()
+
+        self.segments = self.load_index()
+        self.current: Segment | None = None
+        self.file = None
+        self.map: mmap.mmap | None = None
+
+        # Statistics
+        self.records = 0
+        self.deleted_segments = 0
+
+    def load_index(self) -> list[Segment]:
+        # Segments left by previous runs, oldest first
+        segments = []
+        for path in sorted(self.directory.glob("segment_*.bin")):
+            try:
+                with open(path, "rb") as f:
+                    header = f.read(SEGMENT_HEADER_SIZE)
+                magic, version, size, count, first_time, last_time, first_monotonic, last_monotonic, fields_length = \
+                    struct.unpack_from(SEGMENT_HEADER_FORMAT, header)
+                if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+                    raise ValueError("not a black box segment of this version")
+                offset = struct.calcsize(SEGMENT_HEADER_FORMAT)
+                fields = json.loads(header[offset:offset + fields_length])
+                segments.append(Segment(int(path.stem.split("_")[1]), path, size, fields, count, first_time, last_time,
+                                        first_monotonic, last_monotonic))
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Ignoring black box segment {path.name}:", e, file=sys.stderr)
+        return segments
+
+    def open_segment(self) -> None:
+        number = self.segments[-1].number + 1 if self.segments else 0
+        segment = Segment(number, self.directory / f"segment_{number:08d}.bin", self.payload_size, self.fields,
+                          this_run=True)
+        fields_json = json.dumps(self.fields).encode()
+        if struct.calcsize(SEGMENT_HEADER_FORMAT) + len(fields_json) > SEGMENT_HEADER_SIZE:
+            raise ValueError("Too many telemetry fields for a black box segment header")
+
+        self.file = open(segment.path, "w+b")
+        self.file.truncate(self.segment_size)
+        self.map = mmap.mmap(self.file.fileno(), self.segment_size)
+        struct.pack_into(SEGMENT_HEADER_FORMAT, self.map, 0, SEGMENT_MAGIC, SEGMENT_VERSION, segment.payload_size,
+                         segment.count, segment.first_time, segment.last_time, segment.first_monotonic,
+                         segment.last_monotonic, len(fields_json))
+        offset = struct.calcsize(SEGMENT_HEADER_FORMAT)
+        self.map[offset:offset + len(fields_json)] = fields_json
+        self.segments.append(segment)
+        self.current = segment
+
+        while len(self.segments) > self.max_segments:
+            oldest = self.segments.pop(0)
+            try:
+                oldest.path.unlink()
+                self.deleted_segments += 1
+            except OSError as e:
+                print(f"Could not delete black box segment {oldest.path.name}:", e, file=sys.stderr)
+
+    def close_segment(self) -> None:
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.file.close()
+            self.map = None
+            self.file = None
+            self.current = None
+
+    def record(self, kind: int, payload: bytes, sequence: int = 0, timestamp: float | None = None,
+               monotonic: float | None = None) -> None:
+        # timestamp and monotonic default to time.time and time.monotonic. A timestamp given without a monotonic
+        # time is on a clock of the caller's, such as the simulator's, and is stored as both, with its segment
+        # searched by wall clock time like earlier runs' as its monotonic times don't compare with this run's
+        payload = payload[:self.payload_size]
+        with self.lock:
+            # Timed under the lock, so records are in monotonic time order whichever thread writes them
+            external = timestamp is not None and monotonic is None
+            if external:
+                monotonic = timestamp
+            monotonic = time.monotonic() if monotonic is None else monotonic
+            timestamp = time.time() if timestamp is None else timestamp
+            if self.current is None or self.current.count == self.segment_records:
+                self.close_segment()
+                self.open_segment()
+            segment = self.current
+            if external:
+                segment.this_run = False
+            offset = SEGMENT_HEADER_SIZE + segment.count * self.record_size
+            struct.pack_into(fmt.RECORD_HEADER_FORMAT, self.map, offset, timestamp, monotonic, kind, len(payload),
+                             sequence)
+            self.map[offset + fmt.RECORD_HEADER_SIZE:offset + fmt.RECORD_HEADER_SIZE + len(payload)] = payload
+            segment.count += 1
+            segment.first_time = min(segment.first_time, timestamp)
+            segment.last_time = max(segment.last_time, timestamp)
+            segment.first_monotonic = min(segment.first_monotonic, monotonic)
+            segment.last_monotonic = max(segment.last_monotonic, monotonic)
+            struct.pack_into(SEGMENT_COUNTS_FORMAT, self.map, SEGMENT_COUNTS_OFFSET, segment.count,
+                             segment.first_time, segment.last_time, segment.first_monotonic, segment.last_monotonic)
+            self.records += 1
+
+    def record_telemetry(self, data: object, timestamp: float | None = None, monotonic: float | None = None) -> None:
+        values = []
+        for attr, component in self.getters:
+            value = getattr(data, attr, np.nan)
+            values.append(getattr(value, component) if component is not None else value)
+        self.record(fmt.KIND_TELEMETRY, struct.pack(f"<{len(values)}d", *values), timestamp=timestamp,
+                    monotonic=monotonic)
+
+    def record_command(self, frame: ControllerFrame, outputs=()) -> None:
+        payload = frame.encode() + struct.pack(f"<{len(outputs)}f", *outputs)
+        self.record(fmt.KIND_COMMAND, payload, frame.sequence)
+
+    def record_event(self, text: str) -> None:
+        self.record(fmt.KIND_EVENT, text.encode())
+
+    def flush_if_due(self) -> None:
+        # Writes recorded pages to disk every flush_interval, so a power cut loses at most that much
+        if time.monotonic() - self.last_flush < self.flush_interval:
+            return
+        self.last_flush = time.monotonic()
+        with self.lock:
+            if self.map is not None:
+                self.map.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            self.close_segment()
+
+    def fetch(self, start: float, end: float, chunk_records: int = 4096) -> Iterator[dict]:
+        # Records from start to end (ROV wall clock) in chunks of at most chunk_records, each with the fields and
+        # payload size needed to decode it. The range is mapped onto the monotonic clock by the clocks' offset now,
+        # so records are found even if the wall clock stepped since they were written. Earlier runs' monotonic
+        # times don't compare with this run's, so their segments are searched by wall clock time instead.
+        offset = time.time() - time.monotonic()
+        with self.lock:
+            segments = [segment for segment in self.segments if segment.count and (
+                segment.last_monotonic >= start - offset and segment.first_monotonic <= end - offset
+                if segment.this_run else segment.last_time >= start and segment.first_time <= end)]
+        for segment in segments:
+            with self.lock:
+                if segment is self.current:
+                    records = np.frombuffer(self.map, fmt.record_dtype(segment.payload_size), segment.count,
+                                            SEGMENT_HEADER_SIZE).copy()
+                else:
+                    records = None
+            if records is None:
+                try:
+                    records = np.fromfile(segment.path, fmt.record_dtype(segment.payload_size), segment.count,
+                                          offset=SEGMENT_HEADER_SIZE)
+                except OSError:
+                    # Deleted to make room since
+                    continue
+
+            # Records are written in monotonic time order, so the range is found by binary search. Wall clock times
+            # are only in order once sorted, as the wall clock may have stepped back
+            if segment.this_run:
+                times, low, high = records["monotonic"], start - offset, end - offset
+            else:
+                records = records[np.argsort(records["time"], kind="stable")]
+                times, low, high = records["time"], start, end
+            first = np.searchsorted(times, low, side="left")
+            last = np.searchsorted(times, high, side="right")
+            for i in range(first, last, chunk_records):
+                chunk = records[i:min(i + chunk_records, last)]
+                yield {"fields": segment.fields, "payload_size": segment.payload_size, "records": chunk.tobytes()}
+
+    def summary(self) -> str:
+        used = sum(segment.path.stat().st_size for segment in self.segments if segment.path.exists())
+        return (f"Black box {self.records} records this run, {len(self.segments)} segments using "
+                f"{used / 2 ** 20:.0f} of {self.max_segments * self.segment_size / 2 ** 20:.0f} MB, "
+                f"{self.deleted_segments} old segments deleted")
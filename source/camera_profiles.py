@@ -0,0 +1,127 @@
+import sys
+import time
+
+PROFILE_KEYS = ("width", "height", "bitrate", "framerate")
+DEFAULT_PROFILE = {"width": 1280, "height": 720, "bitrate": 4000000, "framerate": 30}
+
+# Steps of the adaptive quality ladder, as (Resolution Scale, Bitrate Scale) of a camera's base profile
+QUALITY_LADDER = ((1, 1), (1, 0.7), (0.75, 0.5), (0.75, 0.35), (0.5, 0.2))
+
+
+def _even(value: float) -> int:
+    # Encoders need even frame dimensions
+    return max(2, round(value / 2) * 2)
+
+
+class CameraProfiles:
+    """
+        The encode profile of each camera on the ROV.
+        Each camera has a base profile from camera_data, which SET_CAM_PROFILE can change at runtime.
+        In adaptive mode the UI reports each feed's drop rate and arrival delay, and cameras are stepped down or up
+        the QUALITY_LADDER. The tether is shared, so when any feed struggles the least important camera that can
+        still step down does so first. Cameras with a higher "priority" in camera_data are degraded last.
+    """
+
+    def __init__(self, camera_data: list[dict],
+                 drop_threshold: float = 0.02,
+                 latency_threshold_ms: float = 150,
+                 down_after: int = 2,
+                 up_after: int = 10,
+                 hold_seconds: float = 5):
+        self.base = [DEFAULT_PROFILE | {key: camera[key] for key in PROFILE_KEYS if key in camera}
+                     for camera in camera_data]
+        self.priority = [camera.get("priority", 0) for camera in camera_data]
+        self.count = len(camera_data)
+
+        self.drop_threshold = drop_threshold
+        self.latency_threshold_ms = latency_threshold_ms
+        self.down_after = down_after  # Consecutive bad reports before stepping down
+        self.up_after = up_after  # Consecutive good reports from every feed before stepping up
+        self.hold_seconds = hold_seconds  # Minimum time between changes to a camera, so it can settle
+
+        self.adaptive = False
+        self.levels = [0] * self.count
+        self.bad_reports = [0] * self.count
+        self.good_reports = [0] * self.count
+        self.last_change = [0.0] * self.count
+
+    def profile(self, i: int) -> dict:
+        scale, bitrate_scale = QUALITY_LADDER[self.levels[i]]
+        base = self.base[i]
+        return base | {"width": _even(base["width"] * scale),
+                       "height": _even(base["height"] * scale),
+                       "bitrate": int(base["bitrate"] * bitrate_scale)}
+
+    def set_profile(self, i: int, profile: dict) -> bool:
+        # Returns True if the camera's profile changed and so its encoder needs restarting
+        if not 0 <= i < self.count:
+            print(f"There is no camera {i} to change the profile of", file=sys.stderr)
+            return False
+        unknown = [key for key in profile if key not in PROFILE_KEYS]
+        if unknown:
+            print(f"Camera profiles can only set {PROFILE_KEYS}, not {unknown}", file=sys.stderr)
+            return False
+        self.base[i] = self.base[i] | profile
+        self.set_level(i, 0)
+        return True
+
+    def set_adaptive(self, enabled: bool) -> list[int]:
+        # Returns the cameras that need restarting. Turning adaptive mode off returns every camera to its base profile.
+        self.adaptive = enabled
+        self.bad_reports = [0] * self.count
+        self.good_reports = [0] * self.count
+        changed = [i for i in range(self.count) if self.levels[i] != 0]
+        if not enabled:
+            for i in changed:
+                self.set_level(i, 0)
+            return changed
+        return []
+
+    def set_level(self, i: int, level: int) -> None:
+        self.levels[i] = level
+        self.last_change[i] = time.time()
+
+    def feedback(self, reports: list[tuple[float, float] | None]) -> list[int]:
+        # Reports are (Drop Rate, Arrival Delay ms) of each feed since the last report, or None for a feed
+        # that received nothing. Returns the cameras whose profile changed, which need restarting.
+        if not self.adaptive:
+            return []
+        reporting = []
+        for i, report in enumerate(reports[:self.count]):
+            if report is None:
+                continue
+            reporting.append(i)
+            drop_rate, latency_ms = report
+            if drop_rate > self.drop_threshold or latency_ms > self.latency_threshold_ms:
+                self.bad_reports[i] += 1
+                self.good_reports[i] = 0
+            elif drop_rate <= self.drop_threshold / 4 and latency_ms <= self.latency_threshold_ms / 2:
+                self.good_reports[i] += 1
+                self.bad_reports[i] = 0
+            else:
+                self.bad_reports[i] = 0
+                self.good_reports[i] = 0
+
+        now = time.time()
+        settled = [i for i in range(self.count) if now - self.last_change[i] >= self.hold_seconds]
+
+        if any(bad >= self.down_after for bad in self.bad_reports):
+            candidates = [i for i in settled if self.levels[i] < len(QUALITY_LADDER) - 1]
+            if not candidates:
+                return []
+            # Least important first, and of those the one still at the highest quality
+            i = min(candidates, key=lambda c: (self.priority[c], self.levels[c]))
+            self.set_level(i, self.levels[i] + 1)
+            self.bad_reports = [0] * self.count
+            return [i]
+
+        if reporting and all(self.good_reports[i] >= self.up_after for i in reporting):
+            candidates = [i for i in settled if self.levels[i] > 0]
+            if not candidates:
+                return []
+            # Most important first, and of those the most degraded
+            i = max(candidates, key=lambda c: (self.priority[c], self.levels[c]))
+            self.set_level(i, self.levels[i] - 1)
+            self.good_reports = [0] * self.count
+            return [i]
+        return []
@@ -0,0 +1,185 @@
+import subprocess
+import sys
+import time
+from threading import Thread, Event, Lock
+from typing import Callable
+
+
+class SupervisedCamera:
+    """
+        Keeps one camera's encoder process running on its own thread.
+        The thread blocks in Popen.wait() while the encoder runs, so a healthy camera costs no CPU to supervise.
+        When the encoder exits it is restarted after a delay that doubles each time it fails to stay up for
+        stable_after seconds, up to max_backoff.
+    """
+
+    def __init__(self, index: int, get_command: Callable[[int], list[str]], show_output: bool = True,
+                 min_backoff: float = 1, max_backoff: float = 30, stable_after: float = 10):
+        self.index = index
+        self.get_command = get_command
+        self.show_output = show_output
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+
+        self.process: subprocess.Popen | None = None
+        self.process_lock = Lock()
+        self.thread: Thread | None = None
+        self.stopping = Event()
+        # Set by stop and restart to end a backoff wait early. Cleared as each encoder starts
+        self.wake = Event()
+        # Set, under process_lock, only while an encoder is running, so its exit isn't counted as a failure
+        self.restart_requested = False
+
+        # Statistics
+        self.restart_count = 0
+        self.started_at: float | None = None  # Start of the current run, None while not running
+        self.total_uptime = 0.0
+        self.last_exit_code: int | None = None
+
+    def is_running(self) -> bool:
+        return self.started_at is not None
+
+    def uptime(self) -> float:
+        # Seconds the encoder has been up for since it last started
+        started_at = self.started_at
+        return time.time() - started_at if started_at is not None else 0
+
+    def status(self) -> tuple[bool, float, int]:
+        # (Running, Uptime, Restart Count), as sent to the UI
+        return self.is_running(), self.uptime(), self.restart_count
+
+    def start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = Thread(target=self.supervise, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self.stopping.set()
+        self.wake.set()
+        self.terminate()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def restart(self) -> None:
+        # The supervisor starts the encoder again straight away, without backing off
+        if self.thread is None or not self.thread.is_alive():
+            self.start()
+            return
+        with self.process_lock:
+            if self.process is not None:
+                self.restart_requested = True
+        # Between encoders, this ends the backoff wait instead
+        self.wake.set()
+        self.terminate()
+
+    def terminate(self) -> None:
+        with self.process_lock:
+            process = self.process
+        if process is None:
+            return
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def supervise(self) -> None:
+        backoff = self.min_backoff
+        first = True
+        while not self.stopping.is_set():
+            command = self.get_command(self.index)
+            print(f"{'Starting' if first else 'Restarting'} camera {self.index}:", " ".join(command))
+            if not first:
+                self.restart_count += 1
+            first = False
+
+            output = None if self.show_output else subprocess.DEVNULL
+            try:
+                with self.process_lock:
+                    if self.stopping.is_set():
+                        break
+                    self.wake.clear()
+                    self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=output, stderr=output)
+            except OSError as e:
+                print(f"Could not start camera {self.index}:", e, file=sys.stderr)
+                self.wake.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            self.started_at = time.time()
+            # Blocks until the encoder exits or is terminated by stop/restart
+            self.last_exit_code = self.process.wait()
+            run_time = time.time() - self.started_at
+            self.total_uptime += run_time
+            self.started_at = None
+            with self.process_lock:
+                self.process = None
+                restart_requested, self.restart_requested = self.restart_requested, False
+
+            if self.stopping.is_set():
+                break
+            if restart_requested:
+                backoff = self.min_backoff
+                continue
+            print(f"Camera {self.index} exited with code {self.last_exit_code} after {run_time:.1f} s",
+                  file=sys.stderr)
+
+            # Only back off if the encoder keeps failing
+            if run_time >= self.stable_after:
+                backoff = self.min_backoff
+            self.wake.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+class CameraSupervisor:
+    """
+        Supervises the encoder process of each camera on the ROV. Cameras can be started, stopped and restarted
+        individually without affecting the others.
+    """
+
+    def __init__(self, camera_count: int, get_command: Callable[[int], list[str]], show_output: bool = True):
+        self.cameras = [SupervisedCamera(i, get_command, show_output) for i in range(camera_count)]
+
+    def start_all(self) -> None:
+        for camera in self.cameras:
+            camera.start()
+
+    def stop_all(self) -> None:
+        for camera in self.cameras:
+            camera.stopping.set()
+            camera.wake.set()
+            camera.terminate()
+        for camera in self.cameras:
+            camera.stop()
+
+    def restart_all(self) -> None:
+        for camera in self.cameras:
+            camera.restart()
+
+    def camera(self, i: int) -> SupervisedCamera | None:
+        if 0 <= i < len(self.cameras):
+            return self.cameras[i]
+        print(f"There is no camera {i}, the ROV has {len(self.cameras)} cameras", file=sys.stderr)
+        return None
+
+    def start_camera(self, i: int) -> None:
+        camera = self.camera(i)
+        if camera is not None:
+            camera.start()
+
+    def stop_camera(self, i: int) -> None:
+        camera = self.camera(i)
+        if camera is not None:
+            camera.stop()
+
+    def restart_camera(self, i: int) -> None:
+        camera = self.camera(i)
+        if camera is not None:
+            camera.restart()
+
+    def status(self) -> list[tuple[bool, float, int]]:
+        return [camera.status() for camera in self.cameras]
@@ -0,0 +1,114 @@
+from collections import deque
+
+from PyQt6.QtCore import QObject, QPoint, QTimer, Qt
+from PyQt6.QtWidgets import QPlainTextEdit
+
+from data_classes.stdout_type import StdoutType
+
+SOURCE_NAMES = {
+    StdoutType.UI: "UI",
+    StdoutType.UI_ERROR: "UI ERR",
+    StdoutType.ROV: "ROV",
+    StdoutType.ROV_ERROR: "ROV ERR"
+}
+
+
+class ConsoleView(QObject):
+    """
+        Shows UI and ROV output in a QPlainTextEdit, keeping only the last max_lines lines.
+        Lines are queued as they arrive and appended together once per frame, so the document is laid out and
+        scrolled once per frame however fast output arrives. Lines still queued beyond max_lines would be removed
+        as soon as they were shown, so are never shown.
+        Each line's block records its StdoutType, so sources can be hidden and shown again from the console's
+        context menu by hiding their blocks, without rebuilding the document.
+    """
+
+    def __init__(self, text_edit: QPlainTextEdit, max_lines: int = 5000, fps: float = 30):
+        super().__init__(text_edit)
+        self.text_edit = text_edit
+        self.text_edit.setMaximumBlockCount(max_lines)
+        self.text_edit.setUndoRedoEnabled(False)
+        self.text_edit.setReadOnly(True)
+
+        self.pending: deque[tuple[StdoutType, str]] = deque(maxlen=max_lines)
+        self.hidden: set[StdoutType] = set()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(round(1000 / fps))
+        self.timer.timeout.connect(self.flush)
+
+        self.text_edit.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.text_edit.customContextMenuRequested.connect(self.show_context_menu)
+
+    def add_lines(self, lines: list[tuple[StdoutType, str]]) -> None:
+        self.pending.extend(lines)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        lines, self.pending = self.pending, deque(maxlen=self.pending.maxlen)
+
+        # Block type of each line of text, as multi line output takes a block per line
+        text = []
+        block_types = []
+        for source, line in lines:
+            str_header = f"[{SOURCE_NAMES[source]}] - "
+            text.append(str_header + line.replace("\n", "\n" + " " * len(str_header)))
+            block_types += [source] * (line.count("\n") + 1)
+
+        # Check before appending whether the user has scrolled up
+        scroll_bar = self.text_edit.verticalScrollBar()
+        at_bottom = scroll_bar.maximum() - scroll_bar.value() < 5
+
+        self.text_edit.appendPlainText("\n".join(text))
+
+        block = self.text_edit.document().lastBlock()
+        first_block = block
+        hidden_any = False
+        for source in reversed(block_types):
+            if not block.isValid():
+                break
+            block.setUserState(source)
+            if source in self.hidden:
+                block.setVisible(False)
+                hidden_any = True
+            first_block = block
+            block = block.previous()
+        if hidden_any:
+            # Only the appended blocks need laying out again
+            self.relayout(first_block.position())
+
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def set_source_visible(self, source: StdoutType, visible: bool) -> None:
+        if visible:
+            self.hidden.discard(source)
+        else:
+            self.hidden.add(source)
+        block = self.text_edit.document().firstBlock()
+        while block.isValid():
+            if block.userState() == source:
+                block.setVisible(visible)
+            block = block.next()
+        self.relayout()
+
+    def relayout(self, start: int = 0) -> None:
+        # Hiding blocks only takes effect once the document is told their layout changed, from start to the end
+        document = self.text_edit.document()
+        document.markContentsDirty(start, document.characterCount() - start)
+        self.text_edit.viewport().update()
+
+    def show_context_menu(self, position: QPoint) -> None:
+        menu = self.text_edit.createStandardContextMenu()
+        menu.addSeparator()
+        for source, name in SOURCE_NAMES.items():
+            action = menu.addAction(f"Show {name}")
+            action.setCheckable(True)
+            action.setChecked(source not in self.hidden)
+            action.toggled.connect(lambda checked, _source=source: self.set_source_visible(_source, checked))
+        menu.exec(self.text_edit.mapToGlobal(position))
+        menu.deleteLater()
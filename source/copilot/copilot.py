@@ -3,14 +3,17 @@ import subprocess
 import sys
 
 from PyQt6.QtWidgets import QLabel, QRadioButton, QWidget, QPlainTextEdit, QPushButton, QProgressBar, QScrollArea, \
-    QMessageBox
+    QMessageBox, QFrame
 
 from PyQt6.QtCore import QRect, QTimer, QThread
 
-from datainterface.data_interface import DataInterface, StdoutType
+from datainterface.data_interface import DataInterface
 from data_classes.action_enum import ActionEnum
+from datainterface.render_scheduler import RenderScheduler
 from datainterface.sock_stream_send import SockSend
 from datainterface.video_display import VideoDisplay
+from copilot.console_view import ConsoleView
+from copilot.sensor_panel import SensorPanel
 from tasks.task import Task
 from window import Window
 
@@ -58,6 +61,37 @@ class Copilot(Window):
 
         self.float_depth_value: QLabel = self.findChild(QLabel, "MATEFloatDepthValue")
 
+        # ROV readouts by the DataInterface attribute each one shows, and how it is formatted
+        self.sensor_panel = SensorPanel(self.findChild(QFrame, "SensorDataBackground"), {
+            "attitude": self.rov_attitude_value,
+            "angular_acceleration": self.rov_angular_accel_value,
+            "angular_velocity": self.rov_angular_velocity_value,
+            "acceleration": self.rov_acceleration_value,
+            "velocity": self.rov_velocity_value,
+            "depth": self.rov_depth_value,
+            "ambient_temperature": self.ambient_water_temp_value,
+            "ambient_pressure": self.ambient_pressure_value,
+            "internal_temperature": self.internal_temp_value,
+            "actuator_1": self.actuator1_value,
+            "actuator_2": self.actuator2_value,
+            "actuator_3": self.actuator3_value,
+            "actuator_4": self.actuator4_value,
+            "actuator_5": self.actuator5_value,
+            "actuator_6": self.actuator6_value,
+        })
+        self.sensor_formats = {
+            "attitude": lambda t: f"{t.x:<{self.v_pad}.{self.v_dp}f}°, {t.y:<{self.v_pad}.{self.v_dp}f}°, "
+                                  f"{t.z:<{self.v_pad}.{self.v_dp}f}°",
+            "angular_acceleration": self.format_vector,
+            "angular_velocity": self.format_vector,
+            "acceleration": self.format_vector,
+            "velocity": self.format_vector,
+            "depth": lambda v: f"{v:<{self.v_pad}.{self.v_dp}f} m",
+            "ambient_temperature": lambda v: f"{v:<{self.v_pad}.{self.v_dp}f}°C",
+            "ambient_pressure": lambda v: f"{v:<{self.v_pad}.{self.v_dp}f} KPa",
+            "internal_temperature": lambda v: f"{v:<{self.v_pad}.{self.v_dp}f} °C",
+        } | {f"actuator_{i}": lambda v: f"{int(v):>3} %" for i in range(1, 7)}
+
         self.DataSocketStatus: QLabel = self.findChild(QLabel, "DataSocketStatus")
         self.StdoutSocketStatus: QLabel = self.findChild(QLabel, "StdoutSocketStatus")
         self.ControlSocketStatus: QLabel = self.findChild(QLabel, "ControlSocketStatus")
@@ -110,6 +144,9 @@ class Copilot(Window):
         self.reinitialise_cameras_action: QRadioButton = self.findChild(QRadioButton, "ReinitialiseCameras")
         self.reinitialise_cameras_action.clicked.connect(self.reinitialise_cameras)
 
+        self.adaptive_video_action: QRadioButton = self.findChild(QRadioButton, "AdaptiveVideoAction")
+        self.adaptive_video_action.clicked.connect(self.adaptive_video)
+
         self.connect_float_action: QRadioButton = self.findChild(QRadioButton, "ConnectFloatAction")
         self.connect_float_action.clicked.connect(self.connect_float)
 
@@ -117,17 +154,24 @@ class Copilot(Window):
         self.disable_alerts_action.clicked.connect(self.disable_alerts)
 
         self.main_cam: QLabel = self.findChild(QLabel, "MainCameraView")
-        self.main_cam_display = VideoDisplay(self.main_cam, self.video_frame_index, self.app, True)
-        self.main_cam_display.pixmap_ready.connect(lambda pixmap: self.main_cam.setPixmap(pixmap))
+        self.main_cam_display = VideoDisplay(self.main_cam, self.video_frame_index, self.app, True,
+                                             show_latency=self.app.show_video_latency)
+        self.main_cam_display.pixmap_ready.connect(
+            lambda pixmap, timing: self.main_cam_display.show_pixmap(pixmap, timing))
         self.main_cam_display.on_disconnect.connect(lambda: self.main_cam.setText("Main Camera Disconnected"))
 
         self.video_handler_thread = QThread()
         self.main_cam_display.moveToThread(self.video_handler_thread)
 
+        self.render_scheduler = RenderScheduler(self.desired_monitor, self.app.video_render_fps)
+        self.render_scheduler.add_display(self.main_cam_display)
+        self.render_scheduler.moveToThread(self.video_handler_thread)
+        self.video_handler_thread.started.connect(self.render_scheduler.start)
+
         # Stdout
 
         self.stdout_window: QPlainTextEdit = self.findChild(QPlainTextEdit, "Stdout")
-        self.stdout_cursor = self.stdout_window.textCursor()
+        self.console = ConsoleView(self.stdout_window)
 
         # Tasks
 
@@ -192,7 +236,7 @@ class Copilot(Window):
         self.data.float_data_thread.on_disconnect.connect(self.on_float_disconnect)
         self.data.float_data_thread.on_connect.connect(self.on_float_connect)
 
-        self.data.stdout_update.connect(self.update_stdout)
+        self.data.stdout_update.connect(self.console.add_lines)
 
 
         # Alert connect
@@ -228,6 +272,7 @@ class Copilot(Window):
             self.data.timer.setInterval(1000)
             self.data.timer.start()
             self.stop_time_button.setText("Stop")
+            self.data.start_video_recording()
 
     def stop_timer(self) -> None:
         if not self.data.timer.isActive():
@@ -236,6 +281,7 @@ class Copilot(Window):
             self.app.reset_task_completion()
             self.update_time()
         self.data.timer.stop()
+        self.data.stop_video_recording()
         self.stop_time_button.setText("Reset")
 
     def timer_timeout(self) -> None:
@@ -325,6 +371,13 @@ class Copilot(Window):
             SockSend(self.app, self.app.ROV_IP, 52527, ActionEnum.REINIT_CAMS)
         self.reinitialise_cameras_action.setChecked(False)
 
+    def adaptive_video(self) -> None:
+        # The ROV steps camera bitrates and resolutions down or up based on the drops and delay seen here
+        if self.data.is_rov_connected():
+            self.data.set_adaptive_video(self.adaptive_video_action.isChecked())
+            return
+        self.adaptive_video_action.setChecked(False)
+
     def disable_alerts(self) -> None:
         if not self.all_alerts_disabled:
             self.data.attitude_alert_once = True
@@ -364,51 +417,14 @@ class Copilot(Window):
             print("Disconnected!")
             self.connect_float_action.setText("Connect Float")
 
-    def update_stdout(self, source, line) -> None:
-        sources = {
-            StdoutType.UI: "UI",
-            StdoutType.UI_ERROR: "UI ERR",
-            StdoutType.ROV: "ROV",
-            StdoutType.ROV_ERROR: "ROV ERR"
-        }
-
-        source_str = sources[source]
-
-        # Display latest data for window
-        str_header = f"[{source_str}] - "
-        line = str_header + line.replace("\n", "\n" + " " * len(str_header))
-
-        self.stdout_window.appendPlainText(line)
-
-        # Scroll to bottom if scrollbar is less than 5 from bottom
-        if self.stdout_window.verticalScrollBar().maximum() - self.stdout_window.verticalScrollBar().value() < 5:
-            self.stdout_window.ensureCursorVisible()
-
-    def update_rov_data(self) -> None:
-        t = self.data.attitude
-        self.rov_attitude_value.setText(
-            f"{t.x:<{self.v_pad}.{self.v_dp}f}°, {t.y:<{self.v_pad}.{self.v_dp}f}°, {t.z:<{self.v_pad}.{self.v_dp}f}°")
-
-        # Update all acceleration/velocity readings
-        for val, label in zip([self.data.angular_acceleration, self.data.angular_velocity,
-                               self.data.acceleration, self.data.velocity],
-                              [self.rov_angular_accel_value, self.rov_angular_velocity_value,
-                               self.rov_acceleration_value, self.rov_velocity_value]):
-            label.setText(f"{val.x:<{self.v_pad}.{self.v_dp}f}, "
-                          f"{val.y:<{self.v_pad}.{self.v_dp}f}, "
-                          f"{val.z:<{self.v_pad}.{self.v_dp}f} m/s")
-
-        self.rov_depth_value.setText(f"{self.data.depth:<{self.v_pad}.{self.v_dp}f} m")
-        self.ambient_water_temp_value.setText(f"{self.data.ambient_temperature:<{self.v_pad}.{self.v_dp}f}°C")
-        self.ambient_pressure_value.setText(f"{self.data.ambient_pressure:<{self.v_pad}.{self.v_dp}f} KPa")
-        self.internal_temp_value.setText(f"{self.data.internal_temperature:<{self.v_pad}.{self.v_dp}f} °C")
-
-        self.actuator1_value.setText(f"{int(self.data.actuator_1):>3} %")
-        self.actuator2_value.setText(f"{int(self.data.actuator_2):>3} %")
-        self.actuator3_value.setText(f"{int(self.data.actuator_3):>3} %")
-        self.actuator4_value.setText(f"{int(self.data.actuator_4):>3} %")
-        self.actuator5_value.setText(f"{int(self.data.actuator_5):>3} %")
-        self.actuator6_value.setText(f"{int(self.data.actuator_6):>3} %")
+    def format_vector(self, v) -> str:
+        return f"{v.x:<{self.v_pad}.{self.v_dp}f}, {v.y:<{self.v_pad}.{self.v_dp}f}, {v.z:<{self.v_pad}.{self.v_dp}f} m/s"
+
+    def update_rov_data(self, changed: frozenset[str]) -> None:
+        # Only readouts whose values changed are formatted, and only those whose text changed are redrawn
+        shown = [name for name in self.sensor_formats if name in changed]
+        self.sensor_panel.set_all({name: self.sensor_formats[name](getattr(self.data, name)) for name in shown},
+                                  len(self.sensor_formats) - len(shown))
 
         if not self.maintain_depth_action.isChecked():
             self.maintain_depth_action.setText("Maintain Depth")
@@ -416,16 +432,13 @@ class Copilot(Window):
     def on_rov_connect(self) -> None:
         self.rov_power_action.setChecked(True)
         self.connection_debounce = False
+        # Readouts show "ROV Disconnected" until now, whether or not their values have changed since
+        self.update_rov_data(frozenset(self.sensor_formats))
 
     def on_rov_disconnect(self) -> None:
         self.rov_power_action.setChecked(False)
         self.connection_debounce = False
-        for label in [self.rov_attitude_value, self.rov_angular_accel_value, self.rov_angular_velocity_value,
-                      self.rov_acceleration_value, self.rov_velocity_value, self.rov_depth_value,
-                      self.ambient_pressure_value, self.ambient_water_temp_value, self.internal_temp_value,
-                      self.actuator1_value, self.actuator2_value, self.actuator3_value,
-                      self.actuator4_value, self.actuator5_value, self.actuator6_value]:
-            label.setText("ROV Disconnected")
+        self.sensor_panel.set_every("ROV Disconnected")
         if self.maintain_depth_action.isChecked():
             self.maintain_depth_action.setChecked(False)
 
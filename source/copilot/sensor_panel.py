@@ -0,0 +1,49 @@
+import time
+
+from PyQt6.QtWidgets import QLabel, QWidget
+
+
+class SensorPanel:
+    """
+        The labels of the Copilot's sensor data widget, by the name of the value each one shows.
+        The text last set on each label is kept, and a label is only touched when its new text differs, since every
+        setText relayouts and repaints. Updates are applied in batches with the container's painting suspended,
+        so a batch costs one repaint however many labels change.
+        How many label updates were made and saved is shown in the container's tooltip.
+    """
+
+    def __init__(self, container: QWidget, labels: dict[str, QLabel], report_every: float = 5):
+        self.container = container
+        self.labels = labels
+        self.texts: dict[str, str] = {name: label.text() for name, label in labels.items()}
+
+        # Statistics, over the last report_every seconds
+        self.report_every = report_every
+        self.report_start = time.perf_counter()
+        self.updated = 0
+        self.saved = 0
+
+    def set_all(self, texts: dict[str, str], unchanged: int = 0) -> None:
+        # unchanged is the number of labels the caller skipped as their values didn't change, counted as saved
+        changed = [(name, text) for name, text in texts.items() if self.texts.get(name) != text]
+        self.saved += len(texts) - len(changed) + unchanged
+        self.updated += len(changed)
+
+        if changed:
+            self.container.setUpdatesEnabled(False)
+            for name, text in changed:
+                self.texts[name] = text
+                self.labels[name].setText(text)
+            # Re-enabling schedules the single repaint of the batch
+            self.container.setUpdatesEnabled(True)
+
+        elapsed = time.perf_counter() - self.report_start
+        if elapsed >= self.report_every:
+            self.container.setToolTip(f"Label updates: {self.updated / elapsed:.0f}/s, "
+                                      f"saved: {self.saved / elapsed:.0f}/s")
+            self.report_start += elapsed
+            self.updated = 0
+            self.saved = 0
+
+    def set_every(self, text: str) -> None:
+        self.set_all({name: text for name in self.labels})
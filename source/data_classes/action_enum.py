@@ -9,3 +9,9 @@ class ActionEnum(enum.IntEnum):
     POWER_OFF_FLOAT = enum.auto()
     REINIT_CAMS = enum.auto()
     MAINTAIN_ROV_DEPTH = enum.auto()
+    START_CAM = enum.auto()
+    STOP_CAM = enum.auto()
+    SET_CAM_PROFILE = enum.auto()
+    SET_CAM_ADAPTIVE = enum.auto()
+    CAM_FEEDBACK = enum.auto()
+    FETCH_BLACK_BOX = enum.auto()
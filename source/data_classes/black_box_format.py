@@ -0,0 +1,52 @@
+import struct
+
+import numpy as np
+
+# Fixed size records of the ROV's black box recorder. Little endian.
+# RECORD = (Time, Monotonic Time, Kind, Padding, Payload Length, Sequence, Payload padded to the segment's payload size)
+# Time is the ROV's wall clock, which can step when it's set. Monotonic Time is the ROV's monotonic clock, which
+# records are written in order of, but which only compares within one run of the ROV.
+# Sequence is the controller frame's for commands, and 0 otherwise.
+# TELEMETRY payload = float64 of each of the segment's fields, NaN if missing
+# COMMAND payload = (Encoded ControllerFrame, float32 output of each thruster)
+# EVENT payload = UTF-8 text, truncated to the payload size
+KIND_TELEMETRY = 1
+KIND_COMMAND = 2
+KIND_EVENT = 3
+
+RECORD_HEADER_FORMAT = "<ddBxHI"
+RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER_FORMAT)
+MIN_PAYLOAD_SIZE = 64
+
+
+def payload_size(field_count: int) -> int:
+    # Large enough for a telemetry record of field_count fields, a command or a short event, in multiples of 8 bytes
+    return max(MIN_PAYLOAD_SIZE, 8 * field_count)
+
+
+def record_dtype(size: int) -> np.dtype:
+    # Structured view of records with payloads of size bytes
+    return np.dtype([("time", "<f8"), ("monotonic", "<f8"), ("kind", "u1"), ("padding", "u1"), ("length", "<u2"),
+                     ("sequence", "<u4"), ("payload", "u1", (size,))])
+
+
+def decode_telemetry(records: np.ndarray, fields: list[str]) -> dict[str, np.ndarray]:
+    # Columns of the telemetry records among records, with their times in "time"
+    telemetry = records[records["kind"] == KIND_TELEMETRY]
+    values = np.ascontiguousarray(telemetry["payload"]).view("<f8")[:, :len(fields)]
+    return {"time": telemetry["time"].copy()} | {field: values[:, i].copy() for i, field in enumerate(fields)}
+
+
+def decode_commands(records: np.ndarray, frame_size: int) -> list[tuple[float, bytes, tuple[float, ...]]]:
+    # (Time, Encoded ControllerFrame, Thruster Outputs) of the command records among records
+    commands = []
+    for record in records[records["kind"] == KIND_COMMAND]:
+        payload = record["payload"][:record["length"]].tobytes()
+        outputs = struct.unpack(f"<{(len(payload) - frame_size) // 4}f", payload[frame_size:])
+        commands.append((float(record["time"]), payload[:frame_size], outputs))
+    return commands
+
+
+def decode_events(records: np.ndarray) -> list[tuple[float, str]]:
+    return [(float(record["time"]), record["payload"][:record["length"]].tobytes().decode(errors="replace"))
+            for record in records[records["kind"] == KIND_EVENT]]
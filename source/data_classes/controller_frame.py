@@ -0,0 +1,78 @@
+import struct
+from dataclasses import dataclass
+
+# Fixed size binary frame of one controller sample, sent from the UI to the ROV. Little endian.
+# FRAME CONTENTS = (Version, Flags, Sequence, Sample Time, Axes x MAX_AXES, Button Bitmask, Hats)
+# Axes are quantised to steps of 1 / AXIS_SCALE. Each hat takes 4 bits: x + 1 in the low 2 bits, y + 1 in the high 2.
+MAX_AXES = 8
+MAX_BUTTONS = 32
+MAX_HATS = 2
+AXIS_SCALE = 512
+FRAME_FORMAT = f"<BBHd{MAX_AXES}hIB"
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+FRAME_VERSION = 1
+
+FLAG_CONNECTED = 1
+
+
+def quantise_axis(value: float) -> int:
+    return round(min(max(value, -1.0), 1.0) * AXIS_SCALE)
+
+
+@dataclass
+class ControllerFrame:
+    sequence: int  # Wraps at 65536
+    sample_time: float  # UI clock
+    connected: bool
+    axes: tuple[int, ...] = ()  # Quantised, see axis_values
+    buttons: int = 0  # Bitmask, button i is bit i
+    hats: tuple[tuple[int, int], ...] = ()
+
+    @classmethod
+    def from_state(cls, sequence: int, sample_time: float, axes: list[float] | None, buttons: list[int] | None,
+                   hats: list[tuple[int, int]] | None) -> "ControllerFrame":
+        # From pygame's readings, or None for each while no controller is connected.
+        # Controls past MAX_AXES, MAX_BUTTONS and MAX_HATS are dropped.
+        if axes is None:
+            return cls(sequence & 0xFFFF, sample_time, False)
+        return cls(sequence & 0xFFFF, sample_time, True,
+                   tuple(quantise_axis(axis) for axis in axes[:MAX_AXES]),
+                   sum(1 << i for i, pressed in enumerate(buttons[:MAX_BUTTONS]) if pressed),
+                   tuple((int(x), int(y)) for x, y in hats[:MAX_HATS]))
+
+    def state(self) -> tuple:
+        # Everything but the sequence and time, to tell whether anything changed between samples
+        return self.connected, self.axes, self.buttons, self.hats
+
+    def encode(self) -> bytes:
+        axes = list(self.axes) + [0] * (MAX_AXES - len(self.axes))
+        hats = 0
+        # Missing hats are sent centred
+        for i, (x, y) in enumerate(list(self.hats) + [(0, 0)] * (MAX_HATS - len(self.hats))):
+            hats |= ((x + 1) | (y + 1) << 2) << (i * 4)
+        return struct.pack(FRAME_FORMAT, FRAME_VERSION, FLAG_CONNECTED if self.connected else 0,
+                           self.sequence & 0xFFFF, self.sample_time, *axes, self.buttons, hats)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "ControllerFrame":
+        # Raises ValueError if data isn't a frame of this version
+        if len(data) != FRAME_SIZE:
+            raise ValueError(f"Controller frames are {FRAME_SIZE} bytes, not {len(data)}")
+        version, flags, sequence, sample_time, *rest = struct.unpack(FRAME_FORMAT, data)
+        if version != FRAME_VERSION:
+            raise ValueError(f"Controller frame version {version} is not supported, expected {FRAME_VERSION}")
+        axes, buttons, hats = rest[:MAX_AXES], rest[MAX_AXES], rest[MAX_AXES + 1]
+        return cls(sequence, sample_time, bool(flags & FLAG_CONNECTED), tuple(axes), buttons,
+                   tuple(((hats >> (i * 4) & 3) - 1, (hats >> (i * 4 + 2) & 3) - 1) for i in range(MAX_HATS)))
+
+    def axis_values(self) -> list[float]:
+        return [axis / AXIS_SCALE for axis in self.axes]
+
+    def button_values(self) -> list[int]:
+        return [self.buttons >> i & 1 for i in range(MAX_BUTTONS)]
+
+    def as_dict(self) -> dict | None:
+        # In the form controller input was sent in before, or None while disconnected
+        if not self.connected:
+            return None
+        return {"axes": self.axis_values(), "buttons": self.button_values(), "hats": list(self.hats)}
@@ -0,0 +1,116 @@
+import struct
+from binascii import crc_hqx
+
+# Binary frames exchanged with the ESP32 over the UART. Little endian.
+# FRAME = (Sync, Type, Payload Length, Payload, CRC)
+# The CRC is CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xFFFF) of the type, length and payload.
+# COMMAND payload (ROV -> ESP32) = (Sequence, Thruster Output x THRUSTER_COUNT), outputs scaled by OUTPUT_SCALE
+# ACK payload (ESP32 -> ROV) = (Sequence of the command applied, Status), status 0 is OK
+# TELEMETRY payload (ESP32 -> ROV) = (Sequence of the last command applied, Value x any number), all int16
+SYNC = b"\xaa\x55"
+HEADER_FORMAT = "<2sBB"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CRC_FORMAT = "<H"
+CRC_SIZE = struct.calcsize(CRC_FORMAT)
+MAX_PAYLOAD = 64
+
+TYPE_COMMAND = 1
+TYPE_ACK = 2
+TYPE_TELEMETRY = 3
+
+THRUSTER_COUNT = 6
+OUTPUT_SCALE = 32767
+COMMAND_FORMAT = f"<H{THRUSTER_COUNT}h"
+ACK_FORMAT = "<HB"
+
+
+def frame_crc(data: bytes) -> int:
+    return crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(frame_type: int, payload: bytes) -> bytes:
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"UART frame payloads are at most {MAX_PAYLOAD} bytes, not {len(payload)}")
+    body = struct.pack("<BB", frame_type, len(payload)) + payload
+    return SYNC + body + struct.pack(CRC_FORMAT, frame_crc(body))
+
+
+def encode_command(sequence: int, outputs) -> bytes:
+    # Outputs from -1 to 1 for each thruster
+    values = [round(min(max(float(output), -1.0), 1.0) * OUTPUT_SCALE) for output in outputs]
+    return encode_frame(TYPE_COMMAND, struct.pack(COMMAND_FORMAT, sequence & 0xFFFF, *values))
+
+
+def decode_command(payload: bytes) -> tuple[int, list[float]]:
+    sequence, *values = struct.unpack(COMMAND_FORMAT, payload)
+    return sequence, [value / OUTPUT_SCALE for value in values]
+
+
+def encode_ack(sequence: int, status: int = 0) -> bytes:
+    return encode_frame(TYPE_ACK, struct.pack(ACK_FORMAT, sequence & 0xFFFF, status))
+
+
+def decode_ack(payload: bytes) -> tuple[int, int]:
+    return struct.unpack(ACK_FORMAT, payload)
+
+
+def encode_telemetry(sequence: int, values: list[int]) -> bytes:
+    return encode_frame(TYPE_TELEMETRY, struct.pack(f"<H{len(values)}h", sequence & 0xFFFF, *values))
+
+
+def decode_telemetry(payload: bytes) -> tuple[int, tuple[int, ...]]:
+    sequence, *values = struct.unpack(f"<H{(len(payload) - 2) // 2}h", payload[:len(payload) & ~1])
+    return sequence, tuple(values)
+
+
+class FrameParser:
+    """
+        Splits a byte stream into frames. Bytes before a sync, and frames with a bad length or CRC, are skipped
+        and counted, and parsing resumes at the next sync so that one corrupted byte loses at most one frame.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+        # Statistics
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        # Returns the (type, payload) of each complete frame, keeping any partial frame for the next call
+        self.buffer += data
+        frames = []
+        while True:
+            start = self.buffer.find(SYNC)
+            if start < 0:
+                # Keep a trailing first sync byte, as the rest of the sync may be in the next read
+                keep = 1 if self.buffer[-1:] == SYNC[:1] else 0
+                self.skipped_bytes += len(self.buffer) - keep
+                del self.buffer[:len(self.buffer) - keep]
+                return frames
+            if start:
+                self.skipped_bytes += start
+                del self.buffer[:start]
+            if len(self.buffer) < HEADER_SIZE:
+                return frames
+
+            _, frame_type, length = struct.unpack_from(HEADER_FORMAT, self.buffer)
+            if length > MAX_PAYLOAD:
+                self.skipped_bytes += 1
+                del self.buffer[:1]
+                continue
+            end = HEADER_SIZE + length + CRC_SIZE
+            if len(self.buffer) < end:
+                return frames
+
+            body = bytes(self.buffer[len(SYNC):HEADER_SIZE + length])
+            crc, = struct.unpack_from(CRC_FORMAT, self.buffer, HEADER_SIZE + length)
+            if crc != frame_crc(body):
+                self.crc_errors += 1
+                self.skipped_bytes += 1
+                del self.buffer[:1]
+                continue
+            del self.buffer[:end]
+            self.frames += 1
+            frames.append((frame_type, body[2:]))
@@ -0,0 +1,69 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from data_classes import black_box_format as fmt
+from data_classes.controller_frame import FRAME_SIZE
+from datainterface.telemetry_history import pretty_field
+
+
+class BlackBoxFetches:
+    """
+        Collects the chunks of records the ROV's black box sends for each requested time range. Once a range is
+        complete its telemetry is saved as a recording, which the Grapher lists alongside its own, and its events
+        are printed.
+        Recordings have the Grapher's columns, but their times are the ROV's clock rather than the UI's.
+    """
+
+    def __init__(self, fields: list[str], directory: Path):
+        self.fields = fields
+        self.directory = directory
+        self.pending: dict[tuple[float, float], list[np.ndarray]] = {}
+        self.chunk_fields: dict[tuple[float, float], list[list[str]]] = {}
+
+    def add_chunk(self, chunk: dict) -> Path | None:
+        # Returns the recording saved if this chunk completed its range
+        key = tuple(chunk["range"])
+        if not chunk.get("done", False):
+            self.pending.setdefault(key, []).append(
+                np.frombuffer(chunk["records"], fmt.record_dtype(chunk["payload_size"])))
+            self.chunk_fields.setdefault(key, []).append(chunk["fields"])
+            return None
+        return self.save(key, self.pending.pop(key, []), self.chunk_fields.pop(key, []))
+
+    def save(self, key: tuple[float, float], chunks: list[np.ndarray], chunk_fields: list[list[str]]) -> Path | None:
+        # Segments from different versions of the ROV may have different fields, so columns are matched by name
+        columns = {field: [] for field in ["time"] + self.fields}
+        commands = 0
+        events = []
+        for records, fields in zip(chunks, chunk_fields):
+            telemetry = fmt.decode_telemetry(records, fields)
+            count = len(telemetry["time"])
+            for field, column in columns.items():
+                column.append(telemetry.get(field, np.full(count, np.nan)))
+            commands += len(fmt.decode_commands(records, FRAME_SIZE))
+            events += fmt.decode_events(records)
+
+        start, end = key
+        for event_time, text in events:
+            print(f"[Black Box {time.strftime('%H:%M:%S', time.localtime(event_time))}] {text}")
+        samples = sum(len(column) for column in columns["time"])
+        print(f"Recovered {samples} telemetry samples, {commands} commands and {len(events)} events from the "
+              f"{end - start:.1f} s the ROV's telemetry was missing")
+        if samples == 0:
+            return None
+
+        path = self.directory / f"Black Box {time.strftime('%Y-%m-%d %H-%M-%S', time.localtime(start))}.csv"
+        rows = np.stack([np.concatenate(columns[field]) for field in columns], axis=1)
+        try:
+            self.directory.mkdir(exist_ok=True)
+            with open(path, "w") as f:
+                f.write(",".join(["Time"] + [pretty_field(field) for field in self.fields]) + "\n")
+                np.savetxt(f, rows, fmt="%.15g", delimiter=",")
+        except OSError as e:
+            print("Could not save the black box recording:", e, file=sys.stderr)
+            return None
+        print(f"Saved the recovered telemetry to {path}")
+        return path
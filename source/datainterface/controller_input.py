@@ -0,0 +1,124 @@
+import sys
+from threading import Condition
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pygame
+
+from datainterface.controller_sampler import ControllerSampler
+from datainterface.latency_stats import LatencyHistogram
+from periodic_scheduler import PeriodicScheduler
+
+if TYPE_CHECKING:
+    from app import App
+
+
+class ControllerInput:
+    """
+        Samples the controller at a fixed rate on a PeriodicScheduler of its own, rather than whenever the
+        controller input thread asks for data, so samples don't drift and missed ones are skipped. The lateness of
+        each sample is recorded by the scheduler's task.
+
+        The ROV echoes the sequence number of the last command it applied, with the time it applied it, in its
+        telemetry. From that the time from sampling the stick to writing the command to the UART is recorded in
+        stick_to_uart_ms. When the UI and ROV share a clock, as in local tests, it is measured directly. Otherwise
+        it is half the round trip, less the time the ROV held the echo before sending its telemetry.
+    """
+
+    def __init__(self, app: "App", rate: float = 100, keepalive: float = 0.5, same_clock: bool = False):
+        self.app = app
+        self.same_clock = same_clock
+        self.joystick = None
+        self.sampler = ControllerSampler(keepalive)
+
+        # Latest frame not yet taken by the sender. Only the latest matters, so an unsent one is replaced.
+        self.frame: bytes | None = None
+        self.condition = Condition()
+
+        # Statistics
+        self.sample_times = np.full(65536, np.nan)  # Time each sequence number was sampled
+        self.last_echo = -1
+        self.stick_to_uart_ms = LatencyHistogram(bin_ms=1, max_ms=500)
+        self.round_trip_ms = LatencyHistogram(bin_ms=1, max_ms=1000)
+
+        # Runs above normal priority where allowed
+        self.scheduler = PeriodicScheduler("Controller", priority=-5)
+        self.task = self.scheduler.add("sampling", rate, self.tick)
+
+    def start(self) -> None:
+        self.scheduler.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self.scheduler.stop(timeout)
+        with self.condition:
+            self.condition.notify_all()
+
+    def is_connected(self) -> bool:
+        return self.joystick is not None
+
+    def tick(self, dt: float) -> None:
+        try:
+            self.poll()
+        except pygame.error as e:
+            print("Could not read controller:", e, file=sys.stderr)
+
+    def poll(self) -> None:
+        # Process all pygame events since the last poll
+        for event in pygame.event.get():
+            # Handle Controller connection and disconnection
+            if event.type == pygame.JOYDEVICEADDED:
+                if self.joystick is None:
+                    self.joystick = pygame.joystick.Joystick(0)
+                    self.joystick.init()
+                    print("Controller Connected", flush=True)
+            elif event.type == pygame.JOYDEVICEREMOVED and self.joystick is not None:
+                self.joystick.quit()
+                self.joystick = None
+                print("Controller Disconnected", flush=True)
+
+        if self.joystick is None:
+            frame = self.sampler.sample(None, None, None)
+        else:
+            frame = self.sampler.sample(
+                [self.joystick.get_axis(i) for i in range(self.joystick.get_numaxes())],
+                [self.joystick.get_button(i) for i in range(self.joystick.get_numbuttons())],
+                [self.joystick.get_hat(i) for i in range(self.joystick.get_numhats())])
+        if frame is None:
+            return
+
+        self.sample_times[(self.sampler.sequence - 1) & 0xFFFF] = self.sampler.last_sent
+        with self.condition:
+            self.frame = frame
+            self.condition.notify()
+
+    def next_frame(self, timeout: float = 0.1) -> bytes | None:
+        # Called by the controller input thread. Waits for a frame to send, None if there isn't one in time.
+        with self.condition:
+            if self.frame is None:
+                self.condition.wait(timeout)
+            frame, self.frame = self.frame, None
+            return frame
+
+    def record_echo(self, sequence: int, applied_time: float, send_time: float, recv_time: float) -> None:
+        # From ROV telemetry: the last command applied, when it was applied and when the telemetry was sent (ROV clock),
+        # and when the telemetry was received (UI clock)
+        if sequence < 0 or sequence == self.last_echo:
+            return
+        self.last_echo = sequence
+        sample_time = self.sample_times[sequence & 0xFFFF]
+        if np.isnan(sample_time):
+            return
+        round_trip = (recv_time - sample_time) - (send_time - applied_time)
+        self.round_trip_ms.record(round_trip * 1000)
+        if self.same_clock:
+            self.stick_to_uart_ms.record((applied_time - sample_time) * 1000)
+        else:
+            self.stick_to_uart_ms.record(round_trip / 2 * 1000)
+
+    def summary(self) -> str:
+        return (f"Controller sampling jitter p50 {self.task.lateness_ms.percentile(50):.1f} ms, "
+                f"p99 {self.task.lateness_ms.percentile(99):.1f} ms, {self.task.overruns} overruns. "
+                f"Stick to UART mean {self.stick_to_uart_ms.mean():.1f} ms, "
+                f"p95 {self.stick_to_uart_ms.percentile(95):.0f} ms. "
+                f"{self.sampler.frames_sent} of {self.sampler.samples} samples sent, "
+                f"{self.sampler.bytes_sent} bytes")
@@ -0,0 +1,40 @@
+import time
+
+from data_classes.controller_frame import ControllerFrame
+
+
+class ControllerSampler:
+    """
+        Turns controller readings into ControllerFrames and decides which of them are sent to the ROV.
+        A frame is only sent when the quantised state changes, or keepalive seconds after the last one, so that the
+        ROV can tell a controller held still from a lost link. Each frame carries a sequence number and the time it
+        was sampled.
+    """
+
+    def __init__(self, keepalive: float = 0.5):
+        self.keepalive = keepalive
+        self.sequence = 0
+        self.last_state: tuple | None = None
+        self.last_sent = 0.0
+
+        # Statistics
+        self.samples = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def sample(self, axes: list[float] | None, buttons: list[int] | None,
+               hats: list[tuple[int, int]] | None) -> bytes | None:
+        # Readings are None while no controller is connected. Returns the encoded frame to send, or None.
+        now = time.time()
+        self.samples += 1
+        frame = ControllerFrame.from_state(self.sequence, now, axes, buttons, hats)
+        if frame.state() == self.last_state and now - self.last_sent < self.keepalive:
+            return None
+
+        self.last_state = frame.state()
+        self.last_sent = now
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        data = frame.encode()
+        self.frames_sent += 1
+        self.bytes_sent += len(data)
+        return data
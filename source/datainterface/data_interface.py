@@ -1,17 +1,30 @@
+import ipaddress
+import os
 import pickle
+import socket
 import sys
 import time
+from pathlib import Path
 from threading import Thread
 
-import cv2
 import qimage2ndarray
 import numpy as np
 
+from datainterface.black_box_fetch import BlackBoxFetches
+from datainterface.frame_processing import undistort_fisheye
+from datainterface.latency_stats import FrameTiming, FeedHealth
+from datainterface.controller_input import ControllerInput
+from datainterface.line_queue import LineQueue, LineQueueStream
 from datainterface.qt_sock_stream_send import QSockStreamSend
+from datainterface.sock_stream_send import SockSend
+from datainterface.stereo_depth import StereoDepthEngine
+from datainterface.telemetry_history import TelemetryHistory, telemetry_fields
+from datainterface.update_coalescer import UpdateCoalescer
+from datainterface.video_recorder import new_dive_directory
 from datainterface.video_recv import VideoRecv
 from qt_sock_stream_recv import QSockStreamRecv
 from typing import TYPE_CHECKING, Sequence, Union
-from io import StringIO
+from io import TextIOWrapper
 import pygame
 
 from PyQt6.QtCore import pyqtSignal, QObject, QTimer
@@ -20,6 +33,7 @@ from PyQt6.QtGui import QImage
 from rov_float_data_structures.float_data import FloatData
 from rov_float_data_structures.rov_data import ROVData
 from data_classes.vector3 import Vector3
+from data_classes.action_enum import ActionEnum
 from video_frame import VideoFrame
 from data_classes.stdout_type import StdoutType
 from numpy import ndarray
@@ -28,11 +42,29 @@ if TYPE_CHECKING:
     from window import Window
     from app import App
 
+STDOUT_BATCH_INTERVAL = 0.05  # Minimum seconds between batches of redirected output sent to the UI
+BLACK_BOX_GAP = 1.0  # Seconds between ROV data packets after which the missing packets are fetched from the black box
+
+
+def _changed(old, new) -> bool:
+    # Vector3s are replaced by new objects in every packet, so are compared by value
+    if type(old) is Vector3 and type(new) is Vector3:
+        return old.x != new.x or old.y != new.y or old.z != new.z
+    return old != new
+
+
+def _is_loopback(host: str) -> bool:
+    # The ROV shares the UI's clock when it runs on this machine, however its address is written
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (socket.gaierror, ValueError):
+        return False
+
 
 class DataInterface(QObject):
-    rov_data_update = pyqtSignal()
+    rov_data_update = pyqtSignal(frozenset)  # Names of the ROVData attributes that changed since the last update
     float_data_update = pyqtSignal()
-    stdout_update = pyqtSignal(StdoutType, str)
+    stdout_update = pyqtSignal(list)  # Batch of (StdoutType, Line)
 
     # ALERT SIGNALS
     attitude_alert = pyqtSignal()
@@ -42,12 +74,14 @@ class DataInterface(QObject):
     internal_temperature_alert = pyqtSignal()
     float_depth_alert = pyqtSignal()
 
-    def __init__(self, app: "App", windows: Sequence["Window"], redirect_stdout: StringIO, redirect_stderr: StringIO,
-                 video_feed_count=2):
+    def __init__(self, app: "App", windows: Sequence["Window"], redirect_stdout: LineQueueStream | TextIOWrapper,
+                 redirect_stderr: LineQueueStream | TextIOWrapper,
+                 video_feed_count=2, video_decode_in_process=False):
         super().__init__()
         self.app: "App" = app
         self.windows: Sequence["Window"] = windows
         self.video_feed_count: int = video_feed_count
+        self.video_decode_in_process: bool = video_decode_in_process
 
         self.redirect_stdout = redirect_stdout
         self.redirect_stderr = redirect_stderr
@@ -63,6 +97,8 @@ class DataInterface(QObject):
         self.internal_temperature = 0
         self.cardinal_direction = 0
         self.grove_water_sensor = 0
+        self.camera_status: list[tuple[bool, float, int]] = []  # (Running, Uptime, Restart Count) of each ROV camera
+        self.camera_profiles: list[dict] = []  # Current width, height, bitrate and framerate of each ROV camera
 
         self.actuator_1 = 0
         self.actuator_2 = 0
@@ -71,24 +107,55 @@ class DataInterface(QObject):
         self.actuator_5 = 0
         self.actuator_6 = 0
 
+        # Sequence number of the last controller command the ROV applied, and when it did so (ROV clock)
+        self.controller_sequence = -1
+        self.controller_applied_time = 0.0
+
+        # Number of ROV data packets received, used to relate recorded video to telemetry
+        self.rov_data_sample: int = 0
+
         # MATE FLOAT Data
         self.float_depth: float = 0
 
+        # Every ROV data packet received, numbered by rov_data_sample. Float data is kept alongside as its latest value
+        # when each packet arrived. Alerts, recordings and live graphs read from this.
+        self.telemetry = TelemetryHistory(telemetry_fields(ROVData()) + telemetry_fields(FloatData()))
+        # The model above is updated with every packet, but windows are only notified at the display rate
+        self.rov_data_coalescer = UpdateCoalescer(self.app.telemetry_display_fps, self)
+        self.rov_data_coalescer.updated.connect(self.rov_data_update)
+
         # STDOUT UI Thread
-        # This thread processes redirected stdout to be displayed in the UI and in console
-        self.stdout_ui_thread = Thread(target=self.f_stdout_ui_thread)
-        self.stdout_ui_thread.start()
+        # This thread delivers redirected stdout and stderr to the UI and console. Not needed when they aren't redirected.
+        self.stdout_queue: LineQueue | None = None
+        self.stdout_ui_thread: Thread | None = None
+        if isinstance(redirect_stdout, LineQueueStream):
+            self.stdout_queue = redirect_stdout.queue
+            self.stdout_ui_thread = Thread(target=self.f_stdout_ui_thread, args=(self.stdout_queue,))
+            self.stdout_ui_thread.start()
 
         # Camera Feeds
 
         self.camera_frames: [VideoFrame] = []
+        self.camera_feeds: list[int] = []  # Video feed each camera frame comes from
         self.video_threads: [QSockStreamRecv] = []
+        # Drops and delay of each feed, reported to the ROV when adaptive video quality is on
+        self.feed_health: list[FeedHealth] = [FeedHealth() for _ in range(self.video_feed_count)]
+        self.adaptive_video = False
+        self.feed_health_timer = QTimer(self)
+        self.feed_health_timer.timeout.connect(self.report_feed_health)
+        self.feed_health_timer.start(1000)
+        # Depth engines of stereo feeds with a "depth" section in their config, by their left camera's index
+        self.depth_engines: dict[int, StereoDepthEngine] = {}
 
         # Controller State
 
         pygame.init()
         pygame.joystick.init()
-        self.joystick = None
+        # Sampled on its own thread, and sent by the controller input thread as soon as there is a new frame
+        self.controller_input = ControllerInput(self.app)
+        self.controller_input.start()
+        # Resolving the ROV's address can block, so isn't done on the UI thread
+        Thread(target=self.detect_same_clock, daemon=True).start()
 
         self.debug_angle = 0.0
         self.last_debug_time = time.time()
@@ -104,17 +171,22 @@ class DataInterface(QObject):
 
             # A stereo video feed will produce two camera frames
             if feed_config["type"] == "stereo":
+                if "depth" in feed_config:
+                    self.depth_engines[video_feed_index + cam_index_offset] = StereoDepthEngine(
+                        video_feed_index, feed_config["depth"])
                 self.camera_frames.append(VideoFrame())
+                self.camera_feeds.append(video_feed_index)
             self.camera_frames.append(VideoFrame())
+            self.camera_feeds.append(video_feed_index)
 
             # Create a receiver thread for this video feed
             cam_thread = VideoRecv(self.app, [self.app.ROV_IP, "127.0.0.1"][self.app.ROV_IP == "localhost"],
-                                   port, video_feed_index)
+                                   port, video_feed_index, self.video_decode_in_process)
 
             # Connect a signal to pass video feed data to the data-interface's handler
             cam_thread.on_recv.connect(
-                lambda payload, cam=video_feed_index + cam_index_offset, feed=video_feed_index:
-                self.on_video_stream_sock_recv(payload, cam, feed))
+                lambda payload, timing, cam=video_feed_index + cam_index_offset, feed=video_feed_index:
+                self.on_video_stream_sock_recv(payload, timing, cam, feed))
 
             # Connect a signal for when a video feed disconnects
             cam_thread.on_disconnect.connect(
@@ -128,10 +200,24 @@ class DataInterface(QObject):
             cam_thread.start()
 
         # ROV Data Thread
-        self.rov_data_thread = QSockStreamRecv(self.app, self.app.UI_IP, self.app.port_bindings["data"])
-        self.rov_data_thread.on_recv.connect(self.on_rov_data_sock_recv)
+        self.rov_data_thread = QSockStreamRecv(self.app, self.app.UI_IP, self.app.port_bindings["data"], timed=True)
+        self.rov_data_thread.on_recv_timed.connect(self.on_rov_data_sock_recv)
         self.rov_data_thread.start()
 
+        # ROV Black Box Thread
+        # Receives the telemetry missed while the ROV was disconnected, saved as a recording for the Grapher
+        self.last_rov_send_time: float | None = None
+        self.last_rov_recv_time: float | None = None
+        self.black_box_fetches = BlackBoxFetches(telemetry_fields(ROVData()), Path(os.getcwd()) / "Recordings")
+        self.black_box_thread = None
+        black_box_port = self.app.port_bindings.get("black_box")
+        if black_box_port is not None:
+            self.black_box_thread = QSockStreamRecv(self.app, self.app.UI_IP, black_box_port)
+            self.black_box_thread.on_recv.connect(self.on_black_box_sock_recv)
+            self.black_box_thread.start()
+        else:
+            print("No black_box port in port_bindings, so missed telemetry can't be fetched", file=sys.stderr)
+
         # ROV Float Thread
         self.float_data_thread = QSockStreamRecv(self.app, self.app.UI_IP, self.app.port_bindings["float_data"])
         self.float_data_thread.on_recv.connect(self.on_float_data_sock_recv)
@@ -147,7 +233,7 @@ class DataInterface(QObject):
         # Collects and sends input to the ROV
         print("Creating sock stream send")
         self.controller_input_thread = QSockStreamSend(self.app, self.app.ROV_IP, self.app.port_bindings["control"],
-                                                       self.get_controller_input, 0.01)
+                                                       self.controller_input.next_frame)
         self.controller_input_thread.start()
 
         self.timer = QTimer(self)
@@ -174,6 +260,53 @@ class DataInterface(QObject):
 
         return data
 
+    def start_video_recording(self) -> None:
+        # Archive every video feed into a new directory for this dive
+        directory = new_dive_directory()
+        for video_thread in self.video_threads:
+            video_thread.start_recording(directory, lambda: self.rov_data_sample)
+        print(f"Recording video feeds to {directory}")
+
+    def stop_video_recording(self) -> None:
+        for video_thread in self.video_threads:
+            video_thread.stop_recording()
+
+    def set_adaptive_video(self, enabled: bool) -> None:
+        self.adaptive_video = enabled
+        self.send_action(ActionEnum.SET_CAM_ADAPTIVE, enabled)
+
+    def request_full_size(self, cam: int, enabled: bool) -> bool:
+        # Asks for camera cam's feed to be decoded at full resolution until released with enabled False.
+        # Returns whether its frames were being scaled down for display, so a new frame is needed.
+        return self.video_threads[self.camera_feeds[cam]].request_full_size(enabled)
+
+    def set_camera_profile(self, feed: int, **profile) -> None:
+        # Changes any of the width, height, bitrate and framerate the ROV encodes a camera with
+        self.send_action(ActionEnum.SET_CAM_PROFILE, feed, profile)
+
+    def send_action(self, action: ActionEnum, *args) -> None:
+        # Sent from another thread so that an unreachable ROV doesn't hold up video processing
+        Thread(target=SockSend, args=(self.app, self.app.ROV_IP, self.app.port_bindings["action"], (action, *args)),
+               daemon=True).start()
+
+    def fetch_black_box(self, start: float, end: float) -> None:
+        # Asks the ROV for everything it recorded between start and end (ROV clock), exclusive of both ends
+        print(f"Fetching {end - start:.1f} s of missing telemetry from the ROV's black box")
+        self.send_action(ActionEnum.FETCH_BLACK_BOX, float(np.nextafter(start, np.inf)),
+                         float(np.nextafter(end, -np.inf)))
+
+    def on_black_box_sock_recv(self, payload_bytes: bytes) -> None:
+        try:
+            self.black_box_fetches.add_chunk(pickle.loads(payload_bytes))
+        except (pickle.UnpicklingError, ValueError, KeyError, TypeError) as e:
+            print("Invalid black box records received:", e, file=sys.stderr)
+
+    def report_feed_health(self) -> None:
+        # Each report covers the time since the last, so windows are reset even when not reporting
+        reports = [health.report() for health in self.feed_health]
+        if self.adaptive_video and self.is_rov_connected():
+            self.send_action(ActionEnum.CAM_FEEDBACK, reports)
+
     def on_camera_feed_disconnect(self, cam: int, feed: int) -> None:
         feed_config = self.app.feed_config[str(feed)]
 
@@ -194,35 +327,55 @@ class DataInterface(QObject):
         return self.float_data_thread.is_connected()
 
     def is_controller_connected(self) -> bool:
-        return self.get_controller_input() is not None
+        return self.controller_input.is_connected()
 
-    def on_rov_data_sock_recv(self, payload_bytes) -> None:
-        rov_data: ROVData = pickle.loads(payload_bytes)
-        for attr in rov_data.__dict__:
-            setattr(self, attr, getattr(rov_data, attr))
+    def detect_same_clock(self) -> None:
+        # A local ROV shares the UI's clock, so the controller's stick to UART latency can be measured directly
+        self.controller_input.same_clock = _is_loopback(self.app.ROV_IP)
 
-        if not self.attitude_alert_once and (self.attitude.z > 4 or self.attitude.z < -5):
+    def on_rov_data_sock_recv(self, payload_bytes: bytes, send_time: float, recv_time: float) -> None:
+        rov_data: ROVData = pickle.loads(payload_bytes)
+        changed = []
+        for attr, value in rov_data.__dict__.items():
+            if _changed(getattr(self, attr, None), value):
+                changed.append(attr)
+            setattr(self, attr, value)
+        self.telemetry.append(self, recv_time, send_time)
+        self.rov_data_sample += 1
+        if self.last_rov_recv_time is not None:
+            # A gap must show on both clocks, so that either stepping isn't taken for one. The fetched range is
+            # timed back from send_time by the UI's clock, as the ROV's may have stepped during the gap
+            gap = recv_time - self.last_rov_recv_time
+            if (self.black_box_thread is not None and gap > BLACK_BOX_GAP
+                    and send_time - self.last_rov_send_time > BLACK_BOX_GAP):
+                self.fetch_black_box(send_time - gap, send_time)
+        self.last_rov_send_time = send_time
+        self.last_rov_recv_time = recv_time
+        self.controller_input.record_echo(self.controller_sequence, self.controller_applied_time, send_time, recv_time)
+
+        latest = self.telemetry.latest
+        if not self.attitude_alert_once and (latest("attitude.z") > 4 or latest("attitude.z") < -5):
             self.attitude_alert_once = True
             self.attitude_alert.emit()
 
-        if not self.depth_alert_once and (self.depth > 2.5 or self.depth < 1):
+        if not self.depth_alert_once and (latest("depth") > 2.5 or latest("depth") < 1):
             self.depth_alert_once = True
             self.depth_alert.emit()
 
         if not self.ambient_temperature_alert_once and (
-                self.ambient_temperature < 24 or self.ambient_temperature > 28):
+                latest("ambient_temperature") < 24 or latest("ambient_temperature") > 28):
             self.ambient_temperature_alert_once = True
             self.ambient_temperature_alert.emit()
 
-        if not self.ambient_pressure_alert_once and self.ambient_pressure > 129:
+        if not self.ambient_pressure_alert_once and latest("ambient_pressure") > 129:
             self.ambient_pressure_alert_once = True
             self.ambient_pressure_alert.emit()
 
-        if not self.internal_temperature_alert_once and self.internal_temperature > 69:
+        if not self.internal_temperature_alert_once and latest("internal_temperature") > 69:
             self.internal_temperature_alert_once = True
             self.internal_temperature_alert.emit()
 
-        self.rov_data_update.emit()
+        self.rov_data_coalescer.mark(changed)
 
     def on_float_data_sock_recv(self, payload_bytes: bytes) -> None:
         float_data: FloatData = pickle.loads(payload_bytes)
@@ -234,13 +387,16 @@ class DataInterface(QObject):
             self.float_depth_alert_once = True
             self.float_depth_alert.emit()
 
-    def on_video_stream_sock_recv(self, frame: Union[ndarray, None], cam: int, feed: int) -> None:
+    def on_video_stream_sock_recv(self, frame: Union[ndarray, None], timing: FrameTiming | None, cam: int,
+                                  feed: int) -> None:
         # Process the raw video bytes received
         if frame is None:
             print("disconnect")
             self.on_camera_feed_disconnect(cam, feed)
             return
 
+        self.feed_health[feed].record(timing)
+
         if not frame.flags['C_CONTIGUOUS']:
             frame = np.ascontiguousarray(frame)
 
@@ -250,105 +406,85 @@ class DataInterface(QObject):
 
         if feed_config["type"] == "stereo":
             # Code for efficiently seperating video feed into the left and right cameras
+            # Stereo feeds are decoded as RGB so no channel swap is needed here
             frame_w //= 2
             left_cam = frame[:, :frame_w]
             right_cam = frame[:, frame_w:]
 
-            # Swap Red and Blue colour channels
-            left_cam = left_cam[..., [2, 1, 0]]
-            right_cam = right_cam[..., [2, 1, 0]]
+            depth_engine = self.depth_engines.get(cam)
+            if depth_engine is not None:
+                depth_engine.submit(left_cam, right_cam)
 
             left_cam = qimage2ndarray.array2qimage(left_cam)
             right_cam = qimage2ndarray.array2qimage(right_cam)
+            timing.processed = time.time()
 
             #  Wait until no other threads are accessing the VideoFrame for the Left Camera
             with self.camera_frames[cam].lock:
                 self.camera_frames[cam].frame = left_cam
+                self.camera_frames[cam].timing = timing
                 self.camera_frames[cam].new_frame.emit()
 
             #  Wait until no other threads are accessing the VideoFrame for the Right Camera
             with self.camera_frames[cam + 1].lock:
                 self.camera_frames[cam + 1].frame = right_cam
+                self.camera_frames[cam + 1].timing = timing
                 self.camera_frames[cam + 1].new_frame.emit()
 
             return
         elif feed_config["type"] == "fisheye":
-            # Load saved calibration data
-            undistorted_frame = cv2.remap(frame, feed_config["map1"], feed_config["map2"],
-                                          interpolation=cv2.INTER_LINEAR)
-
-            # Crop the valid region
-            x, y, w, h = feed_config["calibration_data"]["roi"]
-            undistorted_frame = undistorted_frame[y:y + h, x:x + w]
-
-            frame = undistorted_frame
+            # Frames from decode worker processes have already been undistorted
+            if not self.video_threads[feed].preprocessed:
+                frame = undistort_fisheye(frame, feed_config)
+                if not frame.flags['C_CONTIGUOUS']:
+                    frame = np.ascontiguousarray(frame)
+            frame_h, frame_w, _ = frame.shape
 
         elif not feed_config["type"] == "default":
             print(f"Unrecognised camera feed type '{feed_config['type']}' in feed_config.json")
             return
         # Generate the new QImage for the feed
         frame = QImage(frame, frame_w, frame_h, QImage.Format.Format_BGR888)
+        timing.processed = time.time()
 
         #  Wait until no other threads are accessing the VideoFrame
         with self.camera_frames[cam].lock:
             self.camera_frames[cam].frame = frame
+            self.camera_frames[cam].timing = timing
             self.camera_frames[cam].new_frame.emit()
 
-    def f_stdout_ui_thread(self) -> None:
-        while not self.app.closing:
-            time.sleep(0)
-            # Process redirected stdout
-            self.redirect_stdout.flush()
-            self.redirect_stderr.flush()
-            for redirect, source, type_ in ((self.redirect_stdout, sys.__stdout__, StdoutType.UI),
-                                            (self.redirect_stderr, sys.__stderr__, StdoutType.UI_ERROR)):
-                # If stdout has been redirected, send it to redirected and source location
-                if redirect != source:
-                    lines = redirect.getvalue().splitlines()
-                    for line in lines:
-                        self.stdout_update.emit(type_, line)
-                        print(line, file=source)
-                    # Clean up redirect buffer
-                    redirect.seek(0)
-                    redirect.truncate(0)
+    def f_stdout_ui_thread(self, output: LineQueue) -> None:
+        # Sleeps until something is printed, then delivers everything printed since in one batch.
+        # Batches are at least STDOUT_BATCH_INTERVAL apart, so a burst of output costs the UI a few signals.
+        while True:
+            lines, dropped = output.get_batch()
+            if not lines and not dropped:
+                if output.closed:
+                    return
+                continue
+            if dropped:
+                lines.insert(0, (StdoutType.UI_ERROR, f"{dropped} lines of output were dropped"))
+            self.stdout_update.emit(lines)
+
+            # Also echo to the console
+            for type_, source in ((StdoutType.UI, sys.__stdout__), (StdoutType.UI_ERROR, sys.__stderr__)):
+                text = "".join(line + "\n" for line_type, line in lines if line_type == type_)
+                if text and source is not None:
+                    source.write(text)
+                    source.flush()
+            time.sleep(STDOUT_BATCH_INTERVAL)
 
     def on_stdout_sock_recv(self, payload_bytes: bytes) -> None:
         # Receive stdout from socket
         try:
             lines: [tuple[StdoutType, str]] = pickle.loads(payload_bytes)
-            for line in lines:
-                source, line = line
-
-                self.stdout_update.emit(source, line)
-
+            self.stdout_update.emit(lines)
+            for source, line in lines:
                 print(f"[{source.name}] {line}",
                       file=(sys.__stdout__ if source != StdoutType.ROV_ERROR else sys.__stderr__))
         except ValueError:
             print("Received stdout was not of format <STDOUTTYPE>, <str>", file=sys.stderr)
 
-    def get_controller_input(self) -> bytes:
-        # Process all pygame events since the function was last called
-        for event in pygame.event.get():
-            # Handle Controller connection and disconnection
-            if event.type == pygame.JOYDEVICEADDED:
-                if self.joystick is None:
-                    self.joystick = pygame.joystick.Joystick(0)
-                    self.joystick.init()
-                    print("Controller Connected", flush=True)
-            elif event.type == pygame.JOYDEVICEREMOVED:
-                self.joystick.quit()
-                self.joystick = None
-                print("Controller Disconnected", flush=True)
-                return pickle.dumps(None)
-        if self.joystick is None:
-            return pickle.dumps(None)
-        new_state = {
-            "axes": [self.joystick.get_axis(i) for i in range(self.joystick.get_numaxes())],
-            "buttons": [self.joystick.get_button(i) for i in range(self.joystick.get_numbuttons())],
-            "hats": [self.joystick.get_hat(i) for i in range(self.joystick.get_numhats())]
-        }
-        return pickle.dumps(new_state)
-
     def close(self):
         if not self.app.closing:
             raise AssertionError("This function should only be called from App after App.closing is set to True")
@@ -356,13 +492,23 @@ class DataInterface(QObject):
         pygame.quit()
         print("Joining ROV data thread", file=sys.__stdout__, flush=True)
         self.rov_data_thread.wait(10)
+        if self.black_box_thread is not None:
+            print("Joining black box thread", file=sys.__stdout__, flush=True)
+            self.black_box_thread.wait(10)
         print("Joining socket stdout thread", file=sys.__stdout__, flush=True)
         self.stdout_sock_thread.wait(10)
-        print("Joining ui stdout thread", file=sys.__stdout__, flush=True)
-        self.stdout_ui_thread.join(10)
+        if self.stdout_ui_thread is not None:
+            print("Joining ui stdout thread", file=sys.__stdout__, flush=True)
+            self.stdout_queue.close()
+            self.stdout_ui_thread.join(10)
         print("Joining controller thread", file=sys.__stdout__, flush=True)
+        self.controller_input.stop()
         self.controller_input_thread.wait(10)
+        print(self.controller_input.summary(), file=sys.__stdout__, flush=True)
         print("Joining video stream threads", file=sys.__stdout__, flush=True)
         for video_stream_thread in self.video_threads:
             video_stream_thread.wait(10)
+        print("Stopping depth engines", file=sys.__stdout__, flush=True)
+        for depth_engine in self.depth_engines.values():
+            depth_engine.stop()
         print("Data Interface closed successfully", file=sys.__stdout__, flush=True)
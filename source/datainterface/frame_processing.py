@@ -0,0 +1,109 @@
+import av
+import cv2
+import numpy as np
+from numpy import ndarray
+
+# Per-feed frame processing shared by the in-process decode threads and the decode worker processes.
+
+# Keys added to a feed config by load_fisheye_calibration
+CALIBRATION_KEYS = ("calibration_data", "map1", "map2", "scaled_maps")
+
+# Width each camera's frame is downscaled to for stereo depth, unless its "depth" section sets "width"
+DEFAULT_DEPTH_WIDTH = 320
+
+
+def load_fisheye_calibration(conf: dict) -> None:
+    # Loads the calibration file of a fisheye feed config and precomputes the undistortion maps in place.
+    # Raises FileNotFoundError if the calibration file is missing and KeyError if it is malformed.
+    conf["calibration_data"] = np.load(conf["undistort_file"])
+
+    for key in ["camera_matrix", "dist_coeffs", "new_camera_matrix", "roi"]:
+        if key not in conf["calibration_data"]:
+            raise KeyError()
+
+    new_camera_matrix, _ = cv2.getOptimalNewCameraMatrix(
+        conf["calibration_data"]["camera_matrix"],
+        conf["calibration_data"]["dist_coeffs"],
+        (conf["width"], conf["height"]), alpha=0
+    )
+
+    conf["map1"], conf["map2"] = cv2.initUndistortRectifyMap(
+        conf["calibration_data"]["camera_matrix"],
+        conf["calibration_data"]["dist_coeffs"],
+        None,
+        new_camera_matrix,
+        (conf["width"], conf["height"]),
+        cv2.CV_16SC2
+    )
+
+
+def feed_settings(conf: dict) -> dict:
+    # The feed config as it appears in feed_config.json, without any calibration loaded into it
+    return {key: value for key, value in conf.items() if key not in CALIBRATION_KEYS}
+
+
+def decode_format(feed_config: dict) -> str:
+    # Stereo frames are turned into QImages as RGB, so decode straight to RGB rather than swapping channels later
+    if feed_config["type"] == "stereo":
+        return "rgb24"
+    return "bgr24"
+
+
+def _even(value: float) -> int:
+    return max(2, round(value / 2) * 2)
+
+
+def display_scale(width: int, height: int, feed_config: dict) -> float:
+    # Scale at which a feed's camera frames are converted so that they are large enough for every consumer: the
+    # largest of the views in its "display_sizes", each the [width, height] a view (e.g. "pilot", "copilot") shows
+    # the feed at, and its stereo depth engine's width if it has a "depth" section.
+    # Views fill their width if wider than tall and their height otherwise, as VideoDisplay does.
+    # "full_size" is set at runtime while a consumer needing full resolution, such as a snapshot burst, is active.
+    sizes = feed_config.get("display_sizes")
+    if not sizes or feed_config.get("full_size", False):
+        return 1
+    scale = 0
+    for view_width, view_height in sizes.values():
+        scale = max(scale, view_width / width if view_width > view_height else view_height / height)
+    if "depth" in feed_config:
+        scale = max(scale, feed_config["depth"].get("width", DEFAULT_DEPTH_WIDTH) / width)
+    return min(scale, 1)
+
+
+def decode_frame(frame: av.VideoFrame, feed_config: dict) -> ndarray:
+    # Converts a decoded frame to an ndarray in the feed's decode format, scaled down in the same pass if none of the
+    # feed's views need it at full size
+    frame_format = decode_format(feed_config)
+    camera_width = frame.width // 2 if feed_config["type"] == "stereo" else frame.width
+    scale = display_scale(camera_width, frame.height, feed_config)
+    if scale >= 1:
+        return frame.to_ndarray(format=frame_format)
+    return frame.reformat(width=_even(frame.width * scale), height=_even(frame.height * scale),
+                          format=frame_format).to_ndarray()
+
+
+def _fisheye_maps(conf: dict, width: int, height: int) -> tuple[ndarray, ndarray, ndarray]:
+    # Undistortion maps and valid region for frames of the given size.
+    # Maps for sizes other than the calibrated one are built on first use.
+    if (width, height) == (conf["width"], conf["height"]):
+        return conf["map1"], conf["map2"], conf["calibration_data"]["roi"]
+    scaled_maps = conf.setdefault("scaled_maps", {})
+    if (width, height) not in scaled_maps:
+        scale = width / conf["width"]
+        camera_matrix = np.diag([scale, scale, 1]) @ conf["calibration_data"]["camera_matrix"]
+        dist_coeffs = conf["calibration_data"]["dist_coeffs"]
+        new_camera_matrix, _ = cv2.getOptimalNewCameraMatrix(camera_matrix, dist_coeffs, (width, height), alpha=0)
+        map1, map2 = cv2.initUndistortRectifyMap(camera_matrix, dist_coeffs, None, new_camera_matrix,
+                                                 (width, height), cv2.CV_16SC2)
+        roi = np.round(np.asarray(conf["calibration_data"]["roi"]) * scale).astype(int)
+        scaled_maps[(width, height)] = (map1, map2, roi)
+    return scaled_maps[(width, height)]
+
+
+def undistort_fisheye(frame: ndarray, feed_config: dict) -> ndarray:
+    map1, map2, roi = _fisheye_maps(feed_config, frame.shape[1], frame.shape[0])
+    undistorted_frame = cv2.remap(frame, map1, map2, interpolation=cv2.INTER_LINEAR)
+
+    # Crop the valid region
+    x, y, w, h = roi
+    return undistorted_frame[y:y + h, x:x + w]
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+
+# Latency stages measured for each camera frame, in the order they happen.
+# queue: How much later than the stream's own PTS schedule the frame arrived, relative to the best seen so far
+# decode: Packet arrival to decoded frame
+# process: Decoded frame to processed (undistorted/split) frame in the DataInterface
+# render: Processed frame to pixmap rendered by the VideoDisplay
+# paint: Rendered pixmap to it being set on the label
+# total: Packet arrival to painted
+# glass_to_glass: Capture time burned into a test stream to painted. Only available for latency test feeds.
+STAGES = ("queue", "decode", "process", "render", "paint", "total", "glass_to_glass")
+
+
+@dataclass
+class FrameTiming:
+    arrival: float = 0
+    decoded: float = 0
+    processed: float = 0
+    rendered: float = 0
+    pts: float | None = None  # Seconds
+    capture: float | None = None  # Read from a timestamp burned into the frame
+    full_size: bool = True  # Decoded at the source's width and height, rather than scaled down for display
+
+
+class LatencyHistogram:
+    """
+        A fixed bin histogram of latencies in milliseconds.
+        Latencies beyond the last bin are counted in it.
+    """
+
+    def __init__(self, bin_ms: float = 5, max_ms: float = 500):
+        self.bin_ms = bin_ms
+        self.counts = [0] * int(max_ms / bin_ms)
+        self.count = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        index = min(max(int(ms / self.bin_ms), 0), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.last_ms = ms
+
+    def mean(self) -> float:
+        return self.total_ms / self.count if self.count else 0
+
+    def percentile(self, p: float) -> float:
+        if self.count == 0:
+            return 0
+        target = self.count * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return (i + 1) * self.bin_ms
+        return len(self.counts) * self.bin_ms
+
+    def reset(self) -> None:
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+
+class FeedLatency:
+    """
+        Live latency histograms for each stage of a camera frame's journey to the screen.
+    """
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+        self.min_pts_offset: float | None = None
+
+    def record_frame(self, timing: FrameTiming, painted: float) -> None:
+        if timing.pts is not None:
+            # Arrival clock minus stream clock is smallest for the least delayed frame
+            offset = timing.arrival - timing.pts
+            if self.min_pts_offset is None or offset < self.min_pts_offset:
+                self.min_pts_offset = offset
+            self.histograms["queue"].record((offset - self.min_pts_offset) * 1000)
+
+        self.histograms["decode"].record((timing.decoded - timing.arrival) * 1000)
+        self.histograms["process"].record((timing.processed - timing.decoded) * 1000)
+        self.histograms["render"].record((timing.rendered - timing.processed) * 1000)
+        self.histograms["paint"].record((painted - timing.rendered) * 1000)
+        self.histograms["total"].record((painted - timing.arrival) * 1000)
+        if timing.capture is not None:
+            self.histograms["glass_to_glass"].record((painted - timing.capture) * 1000)
+
+    def reset(self) -> None:
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.min_pts_offset = None
+
+
+class FeedHealth:
+    """
+        Dropped frames and arrival delay of a video feed over a reporting window, measured as frames are received
+        whether or not they are displayed. Reported to the ROV so it can adapt the feed's bitrate and resolution.
+    """
+
+    # A PTS jump larger than this means the stream was restarted rather than frames being lost
+    MAX_PTS_STEP = 5
+
+    def __init__(self):
+        self.frame_period: float | None = None  # Smallest PTS step seen in the current stream
+        self.last_pts: float | None = None
+        self.min_pts_offset: float | None = None
+        self.frames = 0
+        self.dropped = 0
+        self.delay = LatencyHistogram()
+
+    def record(self, timing: FrameTiming) -> None:
+        self.frames += 1
+        if timing.pts is None:
+            return
+        if self.last_pts is not None:
+            step = timing.pts - self.last_pts
+            if step <= 0 or step > self.MAX_PTS_STEP:
+                self.frame_period = None
+                self.min_pts_offset = None
+            else:
+                if self.frame_period is None or step < self.frame_period:
+                    self.frame_period = step
+                self.dropped += max(round(step / self.frame_period) - 1, 0)
+        self.last_pts = timing.pts
+
+        # As for the queue stage of FeedLatency, delay is relative to the least delayed frame
+        offset = timing.arrival - timing.pts
+        if self.min_pts_offset is None or offset < self.min_pts_offset:
+            self.min_pts_offset = offset
+        self.delay.record((offset - self.min_pts_offset) * 1000)
+
+    def report(self) -> tuple[float, float] | None:
+        # (Drop Rate, 95th Percentile Delay ms) since the last report, or None if no frames arrived. Starts a new window.
+        report = None
+        if self.frames:
+            report = (self.dropped / (self.frames + self.dropped), self.delay.percentile(95))
+        self.frames = 0
+        self.dropped = 0
+        self.delay.reset()
+        return report
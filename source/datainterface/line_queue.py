@@ -0,0 +1,76 @@
+import io
+from collections import deque
+from threading import Condition
+from typing import Hashable
+
+
+class LineQueue:
+    """
+        A bounded queue of complete lines written by any number of LineQueueStreams, each tagged with its stream's
+        tag. Writers never block. When more than max_lines are waiting the oldest are dropped, and counted so the
+        consumer can say so. The consumer sleeps in get_batch until a line is queued, then takes every waiting line.
+    """
+
+    def __init__(self, max_lines: int = 10000):
+        self.lines: deque[tuple[Hashable, str]] = deque(maxlen=max_lines)
+        self.condition = Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, tag: Hashable, lines: list[str]) -> None:
+        with self.condition:
+            overflow = len(self.lines) + len(lines) - self.lines.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self.lines.extend((tag, line) for line in lines)
+            self.condition.notify()
+
+    def get_batch(self, timeout: float | None = None) -> tuple[list[tuple[Hashable, str]], int]:
+        # Waits for lines, then returns all of them and the number dropped since the last batch.
+        # Returns nothing once closed, or if the timeout passes first.
+        with self.condition:
+            self.condition.wait_for(lambda: self.lines or self.closed, timeout)
+            batch = list(self.lines)
+            self.lines.clear()
+            dropped, self.dropped = self.dropped, 0
+            return batch, dropped
+
+    def close(self) -> None:
+        # Wakes the consumer for good
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class LineQueueStream(io.TextIOBase):
+    """
+        A text stream that stdout or stderr can be redirected to, which passes each complete line to a LineQueue.
+        Text after the last newline is held until the line is finished, or until it grows past max_partial
+        characters so that output without newlines can't use unbounded memory.
+    """
+
+    def __init__(self, queue: LineQueue, tag: Hashable, max_partial: int = 65536):
+        super().__init__()
+        self.queue = queue
+        self.tag = tag
+        self.max_partial = max_partial
+        self.partial = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        # Guarded by the queue's lock, which is reentrant, as threads may print to the same stream
+        with self.queue.condition:
+            lines = (self.partial + text).split("\n")
+            self.partial = lines.pop()
+            if len(self.partial) > self.max_partial:
+                lines.append(self.partial)
+                self.partial = ""
+            if lines:
+                self.queue.put(self.tag, lines)
+        return len(text)
+
+    def flush(self) -> None:
+        # Partial lines are kept back, as print writes its text and line ending separately
+        pass
@@ -13,18 +13,20 @@ if TYPE_CHECKING:
 # It functions almost identically but one must connect to Signals to interface with this object
 class QSockStreamRecv(QObject):
     on_recv = pyqtSignal(bytes)
+    on_recv_timed = pyqtSignal(bytes, float, float)  # Payload, Time Sent, Time Received. Emitted instead if timed.
     on_connect = pyqtSignal()
     on_disconnect = pyqtSignal()
     on_status_change = pyqtSignal()
 
     def __init__(self, app: "App", addr: str, port: int, buffer_size: int = 1024,
-                 protocol: Literal["tcp", "udp"] = "tcp"):
+                 protocol: Literal["tcp", "udp"] = "tcp", timed: bool = False):
         super().__init__()
         self.recv = SockStreamRecv(app, addr, port, self.on_recv.emit,
                                    self.on_connect.emit,
                                    self.on_disconnect.emit,
                                    self.on_status_change.emit,
-                                   buffer_size, protocol)
+                                   buffer_size, protocol,
+                                   on_recv_timed=self.on_recv_timed.emit if timed else None)
         self.recv.start()
 
         # Place this object in a QThread so that it's signals are not processed by another Thread
@@ -0,0 +1,58 @@
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, QTimer, Qt
+from PyQt6.QtGui import QScreen
+
+if TYPE_CHECKING:
+    from datainterface.video_display import VideoDisplay
+
+DEFAULT_REFRESH_RATE = 60
+
+
+class RenderScheduler(QObject):
+    """
+        Drives a group of VideoDisplays from a single timer instead of from every new_frame signal.
+        On each tick, a display is only rendered if a frame has arrived since it was last rendered
+        and its label is actually visible. Only the newest frame is ever rendered.
+        The scheduler should be moved to the same thread as its displays and started from that thread.
+    """
+
+    def __init__(self, screen: QScreen | None = None, fps: float = 0):
+        super().__init__()
+        self.displays: list["VideoDisplay"] = []
+
+        # Cap rendering at the monitor's refresh rate unless a specific rate is requested
+        if not fps:
+            fps = screen.refreshRate() if screen is not None else 0
+        if not fps or fps <= 0:
+            fps = DEFAULT_REFRESH_RATE
+        self.fps: float = fps
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+
+        # Statistics
+        self.rendered_count = 0
+        self.hidden_skip_count = 0
+
+    def add_display(self, display: "VideoDisplay") -> None:
+        self.displays.append(display)
+
+    def start(self) -> None:
+        self.timer.start(max(1, round(1000 / self.fps)))
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+    def tick(self) -> None:
+        for display in self.displays:
+            if not display.frame_pending:
+                continue
+            # Leave the frame pending so that it is drawn as soon as the label becomes visible again
+            if not display.is_visible():
+                self.hidden_skip_count += 1
+                continue
+            display.frame_pending = False
+            display.update_frame()
+            self.rendered_count += 1
@@ -0,0 +1,84 @@
+import struct
+from collections import deque
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from numpy import ndarray
+
+# Records sent from a decode worker to its VideoRecv over the worker's stdout.
+# RECORD CONTENTS = (Kind, Slot, Height, Width, Sequence, Arrival Time, Decoded Time, PTS, Capture Time, Full Size)
+# PTS and Capture Time are NaN when unknown
+RECORD_FORMAT = "<BIIIQdddd?"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+RECORD_FRAME = 0  # A frame of (Height, Width) has been written to Slot
+RECORD_RING = 1  # A new ring of Slot slots, each fitting (Height, Width) frames, has been created as generation Sequence
+RECORD_CONNECT = 2
+RECORD_DISCONNECT = 3
+
+FRAME_CHANNELS = 3
+
+
+def ring_name(prefix: str, generation: int) -> str:
+    return f"{prefix}_{generation}"
+
+
+class SharedFrameRing:
+    """
+        A fixed number of frame slots in a single shared memory block.
+        The decode worker creates the ring and writes frames into it in turn.
+        The UI process attaches to the same block and copies each frame out of its slot once it's published,
+        which is one copy rather than the pickling and pipe transfers of sending it.
+        The worker only writes to free slots. The reader frees each slot by telling the worker once it has copied
+        the frame out, and the worker drops frames while none are free, so a slot is never rewritten mid copy.
+    """
+
+    def __init__(self, name: str, slot_count: int, height: int, width: int, create: bool = False):
+        self.name = name
+        self.slot_count = slot_count
+        self.height = height
+        self.width = width
+        self.slot_size = height * width * FRAME_CHANNELS
+        self.created = create
+        # Slots the reader has finished with, only tracked by the creating worker. Freed from the worker's command
+        # thread, and deque appends and pops are atomic
+        self.free: deque[int] = deque(range(slot_count))
+
+        self.shm = SharedMemory(name=name, create=create, size=self.slot_count * self.slot_size)
+        if not create:
+            # Only the creating worker should unlink the block, stop this process's tracker from doing so on exit
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+
+    def fits(self, frame: ndarray) -> bool:
+        return frame.nbytes <= self.slot_size
+
+    def view(self, slot: int, height: int, width: int) -> ndarray:
+        return np.ndarray((height, width, FRAME_CHANNELS), dtype=np.uint8, buffer=self.shm.buf,
+                          offset=slot * self.slot_size)
+
+    def write(self, frame: ndarray) -> int | None:
+        # Returns the slot written, or None if the reader still holds every slot
+        if not self.free:
+            return None
+        slot = self.free.popleft()
+        height, width = frame.shape[:2]
+        np.copyto(self.view(slot, height, width), frame)
+        return slot
+
+    def release(self, slot: int) -> None:
+        if 0 <= slot < self.slot_count and slot not in self.free:
+            self.free.append(slot)
+
+    def close(self) -> bool:
+        # Closing fails while views of the ring are still referenced, the caller may retry later
+        try:
+            self.shm.close()
+        except BufferError:
+            return False
+        if self.created:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        return True
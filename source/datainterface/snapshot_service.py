@@ -0,0 +1,160 @@
+import pickle
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from threading import Thread
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from rov_float_data_structures.rov_data import ROVData
+
+if TYPE_CHECKING:
+    from datainterface.data_interface import DataInterface
+    from datainterface.video_frame import VideoFrame
+
+SIDECAR_SUFFIX = ".rov_data"
+FULL_SIZE_TIMEOUT = 1.0  # Longest a burst waits for its first full size frame
+
+
+@dataclass
+class SnapshotTelemetry:
+    image: str  # File name of the picture, in the same directory as the sidecar
+    index: int  # Position in its burst
+    time: float
+    rov_data_sample: int  # Number of ROV data packets received by then, as in video recording indexes
+    rov_data: ROVData
+
+
+def load_sidecars(directory: Path) -> dict[str, ROVData]:
+    # ROV data of every picture in a directory, by the picture's file name.
+    # Reads burst sidecars as well as the single ROVData sidecars written for each picture by older versions.
+    telemetry = {}
+    for path in directory.glob(f"*{SIDECAR_SUFFIX}"):
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Could not read {path}:", e, file=sys.stderr)
+            continue
+        if isinstance(data, ROVData):
+            telemetry[f"{path.stem}.jpg"] = data
+        else:
+            for record in data:
+                telemetry[record.image] = record.rov_data
+    return telemetry
+
+
+class SaveTask(QRunnable):
+    def __init__(self, service: "SnapshotService", image: QImage, path: Path):
+        super().__init__()
+        self.service = service
+        self.image = image
+        self.path = path
+
+    def run(self) -> None:
+        if self.image.save(str(self.path)):
+            self.service.snapshot_saved.emit(str(self.path))
+        else:
+            print(f"Failed to save picture {self.path}", file=sys.stderr)
+
+
+class SnapshotService(QObject):
+    """
+        Takes pictures from camera feeds without holding up the video pipeline or the UI.
+        Only copying the frame happens under its VideoFrame's lock. Encoding and saving happen on a thread pool.
+        A burst takes a number of pictures at a fixed rate, paced on its own thread, and writes the telemetry
+        for all of them to one sidecar file. Feeds scaled down for display are decoded at full resolution for
+        the length of a burst, which starts once the first frame decoded at full size has arrived.
+    """
+    snapshot_saved = pyqtSignal(str)  # Path of the saved picture
+    burst_complete = pyqtSignal(str, int)  # Path of the sidecar, Number of pictures taken
+
+    def __init__(self, data: "DataInterface", max_threads: int = 2):
+        super().__init__()
+        self.data = data
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self.bursts: list[Thread] = []
+
+    def take_picture(self, frame_index: int, directory: Path) -> bool:
+        return self.take_burst(frame_index, directory, 1, 1)
+
+    def take_burst(self, frame_index: int, directory: Path, count: int, rate: float) -> bool:
+        # Takes count pictures at rate Hz. Returns False if the camera is disconnected.
+        camera_frame = self.data.camera_frames[frame_index]
+        with camera_frame.lock:
+            if camera_frame.frame is None:
+                print("Couldn't take picture - camera is disconnected. Try a different camera...", file=sys.stderr)
+                return False
+        self.bursts = [burst for burst in self.bursts if burst.is_alive()]
+        burst = Thread(target=self.run_burst, args=(frame_index, directory, count, rate), daemon=True)
+        burst.start()
+        self.bursts.append(burst)
+        return True
+
+    def run_burst(self, frame_index: int, directory: Path, count: int, rate: float) -> None:
+        camera_frame = self.data.camera_frames[frame_index]
+        name = datetime.now().isoformat(timespec="milliseconds").replace(":", "-").replace(".", "-")
+        if self.data.request_full_size(frame_index, True):
+            self.wait_for_full_size(camera_frame)
+        try:
+            records = self.take_pictures(camera_frame, directory, name, count, rate)
+        finally:
+            self.data.request_full_size(frame_index, False)
+
+        if not records:
+            return
+        sidecar = directory / f"{name}{SIDECAR_SUFFIX}"
+        try:
+            with open(sidecar, "wb") as f:
+                pickle.dump(records, f)
+        except OSError as e:
+            print(f"Could not write {sidecar}:", e, file=sys.stderr)
+            return
+        self.burst_complete.emit(str(sidecar), len(records))
+
+    def wait_for_full_size(self, camera_frame: "VideoFrame") -> None:
+        # Waits for a frame the decoder found to be the source's size, or FULL_SIZE_TIMEOUT. Frames already scaled
+        # down for display may still be arriving for a while after the request
+        deadline = time.perf_counter() + FULL_SIZE_TIMEOUT
+        while time.perf_counter() < deadline:
+            with camera_frame.lock:
+                timing = camera_frame.timing
+                if camera_frame.frame is None or (timing is not None and timing.full_size):
+                    return
+            time.sleep(0.01)
+        print("Timed out waiting for a full size frame, pictures may be at display size", file=sys.stderr)
+
+    def take_pictures(self, camera_frame: "VideoFrame", directory: Path, name: str, count: int,
+                      rate: float) -> list[SnapshotTelemetry]:
+        period = 1 / rate
+        next_picture = time.perf_counter()
+        records: list[SnapshotTelemetry] = []
+        for i in range(count):
+            with camera_frame.lock:
+                frame = camera_frame.frame
+                # A deep copy, as the frame may be a view of a buffer the decoder reuses
+                image = frame.copy() if frame is not None else None
+            if image is None:
+                print(f"Camera disconnected during burst {name}, {i} of {count} pictures taken", file=sys.stderr)
+                break
+
+            path = directory / f"{name}_{i:03}.jpg"
+            records.append(SnapshotTelemetry(path.name, i, time.time(), self.data.rov_data_sample,
+                                             self.data.export_rov_data()))
+            self.thread_pool.start(SaveTask(self, image, path))
+
+            next_picture += period
+            delay = next_picture - time.perf_counter()
+            if delay > 0 and i < count - 1:
+                time.sleep(delay)
+        return records
+
+    def wait(self, timeout: float = 10) -> None:
+        for burst in self.bursts:
+            burst.join(timeout)
+        self.thread_pool.waitForDone(int(timeout * 1000))
@@ -57,13 +57,15 @@ class SockStreamRecv(threading.Thread):
                  protocol: Literal["tcp", "udp"] = "tcp",
                  timeout: float = 0.5,
                  max_reconnect_attempts: int = -1,
-                 reconnect_delay: float = 1.0):
+                 reconnect_delay: float = 1.0,
+                 on_recv_timed: Optional[Callable[[bytes, float, float], None]] = None):
         """
         Initialize socket stream receiver.
 
         Args:
             max_reconnect_attempts: Maximum reconnection attempts (-1 for infinite)
             reconnect_delay: Delay between reconnection attempts in seconds
+            on_recv_timed: Called instead of on_recv with (Payload, Time Sent, Time Received) if given
         """
         protocol = protocol.lower()
         if protocol not in ["tcp", "udp"]:
@@ -74,6 +76,7 @@ class SockStreamRecv(threading.Thread):
         self.addr = addr
         self.port = port
         self.on_recv = on_recv
+        self.on_recv_timed = on_recv_timed
         self.on_connect = on_connect
         self.on_disconnect = on_disconnect
         self.on_status_change = on_status_change
@@ -335,7 +338,10 @@ class SockStreamRecv(threading.Thread):
     def _process_message(self, payload: bytes, header: MessageHeader) -> None:
         """Process received message with error handling."""
         try:
-            self.on_recv(payload)
+            if self.on_recv_timed is not None:
+                self.on_recv_timed(payload, header.recv_time, time.time())
+            else:
+                self.on_recv(payload)
 
             # Handle sleep timing
             if header.sleep > 0:
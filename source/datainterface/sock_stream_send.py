@@ -182,7 +182,9 @@ class SockStreamSend(threading.Thread):
                     # Get data
                     data = self._get_data_safely()
                     if data is None:
-                        time.sleep(0.001)  # Small sleep to prevent busy waiting
+                        # Nothing to send yet, so check again next period
+                        if self._shutdown_event.wait(max(self.sleep, 0.001)):
+                            break
                         continue
 
                     try:
@@ -250,7 +252,9 @@ class SockStreamSend(threading.Thread):
                     # Get data
                     data = self._get_data_safely()
                     if data is None:
-                        time.sleep(0.001)  # Small sleep to prevent busy waiting
+                        # Nothing to send yet, so check again next period
+                        if self._shutdown_event.wait(max(self.sleep, 0.001)):
+                            break
                         continue
 
                     try:
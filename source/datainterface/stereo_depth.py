@@ -0,0 +1,235 @@
+import math
+import sys
+import time
+from threading import Thread, Condition, Lock
+
+import cv2
+import numpy as np
+from numpy import ndarray
+import qimage2ndarray
+from PyQt6.QtGui import QImage
+
+from datainterface.frame_processing import DEFAULT_DEPTH_WIDTH
+from datainterface.latency_stats import LatencyHistogram
+from datainterface.video_frame import VideoFrame
+
+# Settings of a stereo feed's "depth" section in feed_config.json, all optional:
+# rate: Depth frames computed per second
+# width: Width each camera's frame is downscaled to before matching. Height keeps the aspect ratio.
+# num_disparities: Disparity search range in downscaled pixels, rounded up to a multiple of 16
+# block_size: Odd matching window size in downscaled pixels
+# rectify_file: .npz from cv2.stereoCalibrate with camera_matrix_left, dist_coeffs_left, camera_matrix_right,
+#               dist_coeffs_right, R and T. T gives the baseline in the units it was calibrated in, which should be m.
+# calibration_width: Width of one camera's image when the rectify_file was made. Needed if the feed is decoded
+#                    smaller than that because of its display_sizes.
+# baseline, focal_length: Baseline in m and focal length in pixels at calibration_width, for feeds that are already
+#                         rectified by the camera. Without either these or a rectify_file, only disparity is available.
+DEFAULT_DEPTH_SETTINGS = {
+    "rate": 5,
+    "width": DEFAULT_DEPTH_WIDTH,
+    "num_disparities": 64,
+    "block_size": 15
+}
+
+
+class StereoDepthEngine:
+    """
+        Computes depth from a stereo feed's left and right cameras on a background thread.
+        The DataInterface submits each stereo pair, but only pairs due at the configured rate are kept.
+        They are converted to grey and downscaled straight away, so the engine never holds on to frames that a
+        decode worker may overwrite. Rectification, if calibrated, and matching happen on the engine's thread.
+        The latest result is available as metres per pixel through depth_at/distance_at, and as a false colour
+        preview in depth_frame which can be attached to a VideoDisplay like any camera.
+    """
+
+    def __init__(self, feed_index: int, settings: dict):
+        self.feed_index = feed_index
+        self.settings = DEFAULT_DEPTH_SETTINGS | settings
+        self.period = 1 / self.settings["rate"]
+        self.width: int = self.settings["width"]
+        self.height = 0  # Known once the first pair arrives
+        self.full_width = 0
+
+        num_disparities = math.ceil(self.settings["num_disparities"] / 16) * 16
+        self.matcher = cv2.StereoBM_create(numDisparities=num_disparities, blockSize=self.settings["block_size"] | 1)
+
+        # Calibration, at the downscaled resolution
+        self.rectify_maps: tuple[ndarray, ndarray, ndarray, ndarray] | None = None
+        self.focal_baseline: float | None = None  # Focal length (downscaled pixels) x baseline (m)
+        self.calibration: dict | None = None
+        if "rectify_file" in self.settings:
+            try:
+                self.calibration = dict(np.load(self.settings["rectify_file"]))
+            except FileNotFoundError:
+                print(f"Could not find stereo calibration {self.settings['rectify_file']}", file=sys.stderr)
+
+        self.next_due = 0.0
+        self.pair: tuple[ndarray, ndarray] | None = None
+        self.condition = Condition()
+        self.closing = False
+
+        # Latest depth in metres, or disparity in downscaled pixels if uncalibrated. NaN where unmatched.
+        self.result_lock = Lock()
+        self.depth: ndarray | None = None
+        self.depth_time = 0.0
+        self.depth_frame = VideoFrame()
+
+        # Compute budget
+        self.compute_ms = LatencyHistogram(bin_ms=1, max_ms=200)
+        self.frames_computed = 0
+        self.overruns = 0  # Frames that took longer than the period of the configured rate
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, left: ndarray, right: ndarray) -> None:
+        # Called from the thread that splits the stereo feed, so does as little as possible for pairs that aren't due
+        now = time.perf_counter()
+        if now < self.next_due or self.closing:
+            return
+        self.next_due = now + self.period
+
+        if left.shape[1] != self.full_width:
+            self.configure(left.shape[1], left.shape[0])
+        size = (self.width, self.height)
+        left = cv2.resize(cv2.cvtColor(left, cv2.COLOR_RGB2GRAY), size, interpolation=cv2.INTER_AREA)
+        right = cv2.resize(cv2.cvtColor(right, cv2.COLOR_RGB2GRAY), size, interpolation=cv2.INTER_AREA)
+
+        with self.condition:
+            self.pair = (left, right)
+            self.condition.notify()
+
+    def configure(self, full_width: int, full_height: int) -> None:
+        self.full_width = full_width
+        self.height = round(full_height * self.width / full_width)
+        # Scale from calibrated pixels to the downscaled pixels depth is computed in
+        scale = self.width / self.settings.get("calibration_width", full_width)
+        size = (self.width, self.height)
+
+        self.rectify_maps = None
+        self.focal_baseline = None
+        if self.calibration is not None:
+            try:
+                # Camera matrices scale with the image, distortion coefficients don't
+                scaling = np.diag([scale, scale, 1])
+                left_matrix = scaling @ self.calibration["camera_matrix_left"]
+                right_matrix = scaling @ self.calibration["camera_matrix_right"]
+                r1, r2, p1, p2, _, _, _ = cv2.stereoRectify(
+                    left_matrix, self.calibration["dist_coeffs_left"],
+                    right_matrix, self.calibration["dist_coeffs_right"],
+                    size, self.calibration["R"], self.calibration["T"], alpha=0)
+                self.rectify_maps = (
+                    *cv2.initUndistortRectifyMap(left_matrix, self.calibration["dist_coeffs_left"], r1, p1, size,
+                                                 cv2.CV_16SC2),
+                    *cv2.initUndistortRectifyMap(right_matrix, self.calibration["dist_coeffs_right"], r2, p2, size,
+                                                 cv2.CV_16SC2))
+                self.focal_baseline = p1[0, 0] * float(np.linalg.norm(self.calibration["T"]))
+            except (KeyError, cv2.error) as e:
+                print(f"Stereo calibration for feed {self.feed_index} is unusable:", e, file=sys.stderr)
+        elif "baseline" in self.settings and "focal_length" in self.settings:
+            self.focal_baseline = self.settings["focal_length"] * scale * self.settings["baseline"]
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while self.pair is None and not self.closing:
+                    self.condition.wait()
+                if self.closing:
+                    return
+                (left, right), self.pair = self.pair, None
+
+            start = time.perf_counter()
+            try:
+                depth, preview = self.compute(left, right)
+            except cv2.error as e:
+                print(f"Depth estimation for feed {self.feed_index} failed:", e, file=sys.stderr)
+                continue
+            with self.result_lock:
+                self.depth = depth
+                self.depth_time = time.time()
+            with self.depth_frame.lock:
+                self.depth_frame.frame = preview
+                self.depth_frame.new_frame.emit()
+
+            elapsed = time.perf_counter() - start
+            self.compute_ms.record(elapsed * 1000)
+            self.frames_computed += 1
+            if elapsed > self.period:
+                self.overruns += 1
+
+    def compute(self, left: ndarray, right: ndarray) -> tuple[ndarray, QImage]:
+        if self.rectify_maps is not None:
+            left_x, left_y, right_x, right_y = self.rectify_maps
+            left = cv2.remap(left, left_x, left_y, cv2.INTER_LINEAR)
+            right = cv2.remap(right, right_x, right_y, cv2.INTER_LINEAR)
+
+        # StereoBM gives fixed point disparities with 4 fractional bits, and negative values where nothing matched
+        disparity = self.matcher.compute(left, right).astype(np.float32) / 16
+        disparity[disparity <= 0] = np.nan
+
+        preview = cv2.normalize(np.nan_to_num(disparity), None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        preview = cv2.cvtColor(cv2.applyColorMap(preview, cv2.COLORMAP_JET), cv2.COLOR_BGR2RGB)
+
+        if self.focal_baseline is not None:
+            return self.focal_baseline / disparity, qimage2ndarray.array2qimage(preview)
+        return disparity, qimage2ndarray.array2qimage(preview)
+
+    def has_distances(self) -> bool:
+        return self.focal_baseline is not None
+
+    def depth_at(self, x: float, y: float, radius: int = 2) -> float | None:
+        # Depth at a point of the left camera's image, given as a fraction of its width and height.
+        # The median of a small window is used so that a single unmatched pixel doesn't leave a hole.
+        # Returns metres if the engine is calibrated, otherwise disparity. None if nothing matched there.
+        with self.result_lock:
+            depth = self.depth
+        if depth is None or not (0 <= x <= 1 and 0 <= y <= 1):
+            return None
+        h, w = depth.shape
+        column = min(int(x * w), w - 1)
+        row = min(int(y * h), h - 1)
+        window = depth[max(row - radius, 0):row + radius + 1, max(column - radius, 0):column + radius + 1]
+        window = window[~np.isnan(window)]
+        if window.size == 0:
+            return None
+        return float(np.median(window))
+
+    def distance_at(self, x: float, y: float, radius: int = 2) -> float | None:
+        # As depth_at, but only ever in metres
+        if not self.has_distances():
+            return None
+        return self.depth_at(x, y, radius)
+
+    def budget_used(self) -> float:
+        # Fraction of each period spent computing, on average. Above 1 the configured rate can't be kept.
+        return self.compute_ms.mean() / (self.period * 1000)
+
+    def stop(self) -> None:
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join(5)
+
+
+if __name__ == "__main__":
+    # Tune settings on a saved pair: python -m datainterface.stereo_depth <left image> <right image> [feed index]
+    import json
+    with open("feed_config.json") as f:
+        feed_config = json.load(f)
+    feed_settings = feed_config[sys.argv[3] if len(sys.argv) > 3 else "1"].get("depth", {})
+
+    left_image = cv2.cvtColor(cv2.imread(sys.argv[1]), cv2.COLOR_BGR2RGB)
+    right_image = cv2.cvtColor(cv2.imread(sys.argv[2]), cv2.COLOR_BGR2RGB)
+    engine = StereoDepthEngine(0, feed_settings)
+    engine.submit(left_image, right_image)
+    while engine.frames_computed == 0:
+        time.sleep(0.01)
+    engine.stop()
+
+    print(f"Computed in {engine.compute_ms.last_ms:.1f} ms, "
+          f"{engine.budget_used() * 100:.0f}% of the budget at {engine.settings['rate']} Hz")
+    print(f"Centre: {engine.depth_at(0.5, 0.5)} {'m' if engine.has_distances() else 'px disparity'}")
+    with engine.depth_frame.lock:
+        cv2.imshow("Disparity", cv2.cvtColor(qimage2ndarray.rgb_view(engine.depth_frame.frame), cv2.COLOR_RGB2BGR))
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
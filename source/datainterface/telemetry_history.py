@@ -0,0 +1,111 @@
+from threading import Lock
+from typing import Sequence
+
+import numpy as np
+from numpy import ndarray
+
+from data_classes.vector3 import Vector3
+
+TIME_COLUMNS = ("recv_time", "send_time")
+
+
+def telemetry_fields(data: object) -> list[str]:
+    # Numeric fields of a data structure such as ROVData, with Vector3s split into "attr.x", "attr.y" and "attr.z"
+    fields = []
+    for attr, value in data.__dict__.items():
+        if type(value) is Vector3:
+            fields += [f"{attr}.x", f"{attr}.y", f"{attr}.z"]
+        elif isinstance(value, (int, float)):
+            fields.append(attr)
+    return fields
+
+
+def pretty_field(field: str) -> str:
+    # As shown in the Grapher and written in recording headers, e.g. "attitude.x" is "Attitude X"
+    return field.replace("_", " ").replace(".", " ").title()
+
+
+class TelemetryHistory:
+    """
+        Every telemetry sample received, with the time it was received and the time it was sent, in a preallocated
+        ring buffer of capacity samples. Each field is a contiguous float64 column.
+
+        Samples are numbered from 0 in the order they arrive, as DataInterface.rov_data_sample counts them.
+        Each sample is written twice, at its slot and capacity slots later, so that any run of up to capacity
+        consecutive samples is one contiguous slice. Windows are therefore returned as views rather than copies.
+        A view stays valid until its samples are overwritten, capacity samples later. Copy it to keep it for longer.
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int = 65536):
+        self.fields = list(fields)
+        self.columns = list(TIME_COLUMNS) + self.fields
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = capacity
+        self.data = np.full((len(self.columns), capacity * 2), np.nan)
+        self.count = 0  # Samples appended so far, which is the number of the next sample
+        self.lock = Lock()
+
+        # (Attribute, Vector3 Component or None) of each field, resolved once rather than on each append
+        self.getters = [tuple(field.split(".")) if "." in field else (field, None) for field in self.fields]
+
+    def append(self, data: object, recv_time: float, send_time: float = np.nan) -> int:
+        # Appends the fields of data, which may be any object with them as attributes. Returns the sample's number.
+        row = [recv_time, send_time]
+        for attr, component in self.getters:
+            value = getattr(data, attr, np.nan)
+            row.append(getattr(value, component) if component is not None else value)
+
+        with self.lock:
+            slot = self.count % self.capacity
+            self.data[:, slot] = row
+            self.data[:, slot + self.capacity] = row
+            self.count += 1
+            return self.count - 1
+
+    def first(self) -> int:
+        # Number of the oldest sample still held
+        return max(self.count - self.capacity, 0)
+
+    def __len__(self) -> int:
+        return self.count - self.first()
+
+    def view(self, start: int, end: int | None = None) -> ndarray:
+        # Columns x samples view of samples numbered [start, end), clamped to those still held
+        with self.lock:
+            end = self.count if end is None else min(end, self.count)
+            start = min(max(start, self.count - self.capacity, 0), end)
+            slot = start % self.capacity
+            return self.data[:, slot:slot + end - start]
+
+    def last(self, n: int) -> ndarray:
+        return self.view(self.count - n)
+
+    def since(self, sample: int) -> tuple[int, ndarray]:
+        # Samples from sample onwards, and the number of the first one returned.
+        # The first is later than sample if the reader fell more than capacity samples behind.
+        with self.lock:
+            count = self.count
+        start = max(sample, count - self.capacity, 0)
+        return start, self.view(start, count)
+
+    def time_range(self, start_time: float, end_time: float | None = None) -> tuple[int, ndarray]:
+        # Samples received in [start_time, end_time), and the number of the first one, found by binary search
+        with self.lock:
+            count = self.count
+        first = max(count - self.capacity, 0)
+        slot = first % self.capacity
+        recv_times = self.data[0, slot:slot + count - first]
+        start = first + int(np.searchsorted(recv_times, start_time, "left"))
+        end = count if end_time is None else first + int(np.searchsorted(recv_times, end_time, "left"))
+        return start, self.view(start, end)
+
+    def column(self, samples: ndarray, name: str) -> ndarray:
+        # One field, or recv_time or send_time, of a view returned by the other methods
+        return samples[self.index[name]]
+
+    def latest(self, name: str) -> float:
+        # Latest value of a field, NaN before any samples
+        with self.lock:
+            if self.count == 0:
+                return np.nan
+            return float(self.data[self.index[name], (self.count - 1) % self.capacity])
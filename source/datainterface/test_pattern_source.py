@@ -0,0 +1,88 @@
+import argparse
+import sys
+import time
+from typing import Callable
+
+import av
+import numpy as np
+from numpy import ndarray
+
+from datainterface.timestamp_code import burn_timestamp
+
+
+def colour_bars(width: int, height: int) -> ndarray:
+    colours = np.array([[255, 255, 255], [0, 255, 255], [255, 255, 0], [0, 255, 0],
+                        [255, 0, 255], [0, 0, 255], [255, 0, 0], [0, 0, 0]], dtype=np.uint8)
+    columns = colours[np.arange(width) * len(colours) // width]
+    return np.ascontiguousarray(np.broadcast_to(columns, (height, width, 3)))
+
+
+def stream_test_pattern(addr: str, port: int, should_stop: Callable[[], bool],
+                        width: int = 1280, height: int = 720, framerate: int = 30,
+                        bitrate: int = 4000000, gop: int = 30, burn_timestamps: bool = True) -> None:
+    # Encodes scrolling colour bars to an MPEG-TS stream over UDP until should_stop() returns True.
+    # When burn_timestamps is set, each frame carries the time it was generated for latency measurement.
+    output = av.open(f"udp://{addr}:{port}?pkt_size=1316", "w", format="mpegts")
+    try:
+        stream = output.add_stream("libx264", rate=framerate)
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = "yuv420p"
+        stream.bit_rate = bitrate
+        stream.gop_size = gop
+        stream.options = {"preset": "ultrafast", "tune": "zerolatency"}
+
+        bars = colour_bars(width, height)
+        frame_period = 1 / framerate
+        next_frame = time.perf_counter()
+        frame_count = 0
+
+        while not should_stop():
+            image = np.roll(bars, frame_count * 4, axis=1)
+            if burn_timestamps:
+                burn_timestamp(image, time.time())
+
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            frame.pts = frame_count
+            for packet in stream.encode(frame):
+                output.mux(packet)
+            frame_count += 1
+
+            # Keep to the frame rate using absolute deadlines
+            next_frame += frame_period
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_frame = time.perf_counter()
+
+        for packet in stream.encode(None):
+            output.mux(packet)
+    except av.FFmpegError as e:
+        print(f"Test pattern stream to {addr}:{port} failed:", e, file=sys.stderr)
+    finally:
+        output.close()
+
+
+if __name__ == "__main__":
+    # Stands in for a camera when benchmarking the video pipeline without ROV hardware.
+    # Run from the source directory with: python -m datainterface.test_pattern_source --port <port>
+    parser = argparse.ArgumentParser(description="Stream a synthetic MPEG-TS test pattern over UDP")
+    parser.add_argument("--addr", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--framerate", type=int, default=30)
+    parser.add_argument("--bitrate", type=int, default=4000000)
+    parser.add_argument("--gop", type=int, default=30)
+    parser.add_argument("--duration", type=float, default=0, help="Seconds to stream for. 0 streams until killed")
+    parser.add_argument("--no-timestamps", action="store_true", help="Don't burn capture times into frames")
+    args = parser.parse_args()
+
+    end_time = time.time() + args.duration if args.duration > 0 else None
+    try:
+        stream_test_pattern(args.addr, args.port, lambda: end_time is not None and time.time() >= end_time,
+                            args.width, args.height, args.framerate, args.bitrate, args.gop,
+                            not args.no_timestamps)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,54 @@
+from numpy import ndarray
+
+# A row of black/white blocks burned into the top left of a test frame, encoding the time the frame was captured.
+# The code holds the capture time in milliseconds followed by a 4 bit checksum, most significant bit first.
+# Blocks are as large as the frame width allows, up to MAX_BLOCK_SIZE, so that they survive H.264 compression.
+
+TIME_BITS = 44
+CHECKSUM_BITS = 4
+CODE_BITS = TIME_BITS + CHECKSUM_BITS
+MAX_BLOCK_SIZE = 16
+MIN_BLOCK_SIZE = 4
+
+
+def _block_size(width: int) -> int:
+    return min(MAX_BLOCK_SIZE, width // CODE_BITS)
+
+
+def _checksum(value: int) -> int:
+    checksum = 0
+    while value:
+        checksum = (checksum + (value & 0xF)) & 0xF
+        value >>= 4
+    return checksum
+
+
+def burn_timestamp(frame: ndarray, timestamp: float) -> None:
+    value = int(timestamp * 1000) & ((1 << TIME_BITS) - 1)
+    code = (value << CHECKSUM_BITS) | _checksum(value)
+    block_size = _block_size(frame.shape[1])
+    for bit in range(CODE_BITS):
+        on = (code >> (CODE_BITS - 1 - bit)) & 1
+        frame[:block_size, bit * block_size:(bit + 1) * block_size] = 255 if on else 0
+
+
+def read_timestamp(frame: ndarray, source_width: int | None = None) -> float | None:
+    # Returns None if the frame doesn't carry a valid code.
+    # source_width is the width the code was burned in at, if the frame has since been scaled.
+    width = frame.shape[1]
+    source_width = source_width or width
+    source_block_size = _block_size(source_width)
+    block_size = source_block_size * width / source_width
+    if source_block_size < MIN_BLOCK_SIZE or block_size < 2 or frame.shape[0] < block_size:
+        return None
+    centre = int(block_size / 2)
+    samples = frame[centre, [int((bit + 0.5) * block_size) for bit in range(CODE_BITS)]]
+    bits = samples.mean(axis=-1) > 127 if samples.ndim > 1 else samples > 127
+
+    code = 0
+    for bit in bits:
+        code = (code << 1) | int(bit)
+    value = code >> CHECKSUM_BITS
+    if value == 0 or _checksum(value) != code & 0xF:
+        return None
+    return value / 1000
@@ -0,0 +1,42 @@
+import time
+from typing import Iterable
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+class UpdateCoalescer(QObject):
+    """
+        Collects the names of fields that changed and notifies at most once per interval, with every field that
+        changed since the last notification. The first change after a quiet period is notified straight away, so
+        coalescing only adds latency while updates arrive faster than the interval.
+        Lives in, and must be marked from, the thread of its parent.
+    """
+    updated = pyqtSignal(frozenset)  # Names of the fields that changed
+
+    def __init__(self, fps: float, parent: QObject | None = None):
+        super().__init__(parent)
+        self.interval = 1 / fps
+        self.dirty: set[str] = set()
+        self.last_notified = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        # Statistics
+        self.marked = 0  # Updates marked, each of which would have been a notification without coalescing
+        self.notified = 0
+
+    def mark(self, fields: Iterable[str]) -> None:
+        self.dirty.update(fields)
+        self.marked += 1
+        if self.dirty and not self.timer.isActive():
+            delay = self.last_notified + self.interval - time.perf_counter()
+            self.timer.start(max(round(delay * 1000), 0))
+
+    def flush(self) -> None:
+        if not self.dirty:
+            return
+        dirty, self.dirty = frozenset(self.dirty), set()
+        self.last_notified = time.perf_counter()
+        self.notified += 1
+        self.updated.emit(dirty)
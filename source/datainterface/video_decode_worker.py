@@ -0,0 +1,142 @@
+# Decodes a single video feed in its own process so that decoding does not contend for the UI process's GIL.
+# Launched by VideoRecv with: video_decode_worker.py <url> <feed index> <ring prefix> <slot count> <feed config>
+# where the feed config is the feed's entry of feed_config.json as JSON.
+# Decoded (and undistorted) frames are written to a SharedFrameRing and announced as records on stdout.
+# Anything printed by this process must go to stderr. The worker exits when its stdin is closed.
+# Lines written to stdin control recording: 'record <directory>' and 'stop'. 'full_size 0/1' switches decoding to full
+# size, and 'free <ring name> <slot>' returns a ring slot once the UI has copied its frame out.
+import json
+import math
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from threading import Thread
+
+source_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(source_dir)
+sys.path.insert(0, source_dir)
+
+import av
+
+from datainterface.frame_processing import decode_frame, undistort_fisheye, load_fisheye_calibration
+from datainterface.latency_stats import FrameTiming
+from datainterface.timestamp_code import read_timestamp
+from datainterface.video_recorder import VideoRecorder
+from datainterface.shared_frame_ring import SharedFrameRing, ring_name, RECORD_FORMAT, RECORD_FRAME, RECORD_RING, \
+    RECORD_CONNECT, RECORD_DISCONNECT
+
+
+recorder: VideoRecorder | None = None
+ring: SharedFrameRing | None = None
+
+
+def watch_parent(feed_index: int, feed_config: dict) -> None:
+    global recorder
+    # stdin is a pipe from the UI process, it reaches EOF when the UI closes or dies
+    for line in sys.stdin:
+        command, _, argument = line.strip().partition(" ")
+        if recorder is not None and command in ("record", "stop"):
+            old_recorder, recorder = recorder, None
+            old_recorder.stop()
+        if command == "record":
+            recorder = VideoRecorder(Path(argument), feed_index)
+        elif command == "full_size":
+            # Read by decode_frame for each frame
+            feed_config["full_size"] = argument == "1"
+        elif command == "free":
+            name, _, slot = argument.partition(" ")
+            # Slots of replaced rings are never written again
+            current_ring = ring
+            if current_ring is not None and current_ring.name == name:
+                current_ring.release(int(slot))
+
+    if recorder is not None:
+        # Exiting would lose what's still queued
+        recorder.stop(5)
+    # The shared memory resource tracker unlinks the ring once this process has exited
+    os._exit(0)
+
+
+def send_record(kind: int, slot: int = 0, height: int = 0, width: int = 0, seq: int = 0,
+                timing: FrameTiming | None = None) -> None:
+    if timing is None:
+        timing = FrameTiming(time.time(), time.time())
+    sys.stdout.buffer.write(struct.pack(RECORD_FORMAT, kind, slot, height, width, seq, timing.arrival, timing.decoded,
+                                        math.nan if timing.pts is None else timing.pts,
+                                        math.nan if timing.capture is None else timing.capture, timing.full_size))
+    sys.stdout.buffer.flush()
+
+
+def main(url: str, feed_index: int, prefix: str, slot_count: int, feed_config: dict) -> None:
+    global ring
+    if feed_config["type"] == "fisheye":
+        load_fisheye_calibration(feed_config)
+    latency_test = feed_config.get("latency_test", False)
+
+    generation = 0
+    seq = 0
+
+    try:
+        while True:
+            connected = False
+            try:
+                with av.open(url, format="mpegts", timeout=10) as container:
+                    stream = container.streams.video[0]
+                    for packet in container.demux(stream):
+                        arrival = time.time()
+                        active_recorder = recorder
+                        if active_recorder is not None:
+                            active_recorder.submit(packet, stream)
+
+                        for frame in packet.decode():
+                            if not connected:
+                                connected = True
+                                send_record(RECORD_CONNECT)
+
+                            timing = FrameTiming(arrival, pts=frame.time)
+                            source_width, source_height = frame.width, frame.height
+                            frame = decode_frame(frame, feed_config)
+                            timing.decoded = time.time()
+                            timing.full_size = frame.shape[:2] == (source_height, source_width)
+                            if latency_test:
+                                timing.capture = read_timestamp(frame, source_width)
+                            if feed_config["type"] == "fisheye":
+                                frame = undistort_fisheye(frame, feed_config)
+
+                            # (Re)create the ring if the stream's resolution no longer fits
+                            if ring is None or not ring.fits(frame):
+                                if ring is not None:
+                                    ring.close()
+                                generation += 1
+                                height, width = frame.shape[:2]
+                                ring = SharedFrameRing(ring_name(prefix, generation), slot_count, height, width,
+                                                       create=True)
+                                send_record(RECORD_RING, slot_count, height, width, generation)
+
+                            slot = ring.write(frame)
+                            if slot is None:
+                                # The UI is behind and still holds every slot, so it misses this frame
+                                continue
+                            seq += 1
+                            send_record(RECORD_FRAME, slot, frame.shape[0], frame.shape[1], seq, timing)
+            except (OSError, av.ExitError):
+                time.sleep(0.5)
+            except av.InvalidDataError as e:
+                print("Invalid Data Error:", e, file=sys.stderr)
+                time.sleep(1)
+            if connected:
+                send_record(RECORD_DISCONNECT)
+    finally:
+        if ring is not None:
+            ring.close()
+
+
+if __name__ == "__main__":
+    worker_feed_config = json.loads(sys.argv[5])
+    Thread(target=watch_parent, args=(int(sys.argv[2]), worker_feed_config), daemon=True).start()
+    try:
+        main(sys.argv[1], int(sys.argv[2]), sys.argv[3], int(sys.argv[4]), worker_feed_config)
+    except BrokenPipeError:
+        pass
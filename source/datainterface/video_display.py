@@ -1,9 +1,12 @@
 import sys
+import time
+from dataclasses import replace
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, Qt
 from PyQt6.QtGui import QPixmap, QPainter, QFont, QColor
 from PyQt6.QtWidgets import QLabel
 
+from datainterface.latency_stats import FrameTiming
 from datainterface.video_frame import VideoFrame
 
 import typing
@@ -13,18 +16,22 @@ if typing.TYPE_CHECKING:
 
 # This class is used to generate a pixmap for a given UI label.
 # The UI can connect to the pixmap_ready signal to update the pixmap displayed on a label.
+# Rendering is driven by a RenderScheduler; new frames only mark the display as pending.
 
 pitch_yaw_overlay_font = QFont("Helvetica", 12)
 depth_font = QFont("Helvetica", 10)
+latency_font = QFont("Helvetica", 9)
 pixel_depth_spacing = 100
 overlay_colour = QColor(255, 255, 255)
+VISIBILITY_POLL_MS = 100  # How often the UI thread refreshes each label's visibility and size
 
 
 class VideoDisplay(QObject):
-    pixmap_ready = pyqtSignal(QPixmap)
+    pixmap_ready = pyqtSignal(QPixmap, object)  # Pixmap, and the FrameTiming of its frame or None
     on_disconnect = pyqtSignal()
 
-    def __init__(self, label: QLabel, frame_index, app: "App" = None, overlay=False, vertical_aov=90):
+    def __init__(self, label: QLabel, frame_index, app: "App" = None, overlay=False, vertical_aov=90,
+                 show_latency=False):
         self.label = label
         self.frame_index = frame_index
         self.camera_feed: VideoFrame | None = None
@@ -35,8 +42,25 @@ class VideoDisplay(QObject):
         self.depth_pixmap = QPixmap("datainterface/depthIndicator.png")
         self.vertical_aov = vertical_aov
 
+        # Set from the decode thread when a new frame arrives. Cleared by the RenderScheduler once drawn.
+        self.frame_pending = False
+        self.frames_received = 0
+        self.frames_rendered = 0
+
+        self.show_latency = show_latency
+
         super().__init__()
 
+        # Widgets may only be touched on the UI thread, so their visibility and size are copied into plain
+        # attributes there, for the video handler thread to read. The timer belongs to the label, so it stays
+        # on the UI thread when the display is moved, and the direct connection runs there too.
+        self.visible = False
+        self.label_size = (label.width(), label.height())
+        self.visibility_timer = QTimer(label)
+        self.visibility_timer.timeout.connect(self.update_visibility, Qt.ConnectionType.DirectConnection)
+        self.visibility_timer.start(VISIBILITY_POLL_MS)
+        self.update_visibility()
+
     def attach_camera_feed(self) -> None:
         camera_frame_count = len(self.app.data_interface.camera_frames)
         if self.frame_index >= camera_frame_count:
@@ -46,12 +70,57 @@ class VideoDisplay(QObject):
         camera_feed = self.app.data_interface.camera_frames[self.frame_index]
         # Remove any old connections to the new frame signal if reattaching camera feed
         if self.camera_feed:
-            self.camera_feed.new_frame.disconnect(self.update_frame)
+            self.camera_feed.new_frame.disconnect(self.on_new_frame)
         self.camera_feed = camera_feed
-        # Create a new connection to the current camera feed when a new frame is available.
-        self.camera_feed.new_frame.connect(self.update_frame)
+        # Direct connection so that flagging a new frame doesn't queue an event per decoded frame
+        self.camera_feed.new_frame.connect(self.on_new_frame, Qt.ConnectionType.DirectConnection)
         self.on_disconnect.emit()
 
+    def on_new_frame(self) -> None:
+        self.frames_received += 1
+        self.frame_pending = True
+
+    def update_visibility(self) -> None:
+        # Must be called from the UI thread.
+        # Labels of windows not at the top of the Dock are hidden, as are those in minimised windows
+        self.visible = self.label.isVisible() and not self.label.window().isMinimized()
+        self.label_size = (self.label.width(), self.label.height())
+
+    def is_visible(self) -> bool:
+        # Safe from any thread
+        return self.visible
+
+    def show_pixmap(self, pixmap: QPixmap, timing: FrameTiming | None = None) -> None:
+        # Must be called from the UI thread
+        self.label.setPixmap(pixmap)
+        if timing is not None and self.camera_feed is not None:
+            self.camera_feed.latency.record_frame(timing, time.time())
+
+    def draw_latency(self, painter: QPainter, h: int) -> None:
+        latency = self.camera_feed.latency
+        histograms = latency.histograms
+        stages = ["decode", "process", "render", "paint", "total"]
+        if histograms["glass_to_glass"].count:
+            stages.append("glass_to_glass")
+
+        painter.setPen(overlay_colour)
+        painter.setFont(latency_font)
+        y = h - 20 - 14 * len(stages)
+        for stage in stages:
+            histogram = histograms[stage]
+            painter.drawText(10, y, f"{stage.replace('_', ' ')}: {histogram.last_ms:5.1f} ms "
+                                    f"(p50 {histogram.percentile(50):.0f}, p95 {histogram.percentile(95):.0f})")
+            y += 14
+
+        # Histogram of the most complete latency measurement available
+        histogram = histograms[stages[-1]]
+        peak = max(histogram.counts)
+        if peak:
+            base_y = h - 30 - 14 * len(stages)
+            for i, count in enumerate(histogram.counts):
+                bar_h = 40 * count // peak
+                painter.fillRect(10 + i, base_y - bar_h, 1, bar_h, overlay_colour)
+
     def update_frame(self) -> None:
 
         if self.camera_feed is None:
@@ -59,16 +128,17 @@ class VideoDisplay(QObject):
         # Wait until VideoFrame is free
         with self.camera_feed.lock:
             frame = self.camera_feed.frame
+            timing = self.camera_feed.timing
             if frame is not None:
                 # Generate the pixmap that will put onto a label
-                rect = self.label.geometry()
+                width, height = self.label_size
                 pixmap = QPixmap(frame.copy())
                 # Ensure image fits available space as best as possible.
 
-                if rect.width() > rect.height():
-                    pixmap = pixmap.scaledToWidth(rect.width())
+                if width > height:
+                    pixmap = pixmap.scaledToWidth(width)
                 else:
-                    pixmap = pixmap.scaledToHeight(rect.height())
+                    pixmap = pixmap.scaledToHeight(height)
 
                 if self.overlay:
                     w, h = pixmap.width(), pixmap.height()
@@ -110,6 +180,13 @@ class VideoDisplay(QObject):
                     painter.drawText(w // 2 - 100, h // 2 + 50, f"{self.app.data_interface.attitude.x:.1f}°")
                     painter.drawText(w // 2 + 100, h // 2 + 50, f"{self.app.data_interface.attitude.y:.1f}°")
 
+                    # Range to whatever is in the centre of the view, for stereo cameras with a depth engine
+                    depth_engine = self.app.data_interface.depth_engines.get(self.frame_index)
+                    if depth_engine is not None:
+                        distance = depth_engine.distance_at(0.5, 0.5)
+                        if distance is not None:
+                            painter.drawText(w // 2 - 20, h // 2 + 80, f"{distance:.2f} m")
+
                     painter.restore()
 
                     painter.save()
@@ -131,8 +208,17 @@ class VideoDisplay(QObject):
 
                     painter.end()
 
-                # Emit signal so that a connected label can update their pixmap.
-                self.pixmap_ready.emit(pixmap)
+                if self.show_latency:
+                    painter = QPainter(pixmap)
+                    self.draw_latency(painter, pixmap.height())
+                    painter.end()
+
+                # Emit signal so that a connected label can update their pixmap. The timing travels with the
+                # pixmap, so it's recorded against the frame shown even if later frames are rendered before then.
+                if timing is not None:
+                    timing = replace(timing, rendered=time.time())
+                self.frames_rendered += 1
+                self.pixmap_ready.emit(pixmap, timing)
             else:
                 # Video feed has disconnected if frame is None
                 self.on_disconnect.emit()
@@ -3,6 +3,8 @@ from threading import Lock
 from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtGui import QImage
 
+from datainterface.latency_stats import FrameTiming, FeedLatency
+
 
 # A simple class that allows frame data to be locked to a single process
 # A new frame is ready when the new_frame signal is raised
@@ -11,5 +13,7 @@ class VideoFrame(QObject):
 
     def __init__(self):
         self.frame: QImage | None = None
+        self.timing: FrameTiming | None = None  # Timings of the frame currently held
+        self.latency = FeedLatency()  # Live latency histograms for frames from this camera
         self.lock = Lock()
         super().__init__()
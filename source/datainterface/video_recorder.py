@@ -0,0 +1,147 @@
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Thread, Event
+from typing import Callable
+
+import av
+from av.video.stream import VideoStream
+
+recordings_path = Path(os.getcwd()) / "Dive_Recordings"
+
+CONTAINER_EXTENSIONS = {
+    "mpegts": "ts",
+    "matroska": "mkv"
+}
+
+
+def new_dive_directory() -> Path:
+    directory = recordings_path / datetime.now().isoformat(timespec="seconds").replace(":", "-")
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+class VideoRecorder:
+    """
+        Archives a camera feed by remuxing its demuxed packets into segmented files, without re-encoding.
+        Packets are handed over with submit() and written on a background thread through a bounded queue.
+        If the queue is full, packets are dropped until the next keyframe so that segments stay decodable.
+        Each segment has a sidecar index mapping every packet's PTS to the wall-clock time it was received and
+        the telemetry sample that was current at that time.
+        Stopping only signals the writer thread, which finishes writing what is queued and closes the segment in
+        the background, so the UI thread stopping a recording never waits on the disk.
+    """
+
+    def __init__(self, directory: Path, feed_index: int,
+                 get_telemetry_sample: Callable[[], int] | None = None,
+                 segment_seconds: float = 60,
+                 queue_size: int = 512,
+                 container_format: str = "mpegts"):
+        if container_format not in CONTAINER_EXTENSIONS:
+            raise ValueError(f"Video recordings must be one of {list(CONTAINER_EXTENSIONS)}")
+        self.directory = directory
+        self.feed_index = feed_index
+        self.get_telemetry_sample = get_telemetry_sample
+        self.segment_seconds = segment_seconds
+        self.container_format = container_format
+
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.resync = True  # Wait for a keyframe before queueing packets
+        self.submitted_stream: VideoStream | None = None
+        self.template: VideoStream | None = None
+        self.stopping = Event()
+
+        # Statistics
+        self.packets_written = 0
+        self.packets_dropped = 0
+        self.bytes_written = 0
+        self.segment_count = 0
+
+        self.thread = Thread(target=self.write_packets, daemon=True)
+        self.thread.start()
+
+    def submit(self, packet: av.Packet, stream: VideoStream) -> None:
+        # Called from the decode thread, so this only copies the packet's data out and queues it
+        if packet.size == 0 or packet.pts is None or self.stopping.is_set():
+            return
+        # A reconnected feed starts a new segment, which has to begin on a keyframe
+        if stream is not self.submitted_stream:
+            self.submitted_stream = stream
+            self.resync = True
+        if self.resync:
+            if not packet.is_keyframe:
+                return
+            self.resync = False
+        try:
+            telemetry_sample = self.get_telemetry_sample() if self.get_telemetry_sample else ""
+            self.queue.put_nowait((stream, bytes(packet), packet.pts, packet.dts, packet.time_base,
+                                   packet.is_keyframe, time.time(), telemetry_sample))
+        except queue.Full:
+            self.packets_dropped += 1
+            self.resync = True
+
+    def stop(self, timeout: float = 0) -> None:
+        # Waits up to timeout for the queued packets to be written, which only closing the app should do
+        self.stopping.set()
+        if timeout > 0:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                print(f"Video recorder for feed {self.feed_index} could not be stopped cleanly", file=sys.stderr)
+
+    def segment_path(self) -> Path:
+        return self.directory / (f"feed_{self.feed_index}_{self.segment_count:04}."
+                                 f"{CONTAINER_EXTENSIONS[self.container_format]}")
+
+    def write_packets(self) -> None:
+        output = None
+        out_stream = None
+        index_file = None
+        segment_start = 0
+
+        try:
+            while True:
+                try:
+                    item = self.queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self.stopping.is_set():
+                        break
+                    continue
+                stream, data, pts, dts, time_base, is_keyframe, wall_time, telemetry_sample = item
+
+                # Start a new segment on a keyframe once the current one is long enough, or if the stream changed
+                rotate = output is None or stream is not self.template or (
+                        is_keyframe and wall_time - segment_start >= self.segment_seconds)
+                if rotate:
+                    if output is not None:
+                        output.close()
+                        index_file.close()
+                    self.segment_count += 1
+                    path = self.segment_path()
+                    output = av.open(str(path), "w", format=self.container_format)
+                    out_stream = output.add_stream_from_template(stream)
+                    index_file = open(path.with_suffix(".index.csv"), "w")
+                    index_file.write("pts,dts,pts_seconds,keyframe,wall_time,telemetry_sample\n")
+                    self.template = stream
+                    segment_start = wall_time
+
+                packet = av.Packet(data)
+                packet.pts = pts
+                packet.dts = dts
+                packet.time_base = time_base
+                packet.is_keyframe = is_keyframe
+                packet.stream = out_stream
+                output.mux(packet)
+
+                index_file.write(f"{pts},{dts},{float(pts * time_base):.6f},{int(is_keyframe)},"
+                                 f"{wall_time:.6f},{telemetry_sample}\n")
+                self.packets_written += 1
+                self.bytes_written += len(data)
+        except Exception as e:
+            print(f"Video recording of feed {self.feed_index} failed:", e, file=sys.stderr)
+        finally:
+            if output is not None:
+                output.close()
+                index_file.close()
@@ -1,14 +1,26 @@
+import math
+import os
+import struct
+from pathlib import Path
+import subprocess
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 
-from threading import Thread
+from threading import Thread, Lock
 import av
 import json
 import sys
 from numpy import ndarray
 
+from datainterface.frame_processing import decode_frame, feed_settings
+from datainterface.latency_stats import FrameTiming
+from datainterface.timestamp_code import read_timestamp
+from datainterface.video_recorder import VideoRecorder
+from datainterface.shared_frame_ring import SharedFrameRing, ring_name, RECORD_FORMAT, RECORD_SIZE, RECORD_FRAME, \
+    RECORD_RING, RECORD_CONNECT, RECORD_DISCONNECT
+
 if TYPE_CHECKING:
     from app import App
 
@@ -22,59 +34,206 @@ except json.decoder.JSONDecodeError:
     print("Malformed feed_config.json file", file=sys.stderr)
     exit(1)
 
+RING_SLOT_COUNT = 4
+
 
 # A new class for the new, improved and simplified camera system!
 class VideoRecv(QObject):
-    on_recv = pyqtSignal(ndarray)
+    on_recv = pyqtSignal(ndarray, FrameTiming)
     on_connect = pyqtSignal()
     on_disconnect = pyqtSignal()
 
-    def __init__(self, app: "App", addr: str, port: int, i: int):
+    def __init__(self, app: "App", addr: str, port: int, i: int, use_process: bool = False):
         print(f"Creating a Camera Receiver: {addr=} {port=}")
 
         super().__init__()
 
-        def recv():
-            while not app.closing:
-                time.sleep(0)
-                connected = False
-                try:
-                    with av.open(f"udp://{addr}:{port}?timeout=5000&buffer_size=2097152",
-                                 format="mpegts",
-                                 timeout=10) as container:
-                        if app.closing:
-                            continue
-                        for frame in container.decode(video=0):
-                            if app.closing:
-                                break
+        self.app = app
+        self.url = f"udp://{addr}:{port}?timeout=5000&buffer_size=2097152"
+        self.feed_index = i
+        self.feed_config = app.feed_config[str(i)]
+        # Latency test feeds carry their capture time burned into each frame
+        self.latency_test = self.feed_config.get("latency_test", False)
 
-                            if not connected:
-                                connected = True
-                                self.on_connect.emit()
+        # When decoding in a worker process, frames arrive already undistorted, through shared memory
+        self.use_process = use_process
+        self.preprocessed = use_process
+        self.worker: subprocess.Popen | None = None
+        self.rings: list[SharedFrameRing] = []
 
-                            frame = frame.to_ndarray(format="bgr24")
+        self.recorder: VideoRecorder | None = None
+        self.recording_directory: Path | None = None
 
-                            self.on_recv.emit(frame)
-                except (OSError, av.ExitError) as e:
-                    time.sleep(0.5)
-                except av.InvalidDataError as e:
-                    print("Invalid Data Error:", e, file=sys.stderr)
-                    time.sleep(1)
-                if connected:
-                    self.on_disconnect.emit()
+        # Consumers currently needing frames at full resolution rather than display size
+        self.full_size_requests = 0
+        self.full_size_lock = Lock()
 
-        self.thread = Thread(target=recv)
+        self.thread = Thread(target=self.recv_from_worker if use_process else self.recv)
         self.thread.start()
 
         # Place this object in a QThread so that it's signals are not processed by another Thread
         self.thread_container = QThread()
         self.moveToThread(self.thread_container)
 
+    def recv(self) -> None:
+        feed_config = self.feed_config
+        while not self.app.closing:
+            time.sleep(0)
+            connected = False
+            try:
+                with av.open(self.url, format="mpegts", timeout=10) as container:
+                    if self.app.closing:
+                        continue
+                    stream = container.streams.video[0]
+                    for packet in container.demux(stream):
+                        if self.app.closing:
+                            break
+                        arrival = time.time()
+
+                        # Tee the undecoded packet to the recorder before decoding it
+                        recorder = self.recorder
+                        if recorder is not None:
+                            recorder.submit(packet, stream)
+
+                        for frame in packet.decode():
+                            if not connected:
+                                connected = True
+                                self.on_connect.emit()
+
+                            timing = FrameTiming(arrival, pts=frame.time)
+                            source_width, source_height = frame.width, frame.height
+                            frame = decode_frame(frame, feed_config)
+                            timing.decoded = time.time()
+                            timing.full_size = frame.shape[:2] == (source_height, source_width)
+                            if self.latency_test:
+                                timing.capture = read_timestamp(frame, source_width)
+
+                            self.on_recv.emit(frame, timing)
+            except (OSError, av.ExitError) as e:
+                time.sleep(0.5)
+            except av.InvalidDataError as e:
+                print("Invalid Data Error:", e, file=sys.stderr)
+                time.sleep(1)
+            if connected:
+                self.on_disconnect.emit()
+
+    def recv_from_worker(self) -> None:
+        restarts = 0
+        while not self.app.closing:
+            connected = False
+            # Each worker gets its own ring names in case a killed worker left its rings behind
+            prefix = f"rov_feed_{self.feed_index}_{os.getpid()}_{restarts}"
+            worker = subprocess.Popen([sys.executable, os.path.join("datainterface", "video_decode_worker.py"),
+                                       self.url, str(self.feed_index), prefix, str(RING_SLOT_COUNT),
+                                       json.dumps(feed_settings(self.feed_config))],
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self.worker = worker
+            if self.recording_directory is not None:
+                self.send_worker_command(f"record {self.recording_directory}")
+            try:
+                # Blocks until the worker announces something, so no time is spent polling
+                while not self.app.closing:
+                    record = worker.stdout.read(RECORD_SIZE)
+                    if len(record) < RECORD_SIZE:
+                        break
+                    kind, slot, height, width, seq, arrival, decoded, pts, capture, full_size = \
+                        struct.unpack(RECORD_FORMAT, record)
+
+                    if kind == RECORD_FRAME:
+                        timing = FrameTiming(arrival, decoded,
+                                             pts=None if math.isnan(pts) else pts,
+                                             capture=None if math.isnan(capture) else capture, full_size=full_size)
+                        # Copied out, then freed for the worker to reuse. The worker never writes a slot until it's
+                        # freed, so the UI must never hold a view of it.
+                        ring = self.rings[-1]
+                        frame = ring.view(slot, height, width).copy()
+                        self.send_worker_command(f"free {ring.name} {slot}")
+                        self.on_recv.emit(frame, timing)
+                    elif kind == RECORD_RING:
+                        self.rings.append(SharedFrameRing(ring_name(prefix, seq), slot, height, width))
+                        self.release_old_rings()
+                    elif kind == RECORD_CONNECT:
+                        connected = True
+                        self.on_connect.emit()
+                    elif kind == RECORD_DISCONNECT:
+                        connected = False
+                        self.on_disconnect.emit()
+            except OSError as e:
+                print(f"Video decode worker for feed {self.feed_index} failed:", e, file=sys.stderr)
+            if connected:
+                self.on_disconnect.emit()
+            self.stop_worker()
+            if not self.app.closing:
+                print(f"Restarting video decode worker for feed {self.feed_index}", file=sys.stderr)
+                restarts += 1
+                time.sleep(1)
+        self.release_old_rings(keep_latest=False)
+
+    def release_old_rings(self, keep_latest: bool = True) -> None:
+        # Rings still referenced by a frame being copied can't be closed yet, they are retried on the next call
+        old_rings = self.rings[:-1] if keep_latest else self.rings
+        for ring in old_rings:
+            if ring.close():
+                self.rings.remove(ring)
+
+    def send_worker_command(self, command: str) -> None:
+        worker = self.worker
+        if worker is None:
+            return
+        try:
+            worker.stdin.write(f"{command}\n".encode())
+            worker.stdin.flush()
+        except OSError as e:
+            print(f"Could not send '{command}' to video decode worker {self.feed_index}:", e, file=sys.stderr)
+
+    def request_full_size(self, enabled: bool) -> bool:
+        # Counted, so frames stay full size until every consumer that asked has finished.
+        # Returns whether frames are normally decoded smaller, in which case the caller should wait for a new frame.
+        with self.full_size_lock:
+            self.full_size_requests = max(self.full_size_requests + (1 if enabled else -1), 0)
+            full_size = self.full_size_requests > 0
+            # The decode thread reads the feed config for every frame, a worker is told
+            self.feed_config["full_size"] = full_size
+            self.send_worker_command(f"full_size {int(full_size)}")
+        return bool(self.feed_config.get("display_sizes"))
+
+    def start_recording(self, directory: Path, get_telemetry_sample: Callable[[], int] | None = None) -> None:
+        self.stop_recording()
+        self.recording_directory = directory
+        if self.use_process:
+            # Packets are demuxed in the worker, so it does the recording
+            self.send_worker_command(f"record {directory}")
+        else:
+            self.recorder = VideoRecorder(directory, self.feed_index, get_telemetry_sample)
+
+    def stop_recording(self, timeout: float = 0) -> None:
+        # Returns straight away unless given a timeout to wait for the recording to be written
+        self.recording_directory = None
+        if self.use_process:
+            self.send_worker_command("stop")
+        elif self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.stop(timeout)
+
+    def stop_worker(self) -> None:
+        worker, self.worker = self.worker, None
+        if worker is None:
+            return
+        try:
+            worker.stdin.close()
+            worker.terminate()
+            worker.wait(5)
+        except (OSError, subprocess.TimeoutExpired):
+            worker.kill()
+
     def start(self):
         self.thread_container.start()
 
     # Used to join the receiver to the main thread.
     def wait(self, timeout: int = 10):
+        self.stop_recording(5)
+        # Unblocks recv_from_worker, which is waiting on the worker's output
+        self.stop_worker()
         self.thread_container.wait(timeout)
 
     def is_connected(self):
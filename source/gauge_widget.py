@@ -0,0 +1,102 @@
+from PyQt6.QtCore import QRectF, QSize, Qt
+from PyQt6.QtGui import QColor, QFont, QPainter, QPaintEvent, QPen
+from PyQt6.QtWidgets import QWidget
+
+
+class GaugeWidget(QWidget):
+    """
+        A circular gauge painted straight from a number, for readouts such as pressure, temperature, depth and
+        actuator power. The arc fills clockwise from the bottom left over sweep degrees as the value goes from
+        minimum to maximum. The value and, optionally, its percentage of the range are written in the middle.
+        Setting the value only schedules a repaint, and only when what is shown would change.
+    """
+
+    def __init__(self, parent: QWidget | None = None, minimum: float = 0, maximum: float = 100, units: str = "",
+                 decimals: int = 0, show_percent: bool = False, sweep: float = 330, thickness: float = 0.08,
+                 fill_colour: QColor = QColor(85, 255, 255), track_colour: QColor = QColor(0, 0, 124),
+                 face_colour: QColor = QColor(0, 0, 127), rim_colour: QColor = QColor(0, 0, 255),
+                 text_colour: QColor | None = None, font_size: int = 12):
+        super().__init__(parent)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.units = units
+        self.decimals = decimals
+        self.show_percent = show_percent
+        self.sweep = sweep
+        self.thickness = thickness  # Width of the arc as a fraction of the gauge's diameter
+        self.fill_colour = fill_colour
+        self.track_colour = track_colour
+        self.face_colour = face_colour
+        self.rim_colour = rim_colour
+        self.text_colour = text_colour  # The palette's text colour if None
+        self.text_font = QFont()
+        self.text_font.setPointSize(font_size)
+
+        self.value: float | None = None
+        self.shown: tuple[str, int] = ("", 0)  # Text and arc length (1/16ths of a degree) last painted
+
+    def sizeHint(self) -> QSize:
+        return QSize(118, 118)
+
+    def set_value(self, value: float | None) -> None:
+        # None shows the gauge empty with no value, as when disconnected
+        self.value = value
+        shown = (self.text(), self.span())
+        if shown != self.shown:
+            self.shown = shown
+            self.update()
+
+    def set_range(self, minimum: float, maximum: float) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.set_value(self.value)
+
+    def fraction(self) -> float:
+        # Fraction of the range the value is at, clamped to the range
+        if self.value is None or self.maximum == self.minimum:
+            return 0
+        return min(max((self.value - self.minimum) / (self.maximum - self.minimum), 0), 1)
+
+    def span(self) -> int:
+        # Clockwise arc length in 1/16ths of a degree, as QPainter.drawArc takes it
+        return -round(self.fraction() * self.sweep * 16)
+
+    def text(self) -> str:
+        if self.value is None:
+            return "--"
+        text = f"{self.value:.{self.decimals}f}{self.units}"
+        if self.show_percent:
+            text += f"\n{round(self.fraction() * 100)}%"
+        return text
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        size = min(self.width(), self.height())
+        outer = QRectF((self.width() - size) / 2, (self.height() - size) / 2, size, size)
+        pen_width = size * self.thickness
+        # The arc is drawn along the middle of its pen, inset from the rim
+        arc = outer.adjusted(pen_width * 1.5, pen_width * 1.5, -pen_width * 1.5, -pen_width * 1.5)
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.rim_colour)
+        painter.drawEllipse(outer)
+        painter.setBrush(self.face_colour)
+        painter.drawEllipse(outer.adjusted(pen_width, pen_width, -pen_width, -pen_width))
+
+        # Start at the bottom, offset left by half the gap the sweep leaves
+        start = round((270 - (360 - self.sweep) / 2) * 16)
+        pen = QPen(self.track_colour, pen_width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.FlatCap)
+        painter.setPen(pen)
+        painter.drawArc(arc, start, -round(self.sweep * 16))
+        span = self.span()
+        if span:
+            pen.setColor(self.fill_colour)
+            painter.setPen(pen)
+            painter.drawArc(arc, start, span)
+
+        painter.setPen(self.text_colour if self.text_colour is not None else self.palette().windowText().color())
+        painter.setFont(self.text_font)
+        painter.drawText(outer, Qt.AlignmentFlag.AlignCenter, self.text())
+        painter.end()
@@ -1,6 +1,7 @@
 import os
 import time
 from pathlib import Path
+from typing import Callable, Mapping
 
 import numpy as np
 import pandas as pd
@@ -10,9 +11,11 @@ from matplotlib.figure import Figure
 
 
 class GraphWidget(QWidget):
-    def __init__(self, data_frame: pd.DataFrame, labels: [str], is_3d: bool, is_live: bool, title: str,
+    def __init__(self, data_frame: pd.DataFrame | Callable[[], Mapping[str, np.ndarray]], labels: [str], is_3d: bool,
+                 is_live: bool, title: str,
                  recording_update_signal=None,
                  recording_end_signal=None):
+        # Live graphs are given a function returning the recording's latest columns, rather than a data frame
         super().__init__()
         self.data_frame = data_frame
         self.labels = labels
@@ -50,7 +53,9 @@ class GraphWidget(QWidget):
         else:
             axis = figure.add_subplot(111)
 
-        axes = [np.array(self.data_frame[label].values) for label in self.labels]
+        columns = self.data_frame() if callable(self.data_frame) else self.data_frame
+        # Copied, as live columns are views of the telemetry history
+        axes = [np.array(columns[label]) for label in self.labels]
 
         for i, label in enumerate(self.labels):
             if label == "Time":
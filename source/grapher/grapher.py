@@ -1,10 +1,8 @@
 import math
 import os
-import pickle
 import sys
 import shutil
 import time
-from datetime import datetime
 from pathlib import Path
 
 import cv2
@@ -15,18 +13,19 @@ from PyQt6.QtMultimediaWidgets import QGraphicsVideoItem
 
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QPushButton, QLineEdit, QMessageBox, QLabel, QTabWidget, \
     QFileDialog, QProgressBar, QTableWidget, QTableWidgetItem, QGraphicsView, QGraphicsScene, QFrame, QInputDialog, \
-    QCheckBox, QComboBox
+    QCheckBox, QComboBox, QSpinBox, QDoubleSpinBox
 from PyQt6.QtGui import QIcon
 from PyQt6.QtMultimedia import QMediaPlayer
 
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 
+from datainterface.snapshot_service import SnapshotService, load_sidecars
+from datainterface.telemetry_history import telemetry_fields, pretty_field
 from grapher.graph_widget import GraphWidget
 from grapher.photo_sphere_viewer import PhotosphereViewer
 from multi_select_widget import MultiSelectWidget
 from rov_float_data_structures.float_data import FloatData
 from rov_float_data_structures.rov_data import ROVData
-from data_classes.vector3 import Vector3 as Vector3
 from grapher.graphGenerator import GraphGenerator
 
 from graphing_task import GraphingTask
@@ -122,8 +121,9 @@ class Grapher(Window):
 
         self.is_recording = False
         self.recording_file_path = ""
-        self.recording_dataframe: pd.DataFrame = None
         self.fields_to_record = []
+        self.recording_start_sample = 0  # Telemetry sample numbers of the recording's first and next unwritten sample
+        self.next_recorded_sample = 0
         self.recording_timer = QTimer()
         self.recording_timer.timeout.connect(self.record_fields)
         self.recordings_path = Path(os.getcwd()) / "Recordings"
@@ -137,26 +137,8 @@ class Grapher(Window):
         self.watcher.addPath(str(self.recordings_path))
         self.watcher.directoryChanged.connect(self.on_recording_directory_changed)
 
-        fields = []
-        rov_data_obj = ROVData()
-        for attr in rov_data_obj.__dict__:
-            val = getattr(rov_data_obj, attr)
-            if type(val) is Vector3:
-                fields.append(attr + ".x")
-                fields.append(attr + ".y")
-                fields.append(attr + ".z")
-            else:
-                fields.append(attr)
-
-        float_data_obj = FloatData()
-        for attr in float_data_obj.__dict__:
-            val = getattr(float_data_obj, attr)
-            if type(val) == Vector3:
-                fields.append(attr + ".x")
-                fields.append(attr + ".y")
-                fields.append(attr + ".z")
-            else:
-                fields.append(attr)
+        # Recordings read from the DataInterface's telemetry history, which holds these fields
+        fields = telemetry_fields(ROVData()) + telemetry_fields(FloatData())
 
         self.RecordedFields = MultiSelectWidget()
         self.RecordedFieldsContainer.layout().addWidget(self.RecordedFields)
@@ -165,9 +147,8 @@ class Grapher(Window):
         self.recordable_fields = {}
 
         for field in fields:
-            pretty_field = field.replace("_", " ").replace(".", " ").title()
-            self.recordable_fields[pretty_field] = field
-            self.RecordedFields.add_item(pretty_field, field)
+            self.recordable_fields[pretty_field(field)] = field
+            self.RecordedFields.add_item(pretty_field(field), field)
 
         # eDNA Attributes
         self.eDNA_database = None
@@ -238,6 +219,11 @@ class Grapher(Window):
         self.PhotospherePicture: QPushButton = self.findChild(QPushButton, "PhotospherePicture")
         self.PhotospherePicture.clicked.connect(self.take_picture)
 
+        # Number of pictures taken per click, and how many per second
+        self.PhotosphereBurstCount: QSpinBox = self.findChild(QSpinBox, "PhotosphereBurstCount")
+        self.PhotosphereBurstRate: QDoubleSpinBox = self.findChild(QDoubleSpinBox, "PhotosphereBurstRate")
+        self.snapshots: SnapshotService | None = None
+
         self.chosen_photosphere_directory = Path(os.getcwd()) / "Photosphere_Image_Data"
 
         if not self.chosen_photosphere_directory.exists():
@@ -295,18 +281,10 @@ class Grapher(Window):
             print("Couldn't take picture - frame index was None", file=sys.stderr)
             return
 
-        with self.data.camera_frames[frame_index].lock:
-            frame = self.data.camera_frames[frame_index].frame
-            if frame is None:
-                print("Couldn't take picture - camera is disconnected. Try a different camera...", file=sys.stderr)
-                return
-            timestamp = datetime.now().isoformat(timespec="milliseconds").replace(":", "-").replace(".", "-")
-            if not frame.save(str(self.chosen_photosphere_directory / f"{timestamp}.jpg")):
-                print("Failed to save picture")
-                return
-        with open(str(self.chosen_photosphere_directory / f"{timestamp}.rov_data"), "wb") as f:
-            pickle.dump(self.data.export_rov_data(), f)
-        print("Picture taken!")
+        count = self.PhotosphereBurstCount.value()
+        if self.snapshots.take_burst(frame_index, self.chosen_photosphere_directory, count,
+                                     self.PhotosphereBurstRate.value()):
+            print("Taking picture..." if count == 1 else f"Taking {count} pictures...")
 
     @staticmethod
     def warp_to_equirectangular(img, f, yaw, pitch, roll, canvas_width, canvas_height):
@@ -420,6 +398,9 @@ class Grapher(Window):
 
     def attach_data_interface(self) -> None:
         super().attach_data_interface()
+        self.snapshots = SnapshotService(self.data)
+        self.snapshots.burst_complete.connect(
+            lambda sidecar, count: print("Picture taken!" if count == 1 else f"{count} pictures taken!"))
         self.PhotosphereCameraSelectContainer: QFrame = self.findChild(QFrame)
 
         for i in range(len(self.data.camera_frames)):
@@ -435,6 +416,7 @@ class Grapher(Window):
 
     def create_photosphere(self, file_dir, canvas_height, canvas_width):
         image_paths = os.listdir(self.chosen_photosphere_directory)
+        telemetry = load_sidecars(self.chosen_photosphere_directory)
         images = []
         rov_data: [ROVData] = []
         image_names = []
@@ -449,19 +431,16 @@ class Grapher(Window):
 
             timestamp = ".".join(path.name.split(".")[:-1])
 
+            if path.name not in telemetry:
+                print(f"Could not find ROV data for {path.name}", file=sys.stderr)
+                continue
+
             img = cv2.imread(str(path))
             if img is None:
                 print(f"Failed to read {path}", file=sys.stderr)
                 continue
 
-            try:
-                with open(path.parent / f"{timestamp}.rov_data", "rb") as f:
-                    data = pickle.load(f)
-                rov_data.append(data)
-            except (FileNotFoundError, OSError):
-                print(f"Could not access {path.parent / f'{timestamp}.rov_data'}", file=sys.stderr)
-                continue
-
+            rov_data.append(telemetry[path.name])
             image_names.append(timestamp)
             images.append(img)
 
@@ -545,28 +524,36 @@ class Grapher(Window):
             self.InputRecording.add_item(file)
 
     def record_fields(self):
-        new_row = [time.time()]
-        for pretty_field in self.fields_to_record:
-            field = self.recordable_fields[pretty_field]
-            attrs = field.split(".")
-            attr = self.data
-            if len(attrs) > 1:
-                for i in range(len(attrs) - 1):
-                    attr = getattr(attr, attrs[i])
-            data = getattr(attr, attrs[-1])
-            new_row.append(data)
+        # Writes every sample received since the last call, so none are missed between timer ticks
+        telemetry = self.data.telemetry
+        start, samples = telemetry.since(self.next_recorded_sample)
+        if start > self.next_recorded_sample:
+            print(f"Recording fell behind, {start - self.next_recorded_sample} samples were lost", file=sys.stderr)
+        self.next_recorded_sample = start + samples.shape[1]
+        if samples.shape[1] == 0:
+            return
+
+        rows = np.stack([telemetry.column(samples, "recv_time")] +
+                        [telemetry.column(samples, self.recordable_fields[name])
+                         for name in self.fields_to_record], axis=1)
         try:
             with open(self.recording_file_path, "a") as f:
-                text = ",".join([str(f) for f in new_row]) + "\n"
-                f.write(text)
+                np.savetxt(f, rows, fmt="%.15g", delimiter=",")
         except Exception as e:
             self.toggle_recording()
             QMessageBox.warning(None, "Error", f"Recording Failed Unexpectedly:\n{e}")
 
-        self.recording_dataframe.loc[len(self.recording_dataframe)] = new_row
-
         self.recording_update.emit()
 
+    def live_graph_data(self) -> dict[str, np.ndarray]:
+        # Columns of the current recording, as views of the telemetry history
+        telemetry = self.data.telemetry
+        _, samples = telemetry.since(self.recording_start_sample)
+        columns = {"Time": telemetry.column(samples, "recv_time")}
+        for name in self.fields_to_record:
+            columns[name] = telemetry.column(samples, self.recordable_fields[name])
+        return columns
+
     def display_field_axes_options(self):
         x_axis_choice = self.XAxis.get_selected_display_text()
         y_axis_choice = self.YAxis.get_selected_display_text()
@@ -635,12 +622,13 @@ class Grapher(Window):
                     return
 
             self.recording_file_path = new_recording
-            self.recording_dataframe = pd.DataFrame([], columns=["Time"] + selected_fields)
             self.fields_to_record = selected_fields
+            self.recording_start_sample = self.data.telemetry.count
+            self.next_recorded_sample = self.recording_start_sample
 
             try:
                 with open(self.recording_file_path, "w+") as f:
-                    f.write(",".join(self.recording_dataframe.columns) + "\n")
+                    f.write(",".join(["Time"] + selected_fields) + "\n")
             except Exception as e:
                 QMessageBox.warning(None, "Error", f"Failed to start recording:\n{e}")
                 return
@@ -675,7 +663,7 @@ class Grapher(Window):
             return
 
         if self.LiveGraph.isChecked():
-            graph_widget = GraphWidget(self.recording_dataframe, axes,
+            graph_widget = GraphWidget(self.live_graph_data, axes,
                                        self.GraphType.get_selected_display_text() == "3D Graph",
                                        True, title,
                                        recording_update_signal=self.recording_update,
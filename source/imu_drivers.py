@@ -0,0 +1,160 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+GRAVITY = 9.80665
+
+
+@dataclass
+class IMUSample:
+    # Body frame: x forward, y left, z up. At rest and level, acceleration reads (0, 0, GRAVITY).
+    acceleration: ndarray  # m/s², including gravity
+    gyro: ndarray  # deg/s about x (roll), y (pitch) and z (yaw)
+    heading: float | None = None  # deg, from the sensor's own fusion or magnetometer if it has one
+    depth: float | None = None  # m, from a pressure sensor if there is one
+
+
+class IMUDriver:
+    """
+        Reads one IMU. native_rate is the fastest rate it produces new readings at, which the IMU is sampled at.
+        read returns None when no reading is available.
+    """
+
+    native_rate = 100.0
+
+    def read(self) -> IMUSample | None:
+        raise NotImplementedError
+
+    def temperature(self) -> float | None:
+        return None
+
+
+def compass_to_yaw(heading: float) -> float:
+    # A compass heading, clockwise from 0 to 360, to yaw about z up, counter-clockwise from -180 to 180
+    return (180 - heading) % 360 - 180
+
+
+class BNO055Driver(IMUDriver):
+    """
+        The BNO055 over I2C, through the adafruit_bno055 library. Its fusion outputs update at 100 Hz.
+        The library reports the heading as a compass heading, which is converted to yaw.
+    """
+
+    native_rate = 100.0
+
+    def __init__(self, sensor):
+        self.sensor = sensor
+
+    def read(self) -> IMUSample | None:
+        acceleration = self.sensor.acceleration
+        gyro = self.sensor.gyro
+        if acceleration is None or gyro is None or None in acceleration or None in gyro:
+            return None
+        euler = self.sensor.euler
+        heading = compass_to_yaw(euler[0]) if euler is not None and euler[0] is not None else None
+        # The library reports the gyro in rad/s
+        return IMUSample(np.array(acceleration, dtype=np.float64), np.degrees(np.array(gyro, dtype=np.float64)),
+                         heading)
+
+    def temperature(self) -> float | None:
+        return self.sensor.temperature
+
+
+def default_motion(t: float) -> tuple[float, float, float, float]:
+    # Roll, pitch, yaw (deg) and depth (m) of a gently rolling ROV descending and ascending while turning slowly
+    return 10 * math.sin(0.3 * t), 5 * math.sin(0.2 * t), (6 * t) % 360 - 180, 2 + math.sin(0.1 * t)
+
+
+class FakeIMU(IMUDriver):
+    """
+        A synthetic IMU for testing without hardware. The ROV follows motion, a function from seconds since the
+        IMU was created to roll, pitch, yaw (deg) and depth (m), and the IMU reports the gravity and rotation rates
+        that motion would produce, plus noise and a vibration at vibration_hz (above the telemetry rate, to show
+        aliasing if decimation doesn't filter it out). Seeded, so runs are repeatable.
+    """
+
+    def __init__(self, rate: float = 100, motion: Callable[[float], tuple[float, float, float, float]] = default_motion,
+                 noise: float = 0.05, vibration: float = 0.5, vibration_hz: float = 37, seed: int = 0,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.native_rate = rate
+        self.motion = motion
+        self.noise = noise
+        self.vibration = vibration
+        self.vibration_hz = vibration_hz
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock
+        self.start = clock()
+        self.last: tuple[float, tuple[float, float, float, float]] | None = None
+
+    def read(self) -> IMUSample | None:
+        t = self.clock() - self.start
+        roll, pitch, yaw, depth = self.motion(t)
+        rates = np.zeros(3)
+        if self.last is not None and t > self.last[0]:
+            last_t, (last_roll, last_pitch, last_yaw, _) = self.last
+            yaw_change = (yaw - last_yaw + 180) % 360 - 180
+            rates = np.array([roll - last_roll, pitch - last_pitch, yaw_change]) / (t - last_t)
+        self.last = (t, (roll, pitch, yaw, depth))
+
+        # Euler angle rates to body rates
+        r, p = math.radians(roll), math.radians(pitch)
+        gyro = np.array([rates[0] - math.sin(p) * rates[2],
+                         math.cos(r) * rates[1] + math.sin(r) * math.cos(p) * rates[2],
+                         -math.sin(r) * rates[1] + math.cos(r) * math.cos(p) * rates[2]])
+        # Gravity seen from the body frame
+        acceleration = GRAVITY * np.array([-math.sin(p), math.sin(r) * math.cos(p), math.cos(r) * math.cos(p)])
+        acceleration += self.vibration * math.sin(2 * math.pi * self.vibration_hz * t)
+        acceleration += self.rng.normal(0, self.noise, 3)
+        gyro += self.rng.normal(0, self.noise * 10, 3)
+        return IMUSample(acceleration, gyro, yaw + self.rng.normal(0, 0.5), depth + self.rng.normal(0, 0.01))
+
+    def temperature(self) -> float | None:
+        return 30 + self.rng.normal(0, 0.1)
+
+
+class FakeBNO055:
+    """
+        Stands in for the adafruit_bno055 sensor, reporting a FakeIMU the way the library does: the gyro in rad/s
+        and the heading as a compass heading, first of euler (heading, roll, pitch). Read through BNO055Driver,
+        which reads acceleration first, so a new reading is taken then.
+    """
+
+    def __init__(self, imu: FakeIMU):
+        self.imu = imu
+        self.sample: IMUSample | None = None
+
+    @property
+    def acceleration(self) -> tuple[float, float, float] | None:
+        self.sample = self.imu.read()
+        return tuple(self.sample.acceleration) if self.sample is not None else None
+
+    @property
+    def gyro(self) -> tuple[float, float, float] | None:
+        return tuple(np.radians(self.sample.gyro)) if self.sample is not None else None
+
+    @property
+    def euler(self) -> tuple[float, float, float] | None:
+        if self.sample is None or self.sample.heading is None:
+            return None
+        roll, pitch = self.imu.last[1][:2]
+        return -self.sample.heading % 360, roll, pitch
+
+    @property
+    def temperature(self) -> float:
+        return self.imu.temperature()
+
+
+def make_imu_driver(kind: str | None, sensor=None) -> IMUDriver | None:
+    # From the "imu" setting of rov_config.json: "bno055" (the default) uses the sensor found on I2C, if any,
+    # "fake" a FakeIMU and "fake_bno055" a FakeIMU read as a BNO055
+    if kind == "fake":
+        return FakeIMU()
+    if kind == "fake_bno055":
+        return BNO055Driver(FakeBNO055(FakeIMU()))
+    if sensor is not None:
+        return BNO055Driver(sensor)
+    return None
@@ -0,0 +1,211 @@
+import math
+import time
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from imu_drivers import IMUDriver, IMUSample, GRAVITY
+from periodic_scheduler import PeriodicScheduler
+
+
+def wrap_degrees(angle: float) -> float:
+    return (angle + 180) % 360 - 180
+
+
+def lowpass_taps(factor: int, taps_per_factor: int = 4) -> ndarray:
+    # Hamming windowed sinc low pass FIR for decimating by factor. The cutoff is 80% of the output Nyquist
+    # frequency, so what would alias is attenuated before it can.
+    count = taps_per_factor * factor + 1
+    cutoff = 0.8 / (2 * factor)  # Cycles per input sample
+    n = np.arange(count) - (count - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(count)
+    return taps / taps.sum()
+
+
+class Decimator:
+    """
+        Low pass filters channels sampled at input_rate and keeps every factor-th filtered sample, so that the
+        output rate carries no aliased noise or vibration. Samples are kept in a ring buffer written twice, so the
+        filter is always one dot product over a contiguous window.
+    """
+
+    def __init__(self, input_rate: float, output_rate: float, channels: int):
+        self.factor = max(1, round(input_rate / output_rate))
+        self.taps = lowpass_taps(self.factor) if self.factor > 1 else np.ones(1)
+        self.length = len(self.taps)
+        self.buffer = np.zeros((2 * self.length, channels))
+        self.index = 0
+        self.filled = 0
+        self.phase = 0
+
+    def add(self, sample: ndarray) -> ndarray | None:
+        # Returns the next output sample once every factor input samples
+        self.buffer[self.index] = self.buffer[self.index + self.length] = sample
+        self.index = (self.index + 1) % self.length
+        self.filled = min(self.filled + 1, self.length)
+        self.phase += 1
+        if self.phase < self.factor:
+            return None
+        self.phase = 0
+        window = self.buffer[self.index:self.index + self.length]
+        if self.filled < self.length:
+            # Until the window fills, average what there is rather than filtering zeros
+            return window[self.length - self.filled:].mean(axis=0)
+        return self.taps @ window
+
+
+class ComplementaryFilter:
+    """
+        Fuses IMU samples into attitude, world frame linear acceleration, velocity and depth.
+        Attitude integrates the gyro, corrected towards the tilt measured from gravity (roll and pitch) and the
+        sensor's heading (yaw) with time constant attitude_tau, which removes gyro drift while rejecting short
+        accelerations. Gravity is removed from the acceleration rotated into the world frame, and velocity integrates
+        the rest, leaking towards zero with time constant velocity_tau as nothing else corrects its drift.
+        Depth is a second order complementary filter of the vertical velocity and the depth sensor, when there is one.
+    """
+
+    def __init__(self, attitude_tau: float = 1.0, velocity_tau: float = 5.0, depth_tau: float = 1.0):
+        self.attitude_tau = attitude_tau
+        self.velocity_tau = velocity_tau
+        self.depth_omega = 1 / depth_tau
+        self.roll = 0.0  # deg
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.linear_acceleration = np.zeros(3)  # World frame, z up, m/s²
+        self.velocity = np.zeros(3)  # World frame, z up, m/s
+        self.depth: float | None = None  # m, only once there's a depth reading
+        self.initialised = False
+
+    def tilt(self, acceleration: ndarray) -> tuple[float, float]:
+        ax, ay, az = acceleration
+        return math.degrees(math.atan2(ay, az)), math.degrees(math.atan2(-ax, math.hypot(ay, az)))
+
+    def update(self, sample: IMUSample, dt: float) -> None:
+        if not self.initialised:
+            self.roll, self.pitch = self.tilt(sample.acceleration)
+            self.yaw = sample.heading if sample.heading is not None else 0.0
+            self.depth = sample.depth
+            self.initialised = True
+            return
+
+        # Body rates to Euler angle rates
+        r, p = math.radians(self.roll), math.radians(self.pitch)
+        cos_p = max(math.cos(p), 1e-3)
+        gx, gy, gz = sample.gyro
+        roll_rate = gx + (math.sin(r) * gy + math.cos(r) * gz) * math.tan(p)
+        pitch_rate = math.cos(r) * gy - math.sin(r) * gz
+        yaw_rate = (math.sin(r) * gy + math.cos(r) * gz) / cos_p
+
+        alpha = self.attitude_tau / (self.attitude_tau + dt)
+        tilt_roll, tilt_pitch = self.tilt(sample.acceleration)
+        self.roll = wrap_degrees(tilt_roll + alpha * wrap_degrees(self.roll + roll_rate * dt - tilt_roll))
+        self.pitch = tilt_pitch + alpha * (self.pitch + pitch_rate * dt - tilt_pitch)
+        yaw = self.yaw + yaw_rate * dt
+        if sample.heading is not None:
+            yaw = sample.heading + alpha * wrap_degrees(yaw - sample.heading)
+        self.yaw = wrap_degrees(yaw)
+
+        # Rotate into the world frame and remove gravity
+        r, p, y = math.radians(self.roll), math.radians(self.pitch), math.radians(self.yaw)
+        cr, sr, cp, sp, cy, sy = math.cos(r), math.sin(r), math.cos(p), math.sin(p), math.cos(y), math.sin(y)
+        rotation = np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                             [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                             [-sp, cp * sr, cp * cr]])
+        self.linear_acceleration = rotation @ sample.acceleration - (0, 0, GRAVITY)
+        self.velocity += self.linear_acceleration * dt
+        self.velocity *= 1 - min(dt / self.velocity_tau, 1)
+
+        if sample.depth is not None:
+            if self.depth is None:
+                self.depth = sample.depth
+            # Depth is down, the world frame's z is up
+            predicted = self.depth - self.velocity[2] * dt
+            error = sample.depth - predicted
+            self.depth = predicted + 2 * self.depth_omega * error * dt
+            self.velocity[2] -= self.depth_omega ** 2 * error * dt
+
+
+class IMUAcquisition:
+    """
+        Samples an IMU at its native rate on its own thread, fusing every sample, and passes the results to
+        on_output at output_rate. Rates and accelerations are decimated with an anti-aliasing filter, as they
+        carry noise and vibration far above the output rate. Attitude, velocity and depth are already smoothed
+        by fusion, so the latest is output.
+        on_output is passed the fused filter, the decimated gyro (deg/s) and the decimated world frame linear
+        acceleration (m/s²).
+    """
+
+    def __init__(self, driver: IMUDriver, output_rate: float,
+                 on_output: Callable[[ComplementaryFilter, ndarray, ndarray], None],
+                 fusion: ComplementaryFilter | None = None):
+        self.driver = driver
+        self.on_output = on_output
+        self.fusion = fusion or ComplementaryFilter()
+        self.decimator = Decimator(driver.native_rate, output_rate, 6)
+        self.scheduler = PeriodicScheduler("IMU")
+        self.task = self.scheduler.add("imu", driver.native_rate, self.sample)
+        self.missing = 0  # Reads that returned no sample
+
+    def start(self) -> None:
+        self.scheduler.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self.scheduler.stop(timeout)
+
+    def is_alive(self) -> bool:
+        return self.scheduler.is_alive()
+
+    def sample(self, dt: float) -> None:
+        try:
+            sample = self.driver.read()
+        except OSError:
+            # Occasional I2C errors are expected
+            sample = None
+        if sample is None:
+            self.missing += 1
+            return
+        self.fusion.update(sample, dt)
+        output = self.decimator.add(np.concatenate((sample.gyro, self.fusion.linear_acceleration)))
+        if output is not None:
+            self.on_output(self.fusion, output[:3], output[3:])
+
+    def summary(self) -> str:
+        return f"{self.scheduler.summary()}, {self.missing} missing samples"
+
+
+if __name__ == "__main__":
+    # Check decimation and fusion against a fake IMU, read directly and as a BNO055: python imu_fusion.py [seconds]
+    import sys
+    from imu_drivers import FakeIMU, FakeBNO055, BNO055Driver
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    for name in ("FakeIMU", "FakeIMU as BNO055"):
+        simulated_time = [0.0]
+        fake = FakeIMU(clock=lambda: simulated_time[0])
+        driver = fake if name == "FakeIMU" else BNO055Driver(FakeBNO055(fake))
+        fusion = ComplementaryFilter()
+        decimator = Decimator(fake.native_rate, 10, 3)
+        errors = []
+        raw = []
+        decimated = []
+        start = time.perf_counter()
+        for i in range(int(seconds * fake.native_rate)):
+            simulated_time[0] = i / fake.native_rate
+            sample = driver.read()
+            fusion.update(sample, 1 / fake.native_rate)
+            raw.append(fusion.linear_acceleration.copy())
+            output = decimator.add(fusion.linear_acceleration)
+            if output is not None:
+                decimated.append(output)
+            roll, pitch, yaw, depth = fake.motion(simulated_time[0])
+            # The BNO055 has no pressure sensor
+            depth_error = fusion.depth - depth if fusion.depth is not None else 0.0
+            errors.append((fusion.roll - roll, fusion.pitch - pitch, wrap_degrees(fusion.yaw - yaw), depth_error))
+        elapsed = time.perf_counter() - start
+        rms = np.sqrt(np.mean(np.square(errors[int(fake.native_rate):]), axis=0))
+        print(f"{name}: {elapsed / len(errors) * 1e6:.0f} us per sample. RMS error after 1 s: roll {rms[0]:.2f} deg, "
+              f"pitch {rms[1]:.2f} deg, yaw {rms[2]:.2f} deg" + (f", depth {rms[3]:.3f} m" if rms[3] else ""))
+        print(f"Linear acceleration RMS {np.sqrt(np.mean(np.square(raw))):.3f} m/s² at {fake.native_rate:.0f} Hz, "
+              f"{np.sqrt(np.mean(np.square(decimated))):.3f} m/s² decimated to 10 Hz, "
+              f"{np.sqrt(np.mean(np.square(raw[::decimator.factor]))):.3f} m/s² if only every {decimator.factor}th")
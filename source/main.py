@@ -1,7 +1,6 @@
 import os
 import sys
 import faulthandler
-import io
 import traceback
 from cProfile import Profile
 from pstats import SortKey, Stats
@@ -14,6 +13,8 @@ script_dir = os.path.dirname(os.path.abspath(__file__))  # Get the script's dire
 os.chdir(script_dir)  # Change working directory to the script's location
 
 from app import App
+from data_classes.stdout_type import StdoutType
+from datainterface.line_queue import LineQueue, LineQueueStream
 #
 # os.environ["QT_QUICK_BACKEND"] = "software"  # Force CPU rendering (Qt Quick)
 # os.environ["T_QPA_PLATFORM"] = "offscreen"  # Alternative for headless rendering (if needed)
@@ -34,20 +35,26 @@ RUN_ROV_LOCALLY = False # Set this to true to create dummy processes for the ROV
 ROV_IP = "192.168.1.133"
 FLOAT_IP = "localhost"
 VIDEO_FEED_COUNT = 2
+VIDEO_RENDER_FPS = 0  # Maximum rate video is drawn at. 0 matches the monitor's refresh rate
+VIDEO_DECODE_IN_PROCESS = False  # Decode each video feed in its own process rather than a thread of the UI
+SHOW_VIDEO_LATENCY = False  # Overlay live latency measurements on the camera views
+TELEMETRY_DISPLAY_FPS = 30  # Maximum rate the windows are notified of new ROV data, however fast it arrives
 
 try:
     with Profile() as profile:
         # Catch standard output
         if DEBUG:
-            app = App(sys.__stdout__, sys.__stderr__, sys.argv, RUN_ROV_LOCALLY, ROV_IP, FLOAT_IP)
+            app = App(sys.__stdout__, sys.__stderr__, sys.argv, RUN_ROV_LOCALLY, ROV_IP, FLOAT_IP, VIDEO_FEED_COUNT,
+                      VIDEO_RENDER_FPS, VIDEO_DECODE_IN_PROCESS, SHOW_VIDEO_LATENCY, TELEMETRY_DISPLAY_FPS)
             exit_code = app.exec()
         else:
-            stderr_io = io.StringIO()
-            with redirect_stderr(stderr_io) as redirected_stderr:
-                stdout_io = io.StringIO()
-                with redirect_stdout(stdout_io) as redirected_stdout:
+            # Printed lines are queued for the DataInterface to show in the UI and echo to the console
+            output = LineQueue()
+            with redirect_stderr(LineQueueStream(output, StdoutType.UI_ERROR)) as redirected_stderr:
+                with redirect_stdout(LineQueueStream(output, StdoutType.UI)) as redirected_stdout:
                     app = App(redirected_stdout, redirected_stderr, sys.argv,
-                              RUN_ROV_LOCALLY, ROV_IP, FLOAT_IP, VIDEO_FEED_COUNT)
+                              RUN_ROV_LOCALLY, ROV_IP, FLOAT_IP, VIDEO_FEED_COUNT, VIDEO_RENDER_FPS,
+                              VIDEO_DECODE_IN_PROCESS, SHOW_VIDEO_LATENCY, TELEMETRY_DISPLAY_FPS)
                     exit_code = app.exec()
                     print(exit_code, file=sys.__stderr__)
 
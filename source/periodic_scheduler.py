@@ -0,0 +1,122 @@
+import math
+import os
+import threading
+import time
+from threading import Thread, Event
+from typing import Callable
+
+from datainterface.latency_stats import LatencyHistogram
+from rov_log import log
+
+
+class PeriodicTask:
+    def __init__(self, name: str, rate: float, function: Callable[[float], None]):
+        self.name = name
+        self.period = 1 / rate
+        self.function = function
+        self.deadline = 0.0
+        self.last_start: float | None = None
+
+        # Statistics
+        self.runs = 0
+        self.overruns = 0  # Runs skipped because the task fell more than a period behind
+        self.errors = 0
+        self.lateness_ms = LatencyHistogram(bin_ms=0.5, max_ms=100)
+        self.run_ms = LatencyHistogram(bin_ms=0.5, max_ms=100)
+        self.max_run_ms = 0.0
+
+    def stats(self, elapsed: float) -> dict:
+        return {"rate": round(self.runs / elapsed, 2) if elapsed > 0 else 0.0,
+                "target_rate": round(1 / self.period, 2),
+                "late_p99_ms": self.lateness_ms.percentile(99),
+                "run_mean_ms": round(self.run_ms.mean(), 3),
+                "run_max_ms": round(self.max_run_ms, 3),
+                "overruns": self.overruns,
+                "errors": self.errors}
+
+
+class PeriodicScheduler:
+    """
+        Runs tasks at fixed rates on one thread. Each task's next deadline is its last deadline plus its period,
+        rather than the time its last run ended plus a sleep, so it runs at its rate however long each run takes
+        and errors don't accumulate. A task that falls more than a period behind skips the runs it missed rather
+        than running them late back to back, and counts them as overruns.
+        Each task is passed the seconds since its last run started, for integrating its readings.
+        How late each run started and how long it took are recorded per task.
+        Tasks share the thread, so a slow task delays the others. That suits sensors on one bus, whose reads can't
+        overlap anyway. A task that mustn't be delayed by the others should have a scheduler of its own.
+        If priority is given, the thread's nice value is set to it, where allowed.
+    """
+
+    def __init__(self, name: str = "Scheduler", priority: int | None = None):
+        self.name = name
+        self.priority = priority
+        self.tasks: list[PeriodicTask] = []
+        self.stopping = Event()
+        self.start_time = 0.0
+        self.thread = Thread(target=self.run, daemon=True, name=name)
+
+    def add(self, name: str, rate: float, function: Callable[[float], None]) -> PeriodicTask:
+        # Tasks must be added before the scheduler is started
+        task = PeriodicTask(name, rate, function)
+        self.tasks.append(task)
+        return task
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self.stopping.set()
+        self.thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self.thread.is_alive()
+
+    def run(self) -> None:
+        if self.priority is not None:
+            try:
+                # Linux applies nice values to individual threads
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.priority)
+            except (AttributeError, OSError):
+                pass
+
+        self.start_time = time.perf_counter()
+        for task in self.tasks:
+            task.deadline = self.start_time
+
+        while self.tasks and not self.stopping.is_set():
+            task = min(self.tasks, key=lambda t: t.deadline)
+            delay = task.deadline - time.perf_counter()
+            if delay > 0 and self.stopping.wait(delay):
+                break
+
+            start = time.perf_counter()
+            task.lateness_ms.record((start - task.deadline) * 1000)
+            dt = task.period if task.last_start is None else start - task.last_start
+            task.last_start = start
+            try:
+                task.function(dt)
+            except Exception as e:
+                task.errors += 1
+                log.error("Scheduled task failed", task=task.name, error=repr(e))
+            end = time.perf_counter()
+            run_ms = (end - start) * 1000
+            task.run_ms.record(run_ms)
+            task.max_run_ms = max(task.max_run_ms, run_ms)
+            task.runs += 1
+
+            task.deadline += task.period
+            if task.deadline < end:
+                missed = math.ceil((end - task.deadline) / task.period)
+                task.overruns += missed
+                task.deadline += missed * task.period
+
+    def stats(self) -> dict[str, dict]:
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0
+        return {task.name: task.stats(elapsed) for task in self.tasks}
+
+    def summary(self) -> str:
+        return "\n".join(f"{self.name} {name}: {stats['rate']:.1f}/{stats['target_rate']:.1f} Hz, "
+                         f"late p99 {stats['late_p99_ms']:.1f} ms, run mean {stats['run_mean_ms']:.2f} ms "
+                         f"max {stats['run_max_ms']:.2f} ms, {stats['overruns']} overruns, {stats['errors']} errors"
+                         for name, stats in self.stats().items())
@@ -4,7 +4,9 @@ from PyQt6.QtCore import QThread
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import QLabel, QProgressBar, QFrame
 
+from datainterface.render_scheduler import RenderScheduler
 from datainterface.video_display import VideoDisplay
+from gauge_widget import GaugeWidget
 from window import Window
 
 path_dir = os.path.dirname(os.path.realpath(__file__))
@@ -31,21 +33,31 @@ class Pilot(Window):
         self.secondary_2_cam: QLabel = self.findChild(QLabel, "SecondaryCameraView2")
 
         self.video_handler_thread = QThread()
+        self.render_scheduler = RenderScheduler(self.desired_monitor, self.app.video_render_fps)
         for name, cam, frame_index in zip(["Main Camera", "Secondary Camera 1", "Secondary Camera 2"],
                                           [self.main_cam, self.secondary_1_cam, self.secondary_2_cam],
                                           [0, 1, 2]):
             # Create Video Display and connect to signals
-            display = VideoDisplay(cam, frame_index, self.app, "Main Camera" == name)
-            display.pixmap_ready.connect(lambda pixmap, _cam=cam: _cam.setPixmap(pixmap))
+            display = VideoDisplay(cam, frame_index, self.app, "Main Camera" == name,
+                                   show_latency=self.app.show_video_latency)
+            display.pixmap_ready.connect(lambda pixmap, timing, _display=display: _display.show_pixmap(pixmap, timing))
             display.on_disconnect.connect(lambda _cam=cam, _name=name: _cam.setText(f"{_name} Disconnected"))
 
             # Move video processing to a separate thread
             display.moveToThread(self.video_handler_thread)
+            self.render_scheduler.add_display(display)
             self.cam_displays.append(display)
 
-        self.rpb_perc: QLabel = self.findChild(QLabel, "rpb_perc")
-        self.rpb_kpa: QLabel = self.findChild(QLabel, "rpb_kpa")
-        self.rpb_path: QFrame = self.findChild(QFrame, "RPB_PATH")
+        self.render_scheduler.moveToThread(self.video_handler_thread)
+        self.video_handler_thread.started.connect(self.render_scheduler.start)
+
+        # The pressure gauge is painted by a GaugeWidget in place of the frames laid out in the .ui file
+        rpb_back: QFrame = self.findChild(QFrame, "RPB_BACK")
+        self.pressure_gauge = GaugeWidget(minimum=100, maximum=150, units=" kPa", show_percent=True)
+        self.pressure_gauge.setMinimumSize(rpb_back.minimumSize().expandedTo(self.pressure_gauge.sizeHint()))
+        rpb_back.parentWidget().layout().replaceWidget(rpb_back, self.pressure_gauge)
+        rpb_back.deleteLater()
+        self.pressure_gauge.set_value(0)
 
         self.temp_value: QLabel = self.findChild(QLabel, "temp_value")
         self.progressTempBar: QProgressBar = self.findChild(QProgressBar, "temp_bar")
@@ -54,8 +66,7 @@ class Pilot(Window):
 
     def attach_data_interface(self) -> None:
         self.data = self.app.data_interface
-        self.data.rov_data_update.connect(self.rpb_sync)
-        self.data.rov_data_update.connect(self.temp_sync)
+        self.data.rov_data_update.connect(self.on_rov_data_update)
 
         # Attach camera feeds to respective VideoDisplay objects
         for display in self.cam_displays:
@@ -63,27 +74,14 @@ class Pilot(Window):
 
         self.video_handler_thread.start()
 
+    def on_rov_data_update(self, changed: frozenset[str]) -> None:
+        if "ambient_pressure" in changed:
+            self.rpb_sync()
+        if "ambient_temperature" in changed:
+            self.temp_sync()
+
     def rpb_sync(self) -> None:
-        # Gauge angle indicates the angle from 0 to 100%
-        gauge_angle = 330
-
-        value_kpa = self.data.ambient_pressure
-        if not self.data.is_rov_connected():
-            value_perc = 0
-            value_kpa = 0
-        else:
-            value_perc = (value_kpa - 100) / 50
-
-        # Update stylesheet to show the new gauge value
-        val1 = (1 - value_perc * gauge_angle / 360)
-        value1 = val1 - 0.001
-        self.rpb_path.setStyleSheet(f"""
-        #RPB_PATH{{
-            background-color: qconicalgradient(cx:0.5, cy:0.5, angle: {270 - (360 - gauge_angle) / 2}, stop:{val1} rgba(85, 255, 255, 255), stop:{value1} rgba(0, 0, 124, 255));
-        }}
-        """)
-        self.rpb_perc.setText(f"{round(value_perc * 100)}{'%'}")
-        self.rpb_kpa.setText(f"{round(value_kpa)}{' kPa'}")
+        self.pressure_gauge.set_value(self.data.ambient_pressure if self.data.is_rov_connected() else 0)
 
     def temp_sync(self) -> None:
         value_temp = self.data.ambient_temperature
@@ -29,6 +29,16 @@ class ROVData:
         self.internal_temperature = 0
         self.cardinal_direction = 0
         self.grove_water_sensor = 0
+        self.camera_status: list[tuple[bool, float, int]] = []  # (Running, Uptime, Restart Count) of each camera
+        self.camera_profiles: list[dict] = []  # Current width, height, bitrate and framerate of each camera
+        # Sequence number of the last controller command applied, and when (ROV clock), for the UI to measure latency
+        self.controller_sequence = -1
+        self.controller_applied_time = 0.0
+        # Time from writing the last command to the ESP32 to its ack (ms), and CRC and write errors on the UART
+        self.uart_ack_latency = 0.0
+        self.uart_errors = 0
+        # Rate, lateness, run time and overruns of each sensor polling task on the ROV
+        self.task_timing: dict[str, dict] = {}
 
     def randomise(self):
         self.ambient_temperature = rand_float_range(23, 27, 2)
@@ -1,14 +1,13 @@
 # This script creates a simulated version of the ROV that the UI can interact with
-import io
 import json
 import os
 import pickle
 import sys
 import time
 from contextlib import redirect_stderr, redirect_stdout
-from threading import Thread
-import subprocess
-import psutil
+from queue import Queue, Empty
+
+from numpy import ndarray
 
 from data_classes.vector3 import Vector3
 
@@ -41,28 +40,33 @@ except Exception as e:
 script_dir = os.path.dirname(os.path.abspath(__file__))  # Get the script's directory
 os.chdir(script_dir)  # Change working directory to the script's location
 
+from camera_profiles import CameraProfiles
+from camera_supervisor import CameraSupervisor
 from data_classes.action_enum import ActionEnum
+from data_classes.controller_frame import ControllerFrame
 from rov_float_data_structures.rov_data import ROVData
 from data_classes.stdout_type import StdoutType
+from thruster_mixing import ThrusterMixer
+from uart_link import UartLink
 from datainterface.sock_stream_recv import SockStreamRecv
 from datainterface.sock_stream_send import SockStreamSend, SockSend
+from datainterface.line_queue import LineQueue, LineQueueStream
+from rov_log import log
+from periodic_scheduler import PeriodicScheduler
+from imu_drivers import make_imu_driver
+from imu_fusion import IMUAcquisition, ComplementaryFilter
+from black_box import BlackBox
+from rov_simulator import ROVSimulator
 
-
-
-thruster_matrix = [
-    [0, 0, -0.707, 0.707, 0.707, -0.707],  # x
-    [0, 0, 0.707, 0.707, 0.707, 0.707],  # y
-    [1, 1, 0, 0, 0, 0],  # z
-    [0, 0, -0.0707, -0.0707, 0.0707, -0.0707],  # roll
-    [-0.13, -0.13, -0.0707, -0.0707, -0.0707, -0.0707],  # yaw
-    [0, 0, -0.182, 0.182, -0.182, 0.182]  # pitch
-]
+STDOUT_BATCH_INTERVAL = 0.05  # Minimum seconds between batches of output sent to the UI
 
 
 # Available Port Numbers: 49152-65535
 class ROVInterface:
-    def __init__(self, redirected_stdout, redirected_stderr, ui_ip=None, rov_ip=None, local_test=True, camera_data=None, port_bindings=None,
-                 uart_port='/dev/ttyAMA0', uart_baud=115200, controller_test=False, data_poll=0.1, imu_sensor=None, show_camera_stdout=True):
+    def __init__(self, stdout_queue: LineQueue, ui_ip=None, rov_ip=None, local_test=True, camera_data=None, port_bindings=None,
+                 uart_port='/dev/ttyAMA0', uart_baud=115200, controller_test=False, data_poll=0.1, imu_sensor=None, show_camera_stdout=True,
+                 thrusters=None, log_level="INFO", log_interval=1.0,
+                 imu=None, imu_rate=None, temperature_rate=1, black_box=None, simulator=None):
         if camera_data is None:
             camera_data = []
         if port_bindings is None:
@@ -72,8 +76,9 @@ class ROVInterface:
         self.camera_data = camera_data
         self.port_bindings = port_bindings
         self.camera_count = len(camera_data)
-        self.redirected_stdout = redirected_stdout
-        self.redirected_stderr = redirected_stderr
+        self.stdout_queue = stdout_queue
+        log.set_level(log_level)
+        log.interval = log_interval
         self.show_camera_stdout = show_camera_stdout
 
         # Sensors/Arduino Connections
@@ -81,11 +86,21 @@ class ROVInterface:
         self.data_poll = data_poll
         self.uart_port = uart_port
         self.uart_baud = uart_baud
-        self.uart = None
-        self.imu_sensor = imu_sensor
-
-        if self.imu_sensor is None:
+        self.uart_link = None
+        self.imu_driver = make_imu_driver(imu, imu_sensor)
+        self.thruster_mixer = ThrusterMixer.from_config(thrusters)
+
+        # A simulated vehicle stands in for the ESP32 and IMU, for testing without hardware
+        self.simulator = None
+        if simulator is not None and simulator is not False:
+            self.simulator = ROVSimulator.from_config(simulator, self.thruster_mixer)
+            self.imu_driver = self.simulator.imu()
+            print("Simulating the ROV's thrusters and IMU")
+
+        if self.imu_driver is None:
             print("No IMU Sensor Detected")
+        elif imu_rate is not None:
+            self.imu_driver.native_rate = imu_rate
 
         # ROV state attributes
 
@@ -94,6 +109,7 @@ class ROVInterface:
         self.hold_depth = 0
         self.maintain_depth = False
         self.next_send_controller_data = time.time()
+        self.last_controller_frame: ControllerFrame | None = None
 
         if self.local_test:
             self.UI_IP = "localhost"
@@ -114,43 +130,74 @@ class ROVInterface:
             f"Creating ROV Interface:\n{self.UI_IP=}\n{self.ROV_IP=}\n{self.local_test=}\n{self.camera_count=}")
 
         self.rov_data = ROVData()
+
+        # Everything the ROV does is recorded, so what the UI missed while disconnected can be fetched afterwards
+        self.black_box = None
+        if black_box is not False:
+            black_box = black_box or {}
+            self.black_box = BlackBox(black_box.get("directory", "black_box"), self.rov_data,
+                                      int(black_box.get("max_mb", 256) * 2 ** 20),
+                                      black_box.get("segment_records", 16384))
+        self.black_box_requests: Queue[tuple[float, float]] = Queue()
+        self.black_box_chunks = None
         self.i = 100  # temp variable
 
+        # Each camera's encoder runs as its own process, kept alive by the supervisor
+        self.camera_profiles = CameraProfiles(self.camera_data)
+        self.rov_data.camera_profiles = [self.camera_profiles.profile(i) for i in range(self.camera_count)]
+        self.video_addr = "127.0.0.1" if self.local_test else self.UI_IP
+        self.camera_supervisor = CameraSupervisor(self.camera_count, self.video_command, self.show_camera_stdout)
+
         print("Powering On...")
 
         print(f"Binding Data Thread to {self.UI_IP} : {self.port_bindings['data']}")
 
         self.data_thread = SockStreamSend(self, self.UI_IP, self.port_bindings["data"], self.data_poll,
                                           self.get_rov_data,
-                                          on_connect=lambda: print("Data Thread Connected"),
-                                          on_disconnect=lambda: print("Data Thread Disconnected")
+                                          on_connect=lambda: self.event("Data Thread Connected"),
+                                          on_disconnect=lambda: self.event("Data Thread Disconnected")
                                           )
         self.data_thread.start()
 
-        self.data_poll_thread = Thread(target=self.poll_rov_data)
-        self.data_poll_thread.start()
-
-        self.stdout_thread = SockStreamSend(self, self.UI_IP, self.port_bindings["stdout"], 0,
+        # The IMU is sampled at its own rate on its own thread, and fused and decimated to the telemetry rate
+        self.imu_acquisition = None
+        self.last_gyro = None
+        if self.simulator is not None:
+            self.simulator.start()
+        if self.imu_driver is not None:
+            self.imu_acquisition = IMUAcquisition(self.imu_driver, 1 / self.data_poll, self.imu_output)
+            # On the IMU's thread, as reads on the same bus can't overlap
+            self.imu_acquisition.scheduler.add("temperature", temperature_rate, self.poll_temperature)
+            self.imu_acquisition.start()
+
+        # Everything else is polled at the telemetry rate
+        self.sensor_scheduler = PeriodicScheduler("Sensor Polling")
+        self.sensor_scheduler.add("status", 1 / self.data_poll, self.poll_status)
+        self.sensor_scheduler.start()
+
+        self.stdout_thread = SockStreamSend(self, self.UI_IP, self.port_bindings["stdout"], STDOUT_BATCH_INTERVAL,
                                             self.process_stdout,
                                             on_connect=lambda: print("Stdout Thread Connected"),
                                             on_disconnect=lambda: print("Stdout Thread Disconnected")
                                             )
         self.stdout_thread.start()
 
-        self.video_streams = None
-        self.video_processes: [subprocess.Popen | None] = [None for _ in range(self.camera_count)]
+        self.camera_supervisor.start_all()
 
-        self.video_threads = []
-        for i in range(self.camera_count):
-            print("Binding video threads")
-            port = self.port_bindings[f"feed_{i}"]
-            print(f"\tBinding to {'127.0.0.1' if self.local_test else self.UI_IP} : {port}")
-            video_thread = Thread(target=self.video_send,
-                                  kwargs={"addr": "127.0.0.1" if self.local_test else self.UI_IP,
-                                          "port": port, "i": i})
-            video_thread.start()
+        if not self.controller_test:
+            self.uart_link = UartLink(self.uart_port, self.uart_baud, on_sent=self.command_applied,
+                                      open_serial=self.simulator.open_serial if self.simulator is not None else None)
+            self.uart_link.start()
 
-            self.video_threads.append(video_thread)
+        self.black_box_thread = None
+        if self.black_box is not None and "black_box" in self.port_bindings:
+            self.black_box_thread = SockStreamSend(self, self.UI_IP, self.port_bindings["black_box"], 0,
+                                                   self.next_black_box_chunk,
+                                                   on_connect=lambda: print("Black Box Thread Connected"),
+                                                   on_disconnect=lambda: print("Black Box Thread Disconnected"))
+            self.black_box_thread.start()
+        elif self.black_box is not None:
+            print("No black_box port in port_bindings, so the UI can't fetch from the black box", file=sys.stderr)
 
         print(f"Binding Input Thread to {self.ROV_IP} : {self.port_bindings['control']}")
 
@@ -169,166 +216,135 @@ class ROVInterface:
 
         print("Powered On!")
 
-    def process_stdout(self):
-        # Process redirected stdout
-        payload = []
-        while not self.closing and len(payload) == 0:
-            time.sleep(0)
-            redirected_stdout_io.flush()
-            redirected_stderr_io.flush()
-
-            for redirect, source, type_ in ((redirected_stdout_io, sys.__stdout__, StdoutType.ROV),
-                                               (redirected_stderr_io, sys.__stderr__, StdoutType.ROV_ERROR)):
-                # If stdout has been redirected, send it to redirected and source location
-                if redirect != source:
-                    lines = redirect.getvalue().splitlines()
-                    for line in lines:
-                        payload.append((type_, line))
-                        print(line, file=source)
-                    # Clean up redirect buffer
-                    redirect.seek(0)
-                    redirect.truncate(0)
-            return pickle.dumps(payload)
+    def process_stdout(self) -> bytes | None:
+        # Called by the stdout thread. Waits briefly for output, then sends everything printed since in one batch.
+        # Printing only queues lines, so a slow tether never holds up the thread printing.
+        lines, dropped = self.stdout_queue.get_batch(0.1)
+        if dropped:
+            lines.insert(0, (StdoutType.ROV_ERROR, f"{dropped} lines of output were dropped"))
+        if not lines:
+            return None
+
+        # Also echo to the console
+        for type_, source in ((StdoutType.ROV, sys.__stdout__), (StdoutType.ROV_ERROR, sys.__stderr__)):
+            text = "".join(line + "\n" for line_type, line in lines if line_type == type_)
+            if text and source is not None:
+                source.write(text)
+                source.flush()
+        return pickle.dumps(lines)
 
     def get_rov_data(self) -> bytes:
         return pickle.dumps(self.rov_data)
 
-    def poll_rov_data(self) -> None:
-        delta_time = 0
-        while not self.closing:
-            st = time.time()
-            self.rov_data.randomise()
-
-            self.rov_data.ambient_pressure = self.i
-            self.i += 0.1
-            self.i %= 50
-            self.i += 100
-
-            if self.imu_sensor is not None:
-                try:
-                    euler = self.imu_sensor.euler
-                    acceleration = self.imu_sensor.acceleration
-                    gyro = self.imu_sensor.gyro
-                    temp = self.imu_sensor.temperature
-                    if euler is not None:
-                        self.rov_data.attitude = Vector3(*euler)
-                    if acceleration is not None:
-                        self.rov_data.acceleration = Vector3(*acceleration) + Vector3(0, 0, -9)
-                        self.rov_data.velocity += self.rov_data.acceleration * delta_time
-                    if gyro is not None:
-                        self.rov_data.angular_acceleration = Vector3(*gyro)
-                        self.rov_data.angular_velocity += Vector3(*gyro) * delta_time
-                    if temp is not None:
-                        self.rov_data.internal_temperature = temp
-                except OSError:
-                    pass
-                except Exception as e:
-                    traceback.print_exception(e, file=sys.stderr)
-
-            # if self.rov_data.attitude.x < -180:
-            #     self.rov_data.attitude.x = 360 + self.rov_data.attitude.x
-            # if self.rov_data.attitude.x > 180:
-            #     self.rov_data.attitude.x = -(360 + self.rov_data.attitude.x)
-            #
-            # if self.rov_data.attitude.y < -180:
-            #     self.rov_data.attitude.y = 360 + self.rov_data.attitude.y
-            # if self.rov_data.attitude.y > 180:
-            #     self.rov_data.attitude.y = -(360 + self.rov_data.attitude.y)
-            #
-            # if self.rov_data.attitude.z < -180:
-            #     self.rov_data.attitude.z = 360 + self.rov_data.attitude.z
-            # if self.rov_data.attitude.z > 180:
-            #     self.rov_data.attitude.z = -(360 + self.rov_data.attitude.z)
-
+    def imu_output(self, fusion: ComplementaryFilter, gyro: ndarray, acceleration: ndarray) -> None:
+        self.rov_data.attitude = Vector3(fusion.pitch, fusion.yaw, fusion.roll)
+        if self.last_gyro is not None:
+            self.rov_data.angular_acceleration = Vector3(*(gyro - self.last_gyro) / self.data_poll)
+        self.last_gyro = gyro
+        self.rov_data.angular_velocity = Vector3(*gyro)
+        self.rov_data.acceleration = Vector3(*acceleration)
+        self.rov_data.velocity = Vector3(*fusion.velocity)
+        if fusion.depth is not None:
+            self.rov_data.depth = fusion.depth
+
+    def poll_temperature(self, dt: float) -> None:
+        try:
+            temp = self.imu_driver.temperature()
+            if temp is not None:
+                self.rov_data.internal_temperature = temp
+        except OSError:
+            pass
+
+    def poll_status(self, dt: float) -> None:
+        self.rov_data.randomise()
+
+        self.rov_data.ambient_pressure = self.i
+        self.i += 0.1
+        self.i %= 50
+        self.i += 100
+
+        if self.imu_acquisition is None or self.imu_acquisition.fusion.depth is None:
+            # Without a depth sensor
             self.rov_data.depth += 0.01
             self.rov_data.depth %= 5
 
-            if self.maintain_depth:
-                self.rov_data.depth = self.hold_depth
-
-            delta_time = time.time() - st
-            sleep_time = delta_time
-            if sleep_time < 0:
-                sleep_time = 0
-            elif sleep_time > self.data_poll:
-                sleep_time = self.data_poll
-            time.sleep(sleep_time)
-
-    def kill_video_process(self, i):
-        process = self.video_processes[i]
-        if process is not None:
-            try:
-                process = psutil.Process(process.pid)
-                for child in process.children(recursive=True):
-                    child.terminate()
-                process.terminate()
-            except psutil.NoSuchProcess:
-                pass
+        if self.maintain_depth:
+            self.rov_data.depth = self.hold_depth
+
+        self.rov_data.camera_status = self.camera_supervisor.status()
+        if self.uart_link is not None:
+            self.rov_data.uart_ack_latency = self.uart_link.ack_ms.last_ms
+            self.rov_data.uart_errors = self.uart_link.errors()
+        self.rov_data.task_timing = self.sensor_scheduler.stats()
+        if self.imu_acquisition is not None:
+            self.rov_data.task_timing |= self.imu_acquisition.scheduler.stats()
 
-        self.video_processes[i] = None
+        if self.black_box is not None:
+            self.black_box.record_telemetry(self.rov_data)
+            self.black_box.flush_if_due()
 
     def controller_input_recv(self, payload_bytes: bytes) -> None:
+        try:
+            frame = ControllerFrame.decode(payload_bytes)
+        except ValueError as e:
+            log.error("Invalid controller input", error=e)
+            return
+        self.last_controller_frame = frame
+        controller_data = frame.as_dict()
         # Keep this code as it is!!!
-        controller_data = pickle.loads(payload_bytes)
         if self.controller_test:
 
             
             if time.time() - self.next_send_controller_data > 0.1:
                 print(f"{time.time():.2f} Controller Input:", controller_data)
                 self.next_send_controller_data = time.time()
-                
+
+            self.command_applied(frame)
             return
 
         # Change the code here to modify how the controller data is recieved
 
-        global thruster_matrix
         if controller_data is None:
             return
 
-        if self.uart is None or not self.uart.is_open:
-            try:
-                self.uart = serial.Serial(self.uart_port, self.uart_baud, timeout=1)
-                print(f"✅ UART opened on {self.uart_port} at {self.uart_baud} baud.")
-            except Exception as e:
-                print(f"❌ Failed to open UART: {e}")
-                return
-
         axes = controller_data.get('axes', [])
-        hats = controller_data.get('hats', [])
-        print("Received Controller Data:")
-        print("Axes:   ", axes)
-        print("Buttons:", controller_data.get('buttons', []))
-        print("Hats:   ", hats)
-        print("-" * 40)
-
-        # Get up to 4 axes, pad with zeros if not enough
-        x = float(axes[0]) if len(axes) > 0 else 0.0
-        z = float(axes[1]) if len(axes) > 1 else 0.0
-        roll = float(axes[2]) if len(axes) > 2 else 0.0
-        pitch = float(axes[3]) if len(axes) > 3 else 0.0
-
-        # Clamp all axes to [-1, 1]
-        x = max(-1.0, min(1.0, x))
-        z = max(-1.0, min(1.0, z))
-        roll = max(-1.0, min(1.0, roll))
-        pitch = max(-1.0, min(1.0, pitch))
-
-        # Input vector for thruster mixing: [x, y, z, roll, yaw, pitch]
-        # y and yaw are unused, so set to 0.0
-        axes_in = [x, 0.0, z, roll, 0.0, pitch]
-
-        # Matrix multiplication: thruster = T * axes_in
-        thruster = []
-        for i in range(6):
-            value = sum(thruster_matrix[j][i] * axes_in[j] for j in range(6))
-            thruster.append(value)
-
-        # Format for ESP32: "val1,val2,val3,val4,val5,val6\n"
-        data_str = ','.join(f"{v:.4f}" for v in thruster) + '\n'
-        if self.uart.is_open:
-            self.uart.write(data_str.encode())
-        else:
-            print("Serial Connection to ESP32 Closed Unexpectedly")
+        log.info("Received Controller Data", sequence=frame.sequence, axes=axes, buttons=frame.buttons,
+                 hats=controller_data.get('hats', []))
+
+        # Input vector for thruster mixing: [x, y, z, roll, yaw, pitch], from the axes in the thrusters axis_map
+        thruster = self.thruster_mixer.mix(self.thruster_mixer.demand_from_axes(axes))
+
+        # Written to the ESP32 by the link's writer thread, which calls command_applied once it has been
+        self.uart_link.send(thruster, frame)
+
+    def command_applied(self, frame: ControllerFrame, outputs: ndarray | None = None) -> None:
+        # Echoed to the UI in telemetry, so it can measure the latency from stick to UART
+        self.rov_data.controller_sequence = frame.sequence
+        self.rov_data.controller_applied_time = time.time()
+        if self.black_box is not None:
+            self.black_box.record_command(frame, () if outputs is None else outputs)
+
+    def event(self, text: str) -> None:
+        # Printed, and recorded in the black box
+        print(text)
+        if self.black_box is not None:
+            self.black_box.record_event(text)
+
+    def next_black_box_chunk(self) -> bytes | None:
+        # Called by the black box thread. Sends the records of each requested range in chunks, then a chunk with
+        # "done" set, and returns None while there are no requests.
+        if self.black_box_chunks is None:
+            try:
+                start, end = self.black_box_requests.get(timeout=0.1)
+            except Empty:
+                return None
+            self.black_box_chunks = (start, end, self.black_box.fetch(start, end))
+        start, end, chunks = self.black_box_chunks
+        chunk = next(chunks, None)
+        if chunk is None:
+            self.black_box_chunks = None
+            chunk = {"done": True}
+        return pickle.dumps(chunk | {"range": (start, end)})
 
     def action_recv(self, payload_bytes: bytes) -> None:
         print("Action Received")
@@ -337,10 +353,27 @@ class ROVInterface:
         print(action)
         if type(action) is tuple:
             action, *args = action
+        if action != ActionEnum.CAM_FEEDBACK and self.black_box is not None:
+            self.black_box.record_event(f"Action {getattr(action, 'name', action)} {args}")
         if action == ActionEnum.REINIT_CAMS:
-            for i in range(self.camera_count):
-                self.kill_video_process(i)
-            print(f"Camera Feeds Re-initialised")
+            if args:
+                self.camera_supervisor.restart_camera(args[0])
+                print(f"Camera Feed {args[0]} Re-initialised")
+            else:
+                self.camera_supervisor.restart_all()
+                print(f"Camera Feeds Re-initialised")
+        elif action == ActionEnum.START_CAM:
+            self.camera_supervisor.start_camera(args[0])
+        elif action == ActionEnum.STOP_CAM:
+            self.camera_supervisor.stop_camera(args[0])
+        elif action == ActionEnum.SET_CAM_PROFILE:
+            if self.camera_profiles.set_profile(args[0], args[1]):
+                self.apply_camera_profiles([args[0]])
+        elif action == ActionEnum.SET_CAM_ADAPTIVE:
+            print(f"Adaptive Camera Quality {'On' if args[0] else 'Off'}")
+            self.apply_camera_profiles(self.camera_profiles.set_adaptive(args[0]))
+        elif action == ActionEnum.CAM_FEEDBACK:
+            self.apply_camera_profiles(self.camera_profiles.feedback(args[0]))
         elif action == ActionEnum.MAINTAIN_ROV_DEPTH:
             self.maintain_depth = args[0]
 
@@ -349,10 +382,23 @@ class ROVInterface:
                 self.hold_depth = args[1]
             else:
                 print("No Longer Maintaining Depth")
+        elif action == ActionEnum.FETCH_BLACK_BOX:
+            if self.black_box is not None:
+                print(f"Sending black box records from the last {time.time() - args[0]:.0f} s")
+                self.black_box_requests.put((args[0], args[1]))
         elif action == ActionEnum.POWER_OFF_ROV:
             print("Closing")
             self.close()
 
+    def apply_camera_profiles(self, cameras: list[int]) -> None:
+        # Encoders can't change their resolution or bitrate while running, so each changed camera is restarted
+        for i in cameras:
+            profile = self.camera_profiles.profile(i)
+            print(f"Camera {i} now {profile['width']}x{profile['height']} at {profile['framerate']} fps, "
+                  f"{profile['bitrate'] / 1e6:.1f} Mbit/s")
+            self.camera_supervisor.restart_camera(i)
+        self.rov_data.camera_profiles = [self.camera_profiles.profile(i) for i in range(self.camera_count)]
+
     def close(self):
         print("Closing ROV Interface")
         self.closing = True
@@ -371,16 +417,21 @@ class ROVInterface:
             print("Exception raised when closing Input Thread:", e, file=sys.stderr)
         print("Closed Input Thread")
 
-        for video_thread in self.video_threads:
-            try:
-                if video_thread.is_alive():
-                    video_thread.join(10)
-            except Exception as e:
-                print("Exception raised when closing Video Thread:", e, file=sys.stderr)
-        print("Closed Video Threads")
-
-        for i in range(self.camera_count):
-            self.kill_video_process(i)
+        if self.uart_link is not None:
+            self.uart_link.stop()
+            print(self.uart_link.summary())
+            print("Closed UART Link")
+
+        if self.black_box is not None:
+            if self.black_box_thread is not None:
+                self.black_box_thread.shutdown()
+            self.black_box.close()
+            print(self.black_box.summary())
+            print("Closed Black Box")
+
+        print(log.summary())
+
+        self.camera_supervisor.stop_all()
         print("Closed Video Processes")
 
         try:
@@ -391,73 +442,68 @@ class ROVInterface:
         print("Closed Data Thread")
 
         try:
-            if self.data_poll_thread.is_alive():
-                self.data_poll_thread.join(10)
+            if self.sensor_scheduler.is_alive():
+                self.sensor_scheduler.stop(10)
         except Exception as e:
-            print("Exception raised when closing Data Poll Thread:", e, file=sys.stderr)
-        print("Closed Data Poll Thread")
+            print("Exception raised when closing Sensor Polling Thread:", e, file=sys.stderr)
+        print(self.sensor_scheduler.summary())
+        print("Closed Sensor Polling Thread")
+
+        if self.imu_acquisition is not None:
+            self.imu_acquisition.stop(10)
+            print(self.imu_acquisition.summary())
+            print("Closed IMU Thread")
+
+        if self.simulator is not None:
+            self.simulator.stop(10)
+            print(self.simulator.summary())
+            print("Closed Simulator")
 
         print("Closed")
         self.closed = True
 
-    def video_send(self, addr: str, port: int, i: int) -> None:
-        first = True
-        while not self.closing:
-            if not first:
-                print(f"Restarting Video Process on {addr}:{port}")
-            else:
-                print(f"Starting Video Process on {addr}:{port}")
-            first = False
-            self.kill_video_process(i)
-            time.sleep(1)
-            if self.local_test:
-                if os.name == "nt":
-                    process = (f'ffmpeg -fflags nobuffer -f dshow -i video="{camera_devices[i]}" '
-                               '-b:v 16M -preset ultrafast -tune zerolatency -g 30 '
-                               f' -r 30 -s 1920x1080 -preset fast -f mpegts udp://{addr}:{port}')
-
-                elif os.name == "posix":
-                    process = (f'ffmpeg -f avfoundation -i "{i}" -c:v libx264 '
-                               '-b:v 4M -preset ultrafast -tune zerolatency -g 30 '
-                               f'-preset ultrafast -f mpegts udp://{addr}:{port}')
-                else:
-                    print("Warning: Detected you are not running on Windows or Mac.\n"
-                          "If you are running this on the Raspberry PI, please set local_test to False",
-                          file=sys.stderr)
-                    process = (f"rpicam-vid -t {i} -n --width 1920 --height 1080"
-                               f" --codec libav --libav-format mpegts"
-                               f" --bitrate 30000000"
-                               f" -o udp://{addr}:{port}")
-            else:
-                process = (f"rpicam-vid -t 0 --camera {i} -n "
-                           f" --width {self.camera_data[i]['width']} --height {self.camera_data[i]['height']}"
-                           f" --codec libav --libav-format mpegts"
-                           f" --bitrate {self.camera_data[i]['bitrate']}"
-                           f" --framerate {self.camera_data[i]['framerate']}"
-                           f" --intra {self.camera_data[i]['framerate']}"
-                           " --low-latency"
-                           f" -o udp://{addr}:{port}")
-            print(process)
-            if self.show_camera_stdout:
-                process = subprocess.Popen(process, shell=True)
-                
-            else:
-                process = subprocess.Popen(process, shell=True,
-                                       stdout=subprocess.PIPE,
-                                       stderr=subprocess.PIPE,
-                                       stdin=subprocess.PIPE)
-            self.video_processes[i] = process
-            time.sleep(1)
-            while process.poll() is None and not self.closing:
-                pass
-            print("Video Process Died")
+    def video_command(self, i: int) -> list[str]:
+        # Command line of camera i's encoder, streaming MPEG-TS to its feed's port on the UI
+        addr = self.video_addr
+        port = self.port_bindings[f"feed_{i}"]
+        camera = self.camera_data[i] if i < len(self.camera_data) else {}
+        profile = self.camera_profiles.profile(i)
+        if camera.get("latency_test", False):
+            # Stream a synthetic pattern with capture times burned in so the UI can measure glass-to-glass latency
+            return [sys.executable, "-m", "datainterface.test_pattern_source", "--addr", addr, "--port", str(port),
+                    "--width", str(profile["width"]), "--height", str(profile["height"]),
+                    "--framerate", str(profile["framerate"]), "--bitrate", str(profile["bitrate"]),
+                    "--gop", str(profile["framerate"])]
+        if self.local_test:
+            if os.name == "nt":
+                return ["ffmpeg", "-fflags", "nobuffer", "-f", "dshow", "-i", f"video={camera_devices[i]}",
+                        "-b:v", "16M", "-preset", "ultrafast", "-tune", "zerolatency", "-g", "30",
+                        "-r", "30", "-s", "1920x1080", "-f", "mpegts", f"udp://{addr}:{port}"]
+            elif os.name == "posix":
+                return ["ffmpeg", "-f", "avfoundation", "-i", str(i), "-c:v", "libx264",
+                        "-b:v", "4M", "-preset", "ultrafast", "-tune", "zerolatency", "-g", "30",
+                        "-f", "mpegts", f"udp://{addr}:{port}"]
+            print("Warning: Detected you are not running on Windows or Mac.\n"
+                  "If you are running this on the Raspberry PI, please set local_test to False",
+                  file=sys.stderr)
+            return ["rpicam-vid", "-t", "0", "--camera", str(i), "-n", "--width", "1920", "--height", "1080",
+                    "--codec", "libav", "--libav-format", "mpegts", "--bitrate", "30000000",
+                    "-o", f"udp://{addr}:{port}"]
+        return ["rpicam-vid", "-t", "0", "--camera", str(i), "-n",
+                "--width", str(profile["width"]), "--height", str(profile["height"]),
+                "--codec", "libav", "--libav-format", "mpegts",
+                "--bitrate", str(profile["bitrate"]),
+                "--framerate", str(profile["framerate"]),
+                "--intra", str(profile["framerate"]),
+                "--low-latency",
+                "-o", f"udp://{addr}:{port}"]
 
 
 try:
-    stderr_io = io.StringIO()
-    with redirect_stderr(stderr_io) as redirected_stderr_io:
-        stdout_io = io.StringIO()
-        with redirect_stdout(stdout_io) as redirected_stdout_io:
+    # Output is shipped to the UI by the stdout thread, and echoed to the console
+    output_queue = LineQueue()
+    with redirect_stderr(LineQueueStream(output_queue, StdoutType.ROV_ERROR)):
+        with redirect_stdout(LineQueueStream(output_queue, StdoutType.ROV)):
             with open("rov_config.json", "r") as f:
                 config_file = json.load(f)
 
@@ -472,10 +518,10 @@ try:
 
             print(config_file)
 
-            interface = ROVInterface(redirected_stdout_io, redirected_stderr_io, **config_file, imu_sensor=imu_sensor)
+            interface = ROVInterface(output_queue, **config_file, imu_sensor=imu_sensor)
 
             while not interface.closed:
-                time.sleep(0)
+                time.sleep(0.1)
 
 
 except FileNotFoundError:
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+from threading import Lock
+
+import numpy as np
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+@dataclass
+class SiteCounters:
+    calls: int = 0
+    emitted: int = 0
+    suppressed: int = 0  # Since the last line emitted
+    total_suppressed: int = 0
+    last_emit: float = -float("inf")
+
+
+def format_value(value) -> str:
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(format_value(item) for item in value) + "]"
+    return str(value)
+
+
+class ROVLog:
+    """
+        Logging for the ROV's hot paths. Each line is a level, a message and key=value fields.
+        Every call site is rate limited on its own: a site logs at most once per interval, and the number of calls
+        suppressed since is added to its next line. Calls below the level, and suppressed calls, are only counted,
+        so their fields are never formatted. Warnings and errors go to stderr, everything else to stdout.
+    """
+
+    def __init__(self, level: int = INFO, interval: float = 1.0):
+        self.level = level
+        self.interval = interval
+        self.sites: dict[tuple[str, int], SiteCounters] = {}
+        self.lock = Lock()
+        self.filtered = 0  # Calls below the level
+
+    def set_level(self, level: int | str) -> None:
+        if isinstance(level, str):
+            names = {name: value for value, name in LEVEL_NAMES.items()}
+            if level.upper() not in names:
+                print(f"Unknown log level {level}, expected one of {list(names)}", file=sys.stderr)
+                return
+            level = names[level.upper()]
+        self.level = level
+
+    def debug(self, message: str, interval: float | None = None, **fields) -> None:
+        self.log(DEBUG, message, interval, fields, 2)
+
+    def info(self, message: str, interval: float | None = None, **fields) -> None:
+        self.log(INFO, message, interval, fields, 2)
+
+    def warning(self, message: str, interval: float | None = None, **fields) -> None:
+        self.log(WARNING, message, interval, fields, 2)
+
+    def error(self, message: str, interval: float | None = None, **fields) -> None:
+        self.log(ERROR, message, interval, fields, 2)
+
+    def log(self, level: int, message: str, interval: float | None = None, fields: dict | None = None,
+            depth: int = 1) -> None:
+        # interval overrides the default for this call site, 0 to never suppress it
+        if level < self.level:
+            self.filtered += 1
+            return
+        caller = sys._getframe(depth)
+        site = (caller.f_code.co_filename, caller.f_lineno)
+        interval = self.interval if interval is None else interval
+        now = time.monotonic()
+        with self.lock:
+            counters = self.sites.get(site)
+            if counters is None:
+                counters = self.sites[site] = SiteCounters()
+            counters.calls += 1
+            if now - counters.last_emit < interval:
+                counters.suppressed += 1
+                counters.total_suppressed += 1
+                return
+            suppressed, counters.suppressed = counters.suppressed, 0
+            counters.last_emit = now
+            counters.emitted += 1
+
+        text = f"{LEVEL_NAMES.get(level, level)} {message}"
+        if fields:
+            text += " " + " ".join(f"{key}={format_value(value)}" for key, value in fields.items())
+        if suppressed:
+            text += f" ({suppressed} similar suppressed)"
+        print(text, file=sys.stderr if level >= WARNING else sys.stdout)
+
+    def summary(self) -> str:
+        # The call sites that suppressed the most
+        busiest = sorted(self.sites.items(), key=lambda item: item[1].total_suppressed, reverse=True)
+        lines = [f"Log: {sum(c.emitted for c in self.sites.values())} lines written, "
+                 f"{sum(c.total_suppressed for c in self.sites.values())} suppressed, {self.filtered} below level"]
+        for (filename, line), counters in busiest[:5]:
+            if counters.total_suppressed:
+                lines.append(f"  {os.path.basename(filename)}:{line} {counters.calls} calls, "
+                             f"{counters.total_suppressed} suppressed")
+        return "\n".join(lines)
+
+
+# Shared by all of the ROV's modules, configured by ROVInterface
+log = ROVLog()
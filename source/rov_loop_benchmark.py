@@ -0,0 +1,192 @@
+# Headless benchmark of the control and telemetry loop between the UI and the ROV, with no UI, controller or ROV
+# hardware. Stands in for the UI: plays a simulator script (see rov_simulator.py) to the ROV's control port as
+# controller frames, and receives the ROV's telemetry, which echoes the last frame applied to the UART.
+# Run the ROV locally with "simulator" set in rov_config.json (see ROV_INTERFACE_INSTALL.md), or pass --launch to
+# start it and power it off afterwards. Raise the ROV's telemetry rate with data_poll in rov_config.json.
+# Reports the telemetry rate and interval jitter, stick to UART and round trip latency, and the ROV's task timing.
+#
+# Example: python rov_loop_benchmark.py --launch --duration 30 --rate 100 --script dive.json
+import argparse
+import json
+import math
+import os
+import pickle
+import subprocess
+import sys
+import time
+from threading import Event
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+os.chdir(script_dir)
+
+import numpy as np
+
+from data_classes.action_enum import ActionEnum
+from data_classes.controller_frame import ControllerFrame
+from datainterface.latency_stats import LatencyHistogram
+from datainterface.sock_stream_recv import SockStreamRecv
+from datainterface.sock_stream_send import SockStreamSend, SockSend
+from rov_simulator import Script, DEFAULT_SCRIPT
+
+
+class LoopBenchmark:
+    """
+        Stands in for App and DataInterface, providing only what the socket threads use. Frames are sampled from
+        the script at rate on a drift free schedule by the control thread itself. The UI and ROV share a clock
+        here, so stick to UART latency is measured directly.
+    """
+
+    def __init__(self, port_bindings: dict, script: Script, rate: float):
+        self.closing = False
+        self.script = script
+        self.period = 1 / rate
+        self.start_time = 0.0
+        self.next_tick = 0.0
+        self.sequence = 0
+        self.stopping = Event()
+
+        # Statistics
+        self.sample_times = np.full(65536, np.nan)  # Time each sequence number was sampled
+        self.frames_sent = 0
+        self.telemetry = 0
+        self.telemetry_bytes = 0
+        self.stdout_lines = 0
+        self.last_recv: float | None = None
+        self.last_echo = -1
+        self.interval_ms = LatencyHistogram(bin_ms=0.5, max_ms=1000)
+        self.transit_ms = LatencyHistogram(bin_ms=0.1, max_ms=100)
+        self.stick_to_uart_ms = LatencyHistogram(bin_ms=0.5, max_ms=500)
+        self.round_trip_ms = LatencyHistogram(bin_ms=1, max_ms=1000)
+        self.uart_ack_ms = LatencyHistogram(bin_ms=0.5, max_ms=100)
+        self.last_data = None
+
+        self.data_thread = SockStreamRecv(self, "localhost", port_bindings["data"], lambda payload: None,
+                                          on_recv_timed=self.on_data)
+        self.stdout_thread = SockStreamRecv(self, "localhost", port_bindings["stdout"], self.on_stdout)
+        self.control_thread = SockStreamSend(self, "localhost", port_bindings["control"], 0, self.next_frame)
+
+    def start(self) -> None:
+        self.start_time = self.next_tick = time.perf_counter()
+        self.data_thread.start()
+        self.stdout_thread.start()
+        self.control_thread.start()
+
+    def begin_measuring(self) -> None:
+        # Forgets everything from before, and restarts the script
+        self.frames_sent = self.telemetry = self.telemetry_bytes = self.stdout_lines = 0
+        for histogram in (self.interval_ms, self.transit_ms, self.stick_to_uart_ms, self.round_trip_ms,
+                          self.uart_ack_ms):
+            histogram.reset()
+        self.start_time = self.next_tick = time.perf_counter()
+
+    def stop(self) -> None:
+        self.closing = True
+        self.stopping.set()
+        for thread in (self.control_thread, self.data_thread, self.stdout_thread):
+            thread.join(5)
+
+    def next_frame(self) -> bytes | None:
+        delay = self.next_tick - time.perf_counter()
+        if delay > 0 and self.stopping.wait(delay):
+            return None
+        self.next_tick += self.period
+        if self.next_tick < time.perf_counter():
+            # Fell behind, so skip the missed ticks
+            self.next_tick += math.ceil((time.perf_counter() - self.next_tick) / self.period) * self.period
+
+        now = time.time()
+        frame = ControllerFrame.from_state(self.sequence, now, self.script(time.perf_counter() - self.start_time),
+                                           [], [])
+        self.sample_times[self.sequence & 0xFFFF] = now
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        self.frames_sent += 1
+        return frame.encode()
+
+    def on_data(self, payload_bytes: bytes, send_time: float, recv_time: float) -> None:
+        data = pickle.loads(payload_bytes)
+        self.last_data = data
+        self.telemetry += 1
+        self.telemetry_bytes += len(payload_bytes)
+        if self.last_recv is not None:
+            self.interval_ms.record((recv_time - self.last_recv) * 1000)
+        self.last_recv = recv_time
+        self.transit_ms.record((recv_time - send_time) * 1000)
+
+        sequence = data.controller_sequence
+        if sequence < 0 or sequence == self.last_echo:
+            return
+        self.last_echo = sequence
+        self.uart_ack_ms.record(data.uart_ack_latency)
+        sample_time = self.sample_times[sequence & 0xFFFF]
+        if np.isnan(sample_time):
+            return
+        self.stick_to_uart_ms.record((data.controller_applied_time - sample_time) * 1000)
+        self.round_trip_ms.record((recv_time - sample_time) * 1000)
+
+    def on_stdout(self, payload_bytes: bytes) -> None:
+        self.stdout_lines += len(pickle.loads(payload_bytes))
+
+    def report(self, elapsed: float) -> None:
+        print(f"Sent {self.frames_sent} controller frames ({self.frames_sent / elapsed:.1f}/s)")
+        print(f"Received {self.telemetry} telemetry messages ({self.telemetry / elapsed:.1f}/s, "
+              f"{self.telemetry_bytes / max(self.telemetry, 1):.0f} bytes each) and {self.stdout_lines} lines of output")
+        for name, histogram in (("telemetry interval", self.interval_ms), ("telemetry transit", self.transit_ms),
+                                ("stick to UART", self.stick_to_uart_ms), ("round trip", self.round_trip_ms),
+                                ("UART ack", self.uart_ack_ms)):
+            if histogram.count:
+                print(f"  {name:>18}: mean {histogram.mean():6.1f} ms, p50 {histogram.percentile(50):5.1f} ms, "
+                      f"p95 {histogram.percentile(95):5.1f} ms, p99 {histogram.percentile(99):5.1f} ms")
+        if self.last_data is not None:
+            for name, stats in self.last_data.task_timing.items():
+                print(f"  ROV {name}: {stats['rate']:.1f}/{stats['target_rate']:.1f} Hz, "
+                      f"late p99 {stats['late_p99_ms']:.1f} ms, run mean {stats['run_mean_ms']:.2f} ms, "
+                      f"{stats['overruns']} overruns")
+            attitude = self.last_data.attitude
+            print(f"  ROV finished at depth {self.last_data.depth:.2f} m, "
+                  f"attitude (pitch, yaw, roll) ({attitude.x:.1f}, {attitude.y:.1f}, {attitude.z:.1f})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the UI <-> ROV loop against the simulated ROV")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds to run for. Defaults to the script's")
+    parser.add_argument("--rate", type=float, default=100, help="Controller frames sent per second")
+    parser.add_argument("--script", help="JSON script of controller axes, see rov_simulator.py")
+    parser.add_argument("--repeat", action="store_true", help="Repeat the script until the duration is up")
+    parser.add_argument("--launch", action="store_true",
+                        help="Start rov_interface.py, which must have \"simulator\" set, and power it off after")
+    args = parser.parse_args()
+
+    with open("port_bindings.json") as f:
+        port_bindings = json.load(f)
+    script = Script.load(args.script) if args.script else Script(DEFAULT_SCRIPT)
+    script.repeat = script.repeat or args.repeat
+    duration = args.duration or script.duration
+
+    benchmark = LoopBenchmark(port_bindings, script, args.rate)
+    rov = None
+    if args.launch:
+        rov = subprocess.Popen([sys.executable, "rov_interface.py"], stdout=subprocess.DEVNULL)
+    benchmark.start()
+    try:
+        # Measure from the first telemetry, once the ROV is up
+        while benchmark.telemetry == 0:
+            time.sleep(0.05)
+        benchmark.begin_measuring()
+        start = time.perf_counter()
+        time.sleep(duration)
+        benchmark.report(time.perf_counter() - start)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if rov is not None:
+            SockSend(benchmark, "localhost", port_bindings["action"], ActionEnum.POWER_OFF_ROV)
+        benchmark.stop()
+        if rov is not None:
+            try:
+                rov.wait(30)
+            except subprocess.TimeoutExpired:
+                rov.kill()
+
+
+if __name__ == "__main__":
+    main()
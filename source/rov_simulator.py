@@ -0,0 +1,463 @@
+import json
+import math
+import pickle
+import struct
+import sys
+import time
+from collections import deque
+from threading import Condition, Lock
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from data_classes import uart_frame
+from data_classes.controller_frame import ControllerFrame
+from data_classes.vector3 import Vector3
+from imu_drivers import IMUDriver, IMUSample, GRAVITY
+from imu_fusion import IMUAcquisition, ComplementaryFilter, wrap_degrees
+from periodic_scheduler import PeriodicScheduler
+from rov_float_data_structures.rov_data import ROVData
+from thruster_mixing import ThrusterMixer
+
+# Settings of the simulated vehicle in the "vehicle" part of rov_config.json's "simulator" section, all optional.
+# Lists have a value for each of DOF_NAMES (x, y, z, roll, yaw, pitch).
+# mass: Mass plus added mass (kg) along x, y, z, and moment of inertia plus added inertia (kg m²) about each axis
+# linear_drag, quadratic_drag: Drag force (N) or moment (N m) per unit of velocity and per velocity squared
+# forward_thrust, reverse_thrust: Thrust (N) of each thruster at full output forwards and in reverse
+# dry_mass: Mass (kg) the ROV weighs, and net_buoyancy: Buoyancy less weight (N), positive floats
+# righting_arm: Height (m) of the centre of buoyancy above the centre of gravity, which rights roll and pitch
+# start_depth: Depth (m) the ROV starts at
+# accelerometer_noise (m/s²), gyro_noise (deg/s), heading_noise (deg), depth_noise (m): Standard deviation of the
+# noise on each IMU reading
+# vibration: Acceleration (m/s²) the thrusters shake the IMU with at full output, at vibration_hz
+DEFAULT_VEHICLE = {
+    "mass": [18.0, 22.0, 24.0, 0.35, 0.45, 0.45],
+    "linear_drag": [12.0, 18.0, 18.0, 0.8, 0.8, 0.8],
+    "quadratic_drag": [35.0, 60.0, 60.0, 1.5, 1.5, 1.5],
+    "forward_thrust": 36.0,
+    "reverse_thrust": 28.0,
+    "dry_mass": 12.0,
+    "net_buoyancy": 1.5,
+    "righting_arm": 0.02,
+    "start_depth": 1.0,
+    "accelerometer_noise": 0.05,
+    "gyro_noise": 0.5,
+    "heading_noise": 0.5,
+    "depth_noise": 0.01,
+    "vibration": 0.3,
+    "vibration_hz": 37.0,
+}
+
+# From DOF_NAMES order to body axes order: forces along x, y, z then moments about x (roll), y (pitch), z (yaw)
+BODY_ORDER = [0, 1, 2, 3, 5, 4]
+
+
+def rotation_matrix(roll: float, pitch: float, yaw: float) -> ndarray:
+    # Body to world, angles in radians. Body and world frames are x forward, y left, z up.
+    cr, sr, cp, sp, cy, sy = math.cos(roll), math.sin(roll), math.cos(pitch), math.sin(pitch), math.cos(yaw), math.sin(yaw)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+
+class VehicleModel:
+    """
+        Six degree of freedom rigid body model of the ROV. Thruster outputs are turned into thrust by each
+        thruster's forward or reverse thrust, and into forces and moments on the body by the same mixing matrix
+        the ROV mixes with, so the simulated ROV responds to commands as the thrusters are laid out.
+        Each degree of freedom has its own mass (including added mass) and linear and quadratic drag. Net buoyancy
+        pushes up in the world frame, and the centre of buoyancy sitting above the centre of gravity rights roll
+        and pitch. Coriolis and coupling between degrees of freedom are ignored, which is close enough at ROV
+        speeds.
+        step integrates with semi-implicit Euler in steps of at most max_step, so it stays stable however far it's
+        stepped at once.
+    """
+
+    def __init__(self, mixer: ThrusterMixer | None = None, vehicle: dict | None = None, max_step: float = 0.005,
+                 seed: int = 0):
+        self.mixer = mixer or ThrusterMixer()
+        self.vehicle = DEFAULT_VEHICLE | (vehicle or {})
+        self.max_step = max_step
+        self.rng = np.random.default_rng(seed)
+
+        # Wrench (body order) of each thruster at a thrust of 1 N
+        self.thrust_wrench = self.mixer.allocation.T[BODY_ORDER]
+        self.mass = np.asarray(self.vehicle["mass"], dtype=np.float64)[BODY_ORDER]
+        self.linear_drag = np.asarray(self.vehicle["linear_drag"], dtype=np.float64)[BODY_ORDER]
+        self.quadratic_drag = np.asarray(self.vehicle["quadratic_drag"], dtype=np.float64)[BODY_ORDER]
+        self.weight = self.vehicle["dry_mass"] * GRAVITY
+
+        # State. Velocity is in the body frame, in body order (m/s, then rad/s).
+        self.time = 0.0
+        self.roll = 0.0  # rad
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.position = np.array([0.0, 0.0, -self.vehicle["start_depth"]])  # World frame, z up
+        self.velocity = np.zeros(6)
+        self.acceleration = np.zeros(6)
+        self.outputs = np.zeros(self.mixer.thruster_count)
+        self.thrust = np.zeros(self.mixer.thruster_count)  # N
+
+    @property
+    def depth(self) -> float:
+        return -self.position[2]
+
+    def apply(self, outputs) -> None:
+        # Thruster outputs from -1 to 1, as sent to the ESP32. Reversed thrusters are wired backwards, so
+        # their output is reversed again to give their thrust.
+        self.outputs = np.clip(np.asarray(outputs, dtype=np.float64)[:self.mixer.thruster_count], -1, 1)
+        outputs = self.outputs * self.mixer.direction
+        self.thrust = np.where(outputs >= 0, outputs * self.vehicle["forward_thrust"],
+                               outputs * self.vehicle["reverse_thrust"])
+
+    def step(self, dt: float) -> None:
+        steps = max(1, math.ceil(dt / self.max_step - 1e-9))
+        for _ in range(steps):
+            self.substep(dt / steps)
+
+    def substep(self, dt: float) -> None:
+        rotation = rotation_matrix(self.roll, self.pitch, self.yaw)
+        up = rotation[2]  # The world's up in the body frame
+
+        wrench = self.thrust_wrench @ self.thrust
+        wrench[:3] += self.vehicle["net_buoyancy"] * up
+        # Buoyancy acting above the centre of gravity: (0, 0, righting_arm) x weight * up
+        righting = self.vehicle["righting_arm"] * self.weight
+        wrench[3] -= righting * up[1]
+        wrench[4] += righting * up[0]
+        wrench -= self.linear_drag * self.velocity + self.quadratic_drag * np.abs(self.velocity) * self.velocity
+
+        self.acceleration = wrench / self.mass
+        self.velocity += self.acceleration * dt
+
+        # Body rates to Euler angle rates
+        p, q, r = self.velocity[3:]
+        cos_pitch = max(math.cos(self.pitch), 1e-3)
+        sin_roll, cos_roll = math.sin(self.roll), math.cos(self.roll)
+        self.roll += (p + (sin_roll * q + cos_roll * r) * math.tan(self.pitch)) * dt
+        self.pitch += (cos_roll * q - sin_roll * r) * dt
+        self.yaw += (sin_roll * q + cos_roll * r) / cos_pitch * dt
+        self.roll = math.remainder(self.roll, 2 * math.pi)
+        self.yaw = math.remainder(self.yaw, 2 * math.pi)
+
+        self.position += rotation @ self.velocity[:3] * dt
+        if self.position[2] > 0:
+            # Floating at the surface, so it can't rise any further
+            self.position[2] = 0
+            rising = rotation[2] @ self.velocity[:3]
+            if rising > 0:
+                self.velocity[:3] -= rising * up
+        self.time += dt
+
+    def attitude(self) -> tuple[float, float, float]:
+        # Roll, pitch and yaw in degrees
+        return math.degrees(self.roll), math.degrees(self.pitch), math.degrees(self.yaw)
+
+    def imu_sample(self) -> IMUSample:
+        # What an IMU fixed to the body reads: gravity less the body's acceleration, seen from the body frame,
+        # plus noise and the thrusters' vibration
+        up = rotation_matrix(self.roll, self.pitch, self.yaw)[2]
+        acceleration = self.acceleration[:3] + GRAVITY * up
+        shake = self.vehicle["vibration"] * np.abs(self.outputs).mean()
+        acceleration += shake * math.sin(2 * math.pi * self.vehicle["vibration_hz"] * self.time)
+        acceleration += self.rng.normal(0, self.vehicle["accelerometer_noise"], 3)
+        gyro = np.degrees(self.velocity[3:]) + self.rng.normal(0, self.vehicle["gyro_noise"], 3)
+        heading = wrap_degrees(math.degrees(self.yaw) + self.rng.normal(0, self.vehicle["heading_noise"]))
+        return IMUSample(acceleration, gyro, heading, self.depth + self.rng.normal(0, self.vehicle["depth_noise"]))
+
+
+class SimulatedIMU(IMUDriver):
+    """
+        Reads the simulated vehicle's IMU, in place of the BNO055.
+    """
+
+    def __init__(self, simulator: "ROVSimulator", rate: float = 100):
+        self.simulator = simulator
+        self.native_rate = rate
+
+    def read(self) -> IMUSample | None:
+        with self.simulator.lock:
+            return self.simulator.model.imu_sample()
+
+    def temperature(self) -> float | None:
+        return 30.0
+
+
+class SimulatedSerial:
+    """
+        Stands in for the ESP32 on the serial port, with pyserial's read, write, in_waiting and close.
+        Command frames written are applied to the simulated vehicle and acknowledged. Each ack can be read once the
+        ESP32 would have sent it: ack_delay after the command, plus the time both frames take at baud.
+        byte_error_rate corrupts that fraction of the bytes sent back, to exercise the link's error handling.
+    """
+
+    def __init__(self, simulator: "ROVSimulator", baud: int = 115200, ack_delay: float = 0.001,
+                 byte_error_rate: float = 0.0, timeout: float = 0.1, clock: Callable[[], float] = time.perf_counter):
+        self.simulator = simulator
+        self.baud = baud
+        self.ack_delay = ack_delay
+        self.byte_error_rate = byte_error_rate
+        self.timeout = timeout
+        self.clock = clock
+        self.rng = np.random.default_rng()
+        self.parser = uart_frame.FrameParser()
+        self.pending: deque[tuple[float, bytes]] = deque()  # (Time it can be read, Bytes)
+        self.condition = Condition()
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        now = self.clock()
+        for frame_type, payload in self.parser.feed(data):
+            if frame_type != uart_frame.TYPE_COMMAND:
+                continue
+            try:
+                sequence, outputs = uart_frame.decode_command(payload)
+            except struct.error:
+                continue
+            self.simulator.apply(outputs)
+            ack = bytearray(uart_frame.encode_ack(sequence))
+            if self.byte_error_rate:
+                for i in np.flatnonzero(self.rng.random(len(ack)) < self.byte_error_rate):
+                    ack[i] ^= 1 << int(self.rng.integers(8))
+            ready = now + self.ack_delay + (len(data) + len(ack)) * 10 / self.baud  # 10 bits a byte
+            with self.condition:
+                self.pending.append((ready, bytes(ack)))
+                self.condition.notify_all()
+        return len(data)
+
+    @property
+    def in_waiting(self) -> int:
+        now = self.clock()
+        with self.condition:
+            return sum(len(data) for ready, data in self.pending if ready <= now)
+
+    def read(self, size: int = 1) -> bytes:
+        # Waits up to timeout for something to read, like pyserial
+        deadline = time.perf_counter() + self.timeout
+        data = bytearray()
+        with self.condition:
+            while not self.closed:
+                now = self.clock()
+                while self.pending and self.pending[0][0] <= now and len(data) < size:
+                    ready, chunk = self.pending.popleft()
+                    take = size - len(data)
+                    data += chunk[:take]
+                    if len(chunk) > take:
+                        self.pending.appendleft((ready, chunk[take:]))
+                remaining = deadline - time.perf_counter()
+                if data or remaining <= 0:
+                    break
+                wait = remaining if not self.pending else min(remaining, max(self.pending[0][0] - now, 0.0001))
+                self.condition.wait(wait)
+        return bytes(data)
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class Script:
+    """
+        Controller axes over time, for driving the simulator without a controller. Made from a list of steps, each
+        holding "axes" for "duration" seconds. Axes are the controller's, mapped to degrees of freedom by the
+        thrusters' axis_map. After the last step the axes are centred, or the steps start again if repeat.
+    """
+
+    def __init__(self, steps: list[dict], repeat: bool = False):
+        self.steps = steps
+        self.repeat = repeat
+        self.ends = np.cumsum([step["duration"] for step in steps])
+        self.duration = float(self.ends[-1]) if steps else 0.0
+
+    @classmethod
+    def load(cls, path: str) -> "Script":
+        # A JSON file of either a list of steps, or {"steps": [...], "repeat": true}
+        with open(path) as f:
+            script = json.load(f)
+        if isinstance(script, list):
+            return cls(script)
+        return cls(script["steps"], script.get("repeat", False))
+
+    def __call__(self, t: float) -> list[float]:
+        if not self.steps:
+            return []
+        if self.repeat:
+            t %= self.duration
+        i = int(np.searchsorted(self.ends, t, side="right"))
+        return list(self.steps[i]["axes"]) if i < len(self.steps) else []
+
+
+# With the default axis_map: axis 0 drives x, 1 z, 2 roll and 3 pitch
+DEFAULT_SCRIPT = [
+    {"duration": 2, "axes": [0, 0, 0, 0]},
+    {"duration": 5, "axes": [0, -0.6, 0, 0]},  # Dive
+    {"duration": 5, "axes": [0.8, 0, 0, 0]},  # Forwards
+    {"duration": 3, "axes": [0, 0, 0.5, 0]},  # Roll
+    {"duration": 3, "axes": [0, 0, 0, -0.5]},  # Pitch
+    {"duration": 4, "axes": [-0.5, 0.6, 0, 0]},  # Back up and surface
+    {"duration": 3, "axes": [0, 0, 0, 0]},
+]
+
+
+class ROVSimulator:
+    """
+        A simulated ROV standing in for the ESP32 and IMU, so the ROV interface and UI can be run and benchmarked
+        without hardware. Set "simulator" in rov_config.json to use it.
+        When started, the vehicle model is stepped at physics_rate on its own thread. open_serial opens a
+        SimulatedSerial for the UART link and imu returns a SimulatedIMU, which the ROV uses as normal.
+        run instead drives the ROV's whole pipeline from a script on one thread, stepping time itself, so it runs
+        as fast as the pipeline allows.
+    """
+
+    def __init__(self, mixer: ThrusterMixer | None = None, vehicle: dict | None = None, physics_rate: float = 200,
+                 imu_rate: float = 100, baud: int = 115200, ack_delay: float = 0.001, byte_error_rate: float = 0.0,
+                 seed: int = 0):
+        self.model = VehicleModel(mixer, vehicle, seed=seed)
+        self.imu_rate = imu_rate
+        self.baud = baud
+        self.ack_delay = ack_delay
+        self.byte_error_rate = byte_error_rate
+        self.lock = Lock()
+        self.scheduler = PeriodicScheduler("Simulator")
+        self.scheduler.add("physics", physics_rate, self.step)
+
+        # Statistics
+        self.commands = 0
+
+    @classmethod
+    def from_config(cls, config: dict | bool, mixer: ThrusterMixer | None = None) -> "ROVSimulator":
+        # From the "simulator" section of rov_config.json, true for the defaults
+        config = config if isinstance(config, dict) else {}
+        return cls(mixer, config.get("vehicle"), config.get("physics_rate", 200), config.get("imu_rate", 100),
+                   config.get("baud", 115200), config.get("ack_delay", 0.001), config.get("byte_error_rate", 0.0),
+                   config.get("seed", 0))
+
+    def start(self) -> None:
+        self.scheduler.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self.scheduler.stop(timeout)
+
+    def is_alive(self) -> bool:
+        return self.scheduler.is_alive()
+
+    def step(self, dt: float) -> None:
+        with self.lock:
+            self.model.step(dt)
+
+    def apply(self, outputs) -> None:
+        with self.lock:
+            self.model.apply(outputs)
+            self.commands += 1
+
+    def open_serial(self, clock: Callable[[], float] = time.perf_counter) -> SimulatedSerial:
+        return SimulatedSerial(self, self.baud, self.ack_delay, self.byte_error_rate, clock=clock)
+
+    def imu(self) -> SimulatedIMU:
+        return SimulatedIMU(self, self.imu_rate)
+
+    def run(self, seconds: float, script: Callable[[float], list[float]], command_rate: float = 100,
+            telemetry_rate: float = 10, black_box=None) -> dict:
+        # Runs seconds of simulated time, as fast as possible. Each tick of the IMU: the script's axes are sampled
+        # into a controller frame at command_rate, mixed, framed and written to the simulated serial port; the
+        # vehicle is stepped; and the IMU is read and fused. At telemetry_rate, ROVData is filled and pickled, as
+        # the data thread would, and recorded in black_box if given.
+        # Returns the time each stage took, and how far the fused attitude and depth were from the truth.
+        simulated_time = [0.0]
+        serial = self.open_serial(clock=lambda: simulated_time[0])
+        serial.timeout = 0
+        parser = uart_frame.FrameParser()
+        mixer = self.model.mixer
+        rov_data = ROVData()
+
+        def output(fusion: ComplementaryFilter, gyro: ndarray, acceleration: ndarray) -> None:
+            # As ROVInterface.imu_output
+            rov_data.attitude = Vector3(fusion.pitch, fusion.yaw, fusion.roll)
+            rov_data.angular_velocity = Vector3(*gyro)
+            rov_data.acceleration = Vector3(*acceleration)
+            rov_data.velocity = Vector3(*fusion.velocity)
+            if fusion.depth is not None:
+                rov_data.depth = fusion.depth
+
+        acquisition = IMUAcquisition(self.imu(), telemetry_rate, output)
+        dt = 1 / self.imu_rate
+        ticks = int(seconds * self.imu_rate)
+        command_every = max(1, round(self.imu_rate / command_rate))
+        telemetry_every = max(1, round(self.imu_rate / telemetry_rate))
+        stages = {name: 0.0 for name in ("command", "physics", "imu", "telemetry")}
+        errors = []
+        telemetry_bytes = 0
+        sequence = 0
+
+        start = time.perf_counter()
+        for tick in range(ticks):
+            simulated_time[0] = tick * dt
+            t0 = time.perf_counter()
+            if tick % command_every == 0:
+                frame = ControllerFrame.from_state(sequence, simulated_time[0], script(simulated_time[0]), [], [])
+                frame = ControllerFrame.decode(frame.encode())
+                outputs = mixer.mix(mixer.demand_from_axes(frame.axis_values()))
+                serial.write(uart_frame.encode_command(sequence, outputs))
+                sequence = (sequence + 1) & 0xFFFF
+            parser.feed(serial.read(max(serial.in_waiting, 1)))
+            t1 = time.perf_counter()
+            self.step(dt)
+            t2 = time.perf_counter()
+            acquisition.sample(dt)
+            t3 = time.perf_counter()
+            if tick % telemetry_every == 0:
+                rov_data.controller_sequence = frame.sequence
+                telemetry_bytes += len(pickle.dumps(rov_data))
+                if black_box is not None:
+                    black_box.record_telemetry(rov_data, timestamp=simulated_time[0])
+            t4 = time.perf_counter()
+            stages["command"] += t1 - t0
+            stages["physics"] += t2 - t1
+            stages["imu"] += t3 - t2
+            stages["telemetry"] += t4 - t3
+
+            if tick >= self.imu_rate:
+                # Once fusion has settled
+                roll, pitch, yaw = self.model.attitude()
+                fusion = acquisition.fusion
+                errors.append((fusion.roll - roll, fusion.pitch - pitch, wrap_degrees(fusion.yaw - yaw),
+                               (fusion.depth or 0) - self.model.depth))
+        elapsed = time.perf_counter() - start
+
+        rms = np.sqrt(np.mean(np.square(errors), axis=0)) if errors else np.zeros(4)
+        return {"simulated_s": ticks * dt,
+                "elapsed_s": elapsed,
+                "realtime_factor": ticks * dt / elapsed if elapsed > 0 else float("inf"),
+                "stage_us": {name: total / max(ticks, 1) * 1e6 for name, total in stages.items()},
+                "commands": self.commands,
+                "acks": parser.frames,
+                "telemetry_bytes": telemetry_bytes,
+                "rms_error": dict(zip(("roll", "pitch", "yaw", "depth"), rms.round(3).tolist())),
+                "final": self.state()}
+
+    def state(self) -> dict:
+        with self.lock:
+            roll, pitch, yaw = self.model.attitude()
+            return {"time": round(self.model.time, 3), "roll": round(roll, 2), "pitch": round(pitch, 2),
+                    "yaw": round(yaw, 2), "depth": round(float(self.model.depth), 3),
+                    "velocity": self.model.velocity[:3].round(3).tolist()}
+
+    def summary(self) -> str:
+        return f"{self.scheduler.summary()}\nSimulator {self.commands} commands applied, {self.state()}"
+
+
+if __name__ == "__main__":
+    # Run a script through the simulated ROV faster than real time:
+    # python rov_simulator.py [script.json] [seconds] [imu_rate] [telemetry_rate]
+    script = Script.load(sys.argv[1]) if len(sys.argv) > 1 else Script(DEFAULT_SCRIPT)
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else script.duration
+    simulator = ROVSimulator(imu_rate=float(sys.argv[3]) if len(sys.argv) > 3 else 100)
+    result = simulator.run(seconds, script, telemetry_rate=float(sys.argv[4]) if len(sys.argv) > 4 else 10)
+    print(f"Simulated {result['simulated_s']:.1f} s in {result['elapsed_s']:.2f} s "
+          f"({result['realtime_factor']:.0f}x real time)")
+    print("Per IMU tick: " + ", ".join(f"{name} {us:.1f} us" for name, us in result["stage_us"].items()))
+    print(f"{result['commands']} commands, {result['acks']} acks, {result['telemetry_bytes']} bytes of telemetry")
+    print("RMS fusion error:", result["rms_error"])
+    print("Final state:", result["final"])
@@ -0,0 +1,96 @@
+import sys
+import time
+
+import numpy as np
+from numpy import ndarray
+
+DOF_NAMES = ("x", "y", "z", "roll", "yaw", "pitch")
+
+# Contribution of each thruster (columns) to each degree of freedom (rows)
+DEFAULT_MIXING_MATRIX = [
+    [0, 0, -0.707, 0.707, 0.707, -0.707],  # x
+    [0, 0, 0.707, 0.707, 0.707, 0.707],  # y
+    [1, 1, 0, 0, 0, 0],  # z
+    [0, 0, -0.0707, -0.0707, 0.0707, -0.0707],  # roll
+    [-0.13, -0.13, -0.0707, -0.0707, -0.0707, -0.0707],  # yaw
+    [0, 0, -0.182, 0.182, -0.182, 0.182]  # pitch
+]
+
+# Controller axis driving each degree of freedom, or None if it isn't driven
+DEFAULT_AXIS_MAP = [0, None, 1, 2, None, 3]
+
+# Settings of each thruster in the "curves" list of rov_config.json's "thrusters" section, all optional:
+# forward_gain, reverse_gain: Scale of forward and reverse output, to even out propellers that push harder one way
+# deadband: Smallest output that turns the thruster, which any non-zero output is raised to
+# reversed: The thruster is wired or mounted backwards
+DEFAULT_CURVE = {"forward_gain": 1.0, "reverse_gain": 1.0, "deadband": 0.0, "reversed": False}
+
+
+class ThrusterMixer:
+    """
+        Turns a demand in each of the six degrees of freedom, from -1 to 1, into an output for each thruster from
+        -1 to 1. The mixing matrix is kept as a NumPy array so that mixing is one matrix product.
+        If any thruster would saturate, every output is scaled down by the same factor. That keeps the direction of
+        the demanded motion, where clipping each thruster separately would turn the ROV off course.
+        Each thruster's output is then shaped by its curve.
+    """
+
+    def __init__(self, matrix: list[list[float]] | None = None, curves: list[dict] | None = None,
+                 axis_map: list[int | None] | None = None):
+        # Thrusters x DOF, so that outputs = allocation @ demand
+        self.allocation = np.ascontiguousarray(np.asarray(matrix or DEFAULT_MIXING_MATRIX, dtype=np.float64).T)
+        self.thruster_count, dof_count = self.allocation.shape
+        if dof_count != len(DOF_NAMES):
+            raise ValueError(f"The mixing matrix needs a row for each of {DOF_NAMES}, not {dof_count} rows")
+        self.axis_map = axis_map or DEFAULT_AXIS_MAP
+
+        curves = [DEFAULT_CURVE | curve for curve in (curves or [])]
+        curves += [DEFAULT_CURVE] * (self.thruster_count - len(curves))
+        self.forward_gain = np.array([curve["forward_gain"] for curve in curves])
+        self.reverse_gain = np.array([curve["reverse_gain"] for curve in curves])
+        self.deadband = np.array([curve["deadband"] for curve in curves])
+        self.direction = np.array([-1.0 if curve["reversed"] else 1.0 for curve in curves])
+
+        # Statistics
+        self.saturated = 0  # Demands that had to be scaled down
+
+    @classmethod
+    def from_config(cls, config: dict | None) -> "ThrusterMixer":
+        # From the "thrusters" section of rov_config.json, which may set "matrix", "curves" and "axis_map"
+        config = config or {}
+        try:
+            return cls(config.get("matrix"), config.get("curves"), config.get("axis_map"))
+        except (ValueError, KeyError, TypeError) as e:
+            print("Invalid thruster config, using the default mixing:", e, file=sys.stderr)
+            return cls()
+
+    def demand_from_axes(self, axes: list[float]) -> ndarray:
+        # Demand in each degree of freedom from controller axes, by the axis map. Missing axes count as centred.
+        return np.array([axes[axis] if axis is not None and axis < len(axes) else 0.0 for axis in self.axis_map],
+                        dtype=np.float64)
+
+    def mix(self, demand: ndarray) -> ndarray:
+        outputs = self.allocation @ np.clip(demand, -1, 1)
+
+        peak = np.abs(outputs).max()
+        if peak > 1:
+            outputs /= peak
+            self.saturated += 1
+
+        outputs *= np.where(outputs >= 0, self.forward_gain, self.reverse_gain)
+        # Rescale magnitudes into [deadband, 1] so that small demands still turn the thruster
+        magnitude = np.abs(outputs)
+        outputs = np.where(magnitude > 1e-6, np.sign(outputs) * (self.deadband + (1 - self.deadband) * magnitude), 0)
+        return np.clip(outputs * self.direction, -1, 1)
+
+
+if __name__ == "__main__":
+    # Time mixing: python thruster_mixing.py [iterations]
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    mixer = ThrusterMixer()
+    demands = np.random.default_rng(0).uniform(-1, 1, (iterations, len(DOF_NAMES)))
+    start = time.perf_counter()
+    for demand in demands:
+        mixer.mix(demand)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed / iterations * 1e6:.1f} us per mix, {mixer.saturated / iterations * 100:.0f}% of demands saturated")
@@ -0,0 +1,193 @@
+import struct
+import sys
+import time
+from threading import Thread, Condition, Event
+from typing import Any, Callable
+
+import numpy as np
+
+from data_classes import uart_frame
+from datainterface.latency_stats import LatencyHistogram
+from rov_log import log
+
+try:
+    import serial
+    SerialException = serial.SerialException
+except ModuleNotFoundError:
+    serial = None
+    SerialException = OSError
+
+
+class UartLink:
+    """
+        Sends thruster commands to the ESP32 as binary frames (see data_classes/uart_frame.py) and reads its
+        acknowledgements and telemetry back on the same port.
+
+        Commands are written by a writer thread rather than the thread receiving controller input, so a slow or
+        stalled ESP32 never holds up control. Only the latest command matters, so send replaces a command that
+        hasn't been written yet rather than queueing behind it; replaced commands are counted.
+        A reader thread parses everything the ESP32 sends. The time from writing each command to its ack is
+        recorded in ack_ms. The port is opened by the writer thread, and reopened after any error.
+        open_serial, if given, opens something with pyserial's read, write, in_waiting and close in place of the
+        port, such as a simulator's.
+    """
+
+    def __init__(self, port: str, baud: int, on_sent: Callable[[Any, np.ndarray], None] | None = None,
+                 reopen_interval: float = 1, write_timeout: float = 0.5, open_serial: Callable[[], Any] | None = None):
+        self.port = port
+        self.baud = baud
+        self.on_sent = on_sent
+        self.reopen_interval = reopen_interval
+        self.write_timeout = write_timeout
+        self.open_serial = open_serial
+        self.uart = None
+        self.opened = Event()
+        self.stopping = Event()
+
+        # Latest command not yet written, with the context passed to on_sent with the outputs once it is
+        self.command: tuple[np.ndarray, Any] | None = None
+        self.condition = Condition()
+        self.sequence = 0
+
+        self.parser = uart_frame.FrameParser()
+        self.telemetry: tuple[int, ...] = ()  # Values of the latest ESP32 telemetry frame
+        self.applied_sequence = -1  # Sequence of the last command the ESP32 acknowledged
+
+        # Statistics
+        self.sent_times = np.full(65536, np.nan)  # Time each sequence number was written
+        self.ack_ms = LatencyHistogram(bin_ms=0.5, max_ms=100)
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.replaced = 0  # Commands replaced by a newer one before being written
+        self.acks = 0
+        self.nacks = 0  # Acks with a non-zero status
+        self.telemetry_frames = 0
+        self.write_errors = 0
+        self.reopens = 0  # Opens after the first, each after an error closed the port
+        self.opens = 0
+
+        self.writer_thread = Thread(target=self.run_writer, daemon=True)
+        self.reader_thread = Thread(target=self.run_reader, daemon=True)
+
+    def start(self) -> None:
+        self.writer_thread.start()
+        self.reader_thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self.stopping.set()
+        with self.condition:
+            self.condition.notify_all()
+        self.writer_thread.join(timeout)
+        self.reader_thread.join(timeout)
+        self.close_port()
+
+    def send(self, outputs: np.ndarray, context: Any = None) -> None:
+        with self.condition:
+            if self.command is not None:
+                self.replaced += 1
+            self.command = (outputs, context)
+            self.condition.notify()
+
+    def open_port(self) -> bool:
+        if self.open_serial is not None:
+            self.uart = self.open_serial()
+            self.opened.set()
+            return True
+        if serial is None:
+            log.error("❌ Failed to open UART: pyserial is not installed", interval=60)
+            return False
+        try:
+            # The read timeout lets the reader thread notice when the link is stopped
+            self.uart = serial.Serial(self.port, self.baud, timeout=0.1, write_timeout=self.write_timeout)
+        except (SerialException, ValueError) as e:
+            # Retried every reopen_interval while the ESP32 is unplugged
+            log.error("❌ Failed to open UART", interval=30, port=self.port, error=e)
+            return False
+        print(f"✅ UART opened on {self.port} at {self.baud} baud.")
+        self.opened.set()
+        return True
+
+    def close_port(self) -> None:
+        self.opened.clear()
+        if self.uart is not None:
+            try:
+                self.uart.close()
+            except Exception as e:
+                print("Exception raised when closing UART:", e, file=sys.stderr)
+            self.uart = None
+
+    def run_writer(self) -> None:
+        while not self.stopping.is_set():
+            if not self.opened.is_set():
+                if not self.open_port():
+                    self.stopping.wait(self.reopen_interval)
+                    continue
+                # Counted here rather than where errors close the port, as one error may close it from both threads
+                self.opens += 1
+                self.reopens = self.opens - 1
+
+            with self.condition:
+                self.condition.wait_for(lambda: self.command is not None or self.stopping.is_set())
+                if self.command is None:
+                    continue
+                (outputs, context), self.command = self.command, None
+
+            data = uart_frame.encode_command(self.sequence, outputs)
+            try:
+                self.uart.write(data)
+            except (SerialException, OSError, AttributeError) as e:
+                # AttributeError if the reader thread closed the port after an error
+                self.write_errors += 1
+                log.error("Serial Connection to ESP32 Failed", error=e)
+                self.close_port()
+                continue
+
+            self.sent_times[self.sequence] = time.perf_counter()
+            self.sequence = (self.sequence + 1) & 0xFFFF
+            self.frames_sent += 1
+            self.bytes_sent += len(data)
+            if self.on_sent is not None:
+                self.on_sent(context, outputs)
+
+    def run_reader(self) -> None:
+        while not self.stopping.is_set():
+            if not self.opened.wait(0.1):
+                continue
+            try:
+                uart = self.uart
+                data = uart.read(max(uart.in_waiting, 1))
+            except (SerialException, OSError, AttributeError, TypeError):
+                # The writer thread reopens the port
+                self.close_port()
+                continue
+            if data:
+                for frame_type, payload in self.parser.feed(data):
+                    self.handle_frame(frame_type, payload)
+
+    def handle_frame(self, frame_type: int, payload: bytes) -> None:
+        try:
+            if frame_type == uart_frame.TYPE_ACK:
+                sequence, status = uart_frame.decode_ack(payload)
+                self.acks += 1
+                if status:
+                    self.nacks += 1
+                self.applied_sequence = sequence
+                sent_time = self.sent_times[sequence]
+                if not np.isnan(sent_time):
+                    self.ack_ms.record((time.perf_counter() - sent_time) * 1000)
+                    self.sent_times[sequence] = np.nan
+            elif frame_type == uart_frame.TYPE_TELEMETRY:
+                self.applied_sequence, self.telemetry = uart_frame.decode_telemetry(payload)
+                self.telemetry_frames += 1
+        except struct.error as e:
+            log.warning("Invalid UART frame", type=frame_type, error=e)
+
+    def errors(self) -> int:
+        return self.parser.crc_errors + self.write_errors
+
+    def summary(self) -> str:
+        return (f"UART {self.frames_sent} commands sent ({self.bytes_sent} bytes), {self.replaced} replaced before "
+                f"sending, {self.acks} acked ({self.nacks} refused). Ack mean {self.ack_ms.mean():.1f} ms, "
+                f"p95 {self.ack_ms.percentile(95):.1f} ms. {self.telemetry_frames} telemetry frames, "
+                f"{self.parser.crc_errors} CRC errors, {self.parser.skipped_bytes} bytes skipped, "
+                f"{self.write_errors} write errors, {self.reopens} reopens")
@@ -0,0 +1,236 @@
+# Headless benchmark of the UI's video pipeline: VideoRecv -> DataInterface -> VideoDisplay.
+# Each feed is fed by a synthetic test pattern stream (datainterface/test_pattern_source.py) over local UDP,
+# so no ROV, cameras or display are needed. Qt renders offscreen.
+# Reports per feed: decode fps, render fps, dropped frames, latency of each stage and CPU use.
+#
+# Example: python video_benchmark.py --feeds 2 --width 1920 --height 1080 --bitrate 8000000 --process
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+os.chdir(script_dir)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QThread, QTimer, Qt
+from PyQt6.QtWidgets import QApplication, QLabel
+from numpy import ndarray
+
+from datainterface.data_interface import DataInterface
+from datainterface.frame_processing import load_fisheye_calibration
+from datainterface.latency_stats import FrameTiming
+from datainterface.render_scheduler import RenderScheduler
+from datainterface.video_display import VideoDisplay
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def cpu_seconds(stat_path: str) -> float:
+    # User + system time of a process (/proc/<pid>/stat) or thread (/proc/self/task/<tid>/stat)
+    try:
+        with open(stat_path) as f:
+            # The command name may contain spaces, so split after it
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return 0
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class BenchmarkApp(QApplication):
+    """
+        Stands in for App, providing only what DataInterface and the video classes use.
+    """
+
+    def __init__(self, argv: list[str], feed_config: dict, port_bindings: dict):
+        super().__init__(argv)
+        self.closing = False
+        self.UI_IP = "localhost"
+        self.ROV_IP = "localhost"
+        self.FLOAT_IP = "localhost"
+        self.telemetry_display_fps = 30
+        self.feed_config = feed_config
+        self.port_bindings = port_bindings
+        self.data_interface: DataInterface | None = None
+
+
+class FeedStats:
+    """
+        Counts the frames a feed's VideoRecv emits. Called directly from the decode thread.
+    """
+
+    def __init__(self, framerate: int):
+        self.framerate = framerate
+        self.reset()
+
+    def reset(self) -> None:
+        self.frames = 0
+        self.first_pts: float | None = None
+        self.last_pts: float | None = None
+        self.cpu_start = 0.0
+
+    def on_recv(self, frame: ndarray, timing: FrameTiming) -> None:
+        self.frames += 1
+        if timing.pts is not None:
+            if self.first_pts is None:
+                self.first_pts = timing.pts
+            self.last_pts = timing.pts
+
+    def expected_frames(self) -> int:
+        # Frames the source sent between the first and last frame decoded, going by their timestamps
+        if self.first_pts is None:
+            return 0
+        return round((self.last_pts - self.first_pts) * self.framerate) + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the UI's video pipeline against synthetic streams")
+    parser.add_argument("--feeds", type=int, default=2)
+    parser.add_argument("--type", choices=["default", "fisheye", "stereo"], default="default",
+                        help="Feed type given to every feed in place of feed_config.json")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--framerate", type=int, default=30)
+    parser.add_argument("--bitrate", type=int, default=4000000)
+    parser.add_argument("--gop", type=int, default=30)
+    parser.add_argument("--duration", type=float, default=20, help="Seconds measured, after the warmup")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds to run before measuring")
+    parser.add_argument("--render-fps", type=float, default=60)
+    parser.add_argument("--display-size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"),
+                        help="Size of each view. Feeds are decoded at this size rather than full size when given")
+    parser.add_argument("--process", action="store_true", help="Decode each feed in a worker process")
+    parser.add_argument("--base-port", type=int, default=53524,
+                        help="UDP port of the first feed. Kept apart from port_bindings.json so a running UI "
+                             "isn't disturbed")
+    args = parser.parse_args()
+
+    with open("port_bindings.json") as f:
+        port_bindings = json.load(f)
+    feed_config = {}
+    for i in range(args.feeds):
+        port_bindings[f"feed_{i}"] = args.base_port + i
+        conf = {"type": args.type, "latency_test": True, "width": args.width, "height": args.height}
+        if args.display_size:
+            conf["display_sizes"] = {"benchmark": args.display_size}
+        if args.type == "fisheye":
+            conf["undistort_file"] = "fisheye_calibration_data.npz"
+            load_fisheye_calibration(conf)
+        feed_config[str(i)] = conf
+
+    # Start the sources first so that the receivers connect straight away
+    sources = [subprocess.Popen([sys.executable, "-m", "datainterface.test_pattern_source",
+                                 "--port", str(port_bindings[f"feed_{i}"]),
+                                 "--width", str(args.width), "--height", str(args.height),
+                                 "--framerate", str(args.framerate), "--bitrate", str(args.bitrate),
+                                 "--gop", str(args.gop)])
+               for i in range(args.feeds)]
+
+    app = BenchmarkApp(sys.argv, feed_config, port_bindings)
+    data_interface = DataInterface(app, [], sys.__stdout__, sys.__stderr__, args.feeds, args.process)
+    app.data_interface = data_interface
+
+    feed_stats = []
+    for video_thread in data_interface.video_threads:
+        stats = FeedStats(args.framerate)
+        video_thread.on_recv.connect(stats.on_recv, Qt.ConnectionType.DirectConnection)
+        feed_stats.append(stats)
+
+    # One visible label per camera frame, rendered the same way as the Pilot and Copilot windows
+    render_thread = QThread()
+    scheduler = RenderScheduler(fps=args.render_fps)
+    labels = []
+    displays = []
+    for frame_index in range(len(data_interface.camera_frames)):
+        label = QLabel()
+        label.resize(*(args.display_size or (args.width // 2, args.height // 2)))
+        label.show()
+        display = VideoDisplay(label, frame_index, app)
+        display.pixmap_ready.connect(lambda pixmap, timing, _display=display: _display.show_pixmap(pixmap, timing))
+        display.attach_camera_feed()
+        display.moveToThread(render_thread)
+        scheduler.add_display(display)
+        labels.append(label)
+        displays.append(display)
+    scheduler.moveToThread(render_thread)
+    render_thread.started.connect(scheduler.start)
+    render_thread.start()
+
+    # Camera frame index of the first camera of each feed
+    feed_cameras = []
+    camera = 0
+    for i in range(args.feeds):
+        feed_cameras.append(camera)
+        camera += 2 if feed_config[str(i)]["type"] == "stereo" else 1
+
+    def feed_cpu_seconds(feed: int) -> float:
+        video_thread = data_interface.video_threads[feed]
+        seconds = cpu_seconds(f"/proc/self/task/{video_thread.thread.native_id}/stat")
+        worker = video_thread.worker
+        if worker is not None:
+            seconds += cpu_seconds(f"/proc/{worker.pid}/stat")
+        return seconds
+
+    measure_start = 0.0
+    process_cpu_start = 0.0
+
+    def start_measuring() -> None:
+        nonlocal measure_start, process_cpu_start
+        for feed, stats in enumerate(feed_stats):
+            stats.reset()
+            stats.cpu_start = feed_cpu_seconds(feed)
+        for display in displays:
+            display.frames_received = 0
+            display.frames_rendered = 0
+            display.camera_feed.latency.reset()
+        process_cpu_start = cpu_seconds("/proc/self/stat")
+        measure_start = time.perf_counter()
+
+    def report() -> None:
+        elapsed = time.perf_counter() - measure_start
+        print(f"\n{args.feeds} x {args.width}x{args.height} @ {args.framerate} fps, {args.bitrate / 1e6:.1f} Mbit/s, "
+              f"GOP {args.gop}, {args.type} feeds decoded in {'processes' if args.process else 'threads'}, "
+              f"{elapsed:.1f} s measured")
+        for feed, stats in enumerate(feed_stats):
+            expected = stats.expected_frames()
+            dropped = max(expected - stats.frames, 0)
+            display = displays[feed_cameras[feed]]
+            histograms = display.camera_feed.latency.histograms
+            cpu = (feed_cpu_seconds(feed) - stats.cpu_start) / elapsed * 100
+
+            print(f"Feed {feed}:")
+            print(f"  decode {stats.frames / elapsed:6.1f} fps, render {display.frames_rendered / elapsed:6.1f} fps, "
+                  f"dropped {dropped} of {expected} ({dropped / expected * 100 if expected else math.nan:.1f}%), "
+                  f"decode CPU {cpu:.0f}%")
+            for stage in ("queue", "decode", "process", "render", "paint", "total", "glass_to_glass"):
+                histogram = histograms[stage]
+                if histogram.count:
+                    print(f"  {stage:>14}: mean {histogram.mean():6.1f} ms, p50 {histogram.percentile(50):4.0f} ms, "
+                          f"p95 {histogram.percentile(95):4.0f} ms, p99 {histogram.percentile(99):4.0f} ms")
+        process_cpu = (cpu_seconds("/proc/self/stat") - process_cpu_start) / elapsed * 100
+        print(f"UI process CPU {process_cpu:.0f}% (100% is one core)")
+
+    def finish() -> None:
+        report()
+        app.closing = True
+        # The scheduler's timer stops with its thread's event loop
+        render_thread.quit()
+        render_thread.wait(5000)
+        for source in sources:
+            source.terminate()
+        data_interface.close()
+        app.quit()
+
+    QTimer.singleShot(int(args.warmup * 1000), start_measuring)
+    QTimer.singleShot(int((args.warmup + args.duration) * 1000), finish)
+    try:
+        app.exec()
+    finally:
+        for source in sources:
+            source.kill()
+
+
+if __name__ == "__main__":
+    main()